@@ -3,9 +3,22 @@ from app.regex.parser import Parser
 from app.ds.ast import ASTNode
 from app.fa.fa import FA
 from app.fa.fa_builder import FABuilder
+from app.fa.position_builder import PositionBuilder
+from app.fa.derivative_dfa import DerivativeBuilder, DerivativeDFA
 from app.fa.nfa_to_dfa import convert_to_dfa
 from app.fa.shortest_path import find_shortest_accepting_string
 from app.fa.dfa_minimization import minimize_dfa
+from app.pattern import Pattern, PatternSet, compile_pattern
+from app.parallel import match_file, match_record
+from app.fa.async_stream import AsyncStreamMatcher, match_stream, stream_events
+from app.cache import compiled_cache, fa_cache_key, set_cache_size, cache_stats, purge_cache
+
+# FA construction algorithms selectable in build_fa
+BUILDERS = {
+    'thompson': FABuilder,
+    'followpos': PositionBuilder,
+    'derivatives': DerivativeBuilder,
+}
 
 def build_fa(regex,
          verbose=False,
@@ -13,8 +26,40 @@ def build_fa(regex,
          if_convert_to_dfa=False,
          if_find_shortest_accepting_string=False,
          if_minimize_dfa=False, 
-         if_report_stats=False):
-    
+         if_report_stats=False,
+         use_cache=True,
+         byte_mode=False,
+         construction='thompson'):
+    """
+    Runs the regex -> FA pipeline with the selected stages.
+
+    Results are kept in the process-wide compiled_cache (see app.cache), keyed by
+    the regex and the stage options, so building the same automaton twice is a
+    dictionary lookup. Cached FAs are shared: do not modify them. Calls that
+    print diagnostics (verbose, if_find_shortest_accepting_string,
+    if_report_stats) always rebuild.
+
+    With byte_mode=True the automaton is built over bytes: every symbol is
+    replaced by its UTF-8 encoding (see ASTNode.to_bytes), so the result
+    matches bytes-like inputs directly, e.g. fa.run(mmap_object).
+
+    construction selects how the initial FA is built from the AST:
+    'thompson' gives a Thompson epsilon-NFA (FABuilder), 'followpos' a DFA
+    built directly from the positions of the regex (PositionBuilder), which
+    skips the epsilon-NFA and makes if_convert_to_dfa unnecessary, or
+    'derivatives' a DFA of Brzozowski derivatives (DerivativeBuilder), also
+    deterministic.
+    """
+    if construction not in BUILDERS:
+        raise ValueError(f"unknown construction '{construction}', expected one of {', '.join(BUILDERS)}")
+    use_cache = use_cache and not (verbose or if_find_shortest_accepting_string or if_report_stats)
+    if use_cache:
+        cache_key = fa_cache_key(regex, if_remove_duplicate_transitions, if_convert_to_dfa, if_minimize_dfa,
+                                 byte_mode, construction)
+        fa = compiled_cache.get(cache_key)
+        if fa is not None:
+            return fa
+
     if verbose:
         print("regex:",regex)
     
@@ -34,6 +79,8 @@ def build_fa(regex,
         parse_start = time.time()
         parser = Parser(tokens)
         ast = parser.parse()
+        if byte_mode:
+            ast = ast.to_bytes()
         stats['parsing_time'] = time.time() - parse_start
         
         # FA Building stats
@@ -42,7 +89,7 @@ def build_fa(regex,
         def add_to_list(node):
             ast_list.append(node)
         ast.traverse_postorder(add_to_list)
-        fab = FABuilder()
+        fab = BUILDERS[construction]()
         fa = fab.build_from_postorder(ast_list)
         stats['fa_building_time'] = time.time() - fa_build_start
         stats['initial_states'] = len(fa.states)
@@ -52,11 +99,13 @@ def build_fa(regex,
         tokens = lexer.tokenize()
         parser = Parser(tokens)
         ast = parser.parse()
+        if byte_mode:
+            ast = ast.to_bytes()
         ast_list = []
         def add_to_list(node):
             ast_list.append(node)
         ast.traverse_postorder(add_to_list)
-        fab = FABuilder()
+        fab = BUILDERS[construction]()
         fa = fab.build_from_postorder(ast_list)
 
     if verbose:
@@ -69,7 +118,7 @@ def build_fa(regex,
     if if_convert_to_dfa:
         if if_report_stats:
             dfa_start = time.time()
-        fa = convert_to_dfa(fa)
+        fa = convert_to_dfa(fa, stats if if_report_stats else None)
         if if_report_stats:
             stats['dfa_conversion_time'] = time.time() - dfa_start
             stats['dfa_states'] = len(fa.states)
@@ -91,7 +140,7 @@ def build_fa(regex,
         if if_report_stats:
             stats['shortest_string_time'] = time.time() - shortest_start
         print(f"\n---\nShortest accepting string: {shortest_string}")
-        print(f"Path: {path}")
+        print(f"Path: {None if path is None else [fa.name_of(state) for state in path]}")
 
     if if_report_stats:
         stats['total_time'] = time.time() - start_time
@@ -104,6 +153,7 @@ def build_fa(regex,
         
         if if_convert_to_dfa:
             print(f"DFA conversion time: {stats['dfa_conversion_time']:.7f} seconds")
+            print(f"Visited subsets: {stats['visited_subsets']}")
             print(f"DFA states: {stats['dfa_states']}")
             print(f"DFA transitions: {stats['dfa_transitions']}")
             
@@ -122,4 +172,7 @@ def build_fa(regex,
             
         print(f"Total time: {stats['total_time']:.7f} seconds")
 
-    return fa
\ No newline at end of file
+    if use_cache:
+        compiled_cache.put(cache_key, fa)
+
+    return fa
@@ -0,0 +1,29 @@
+from app.ds.lru_cache import LRUCache
+
+# Process-wide cache of compiled automata and patterns, shared by
+# app.app.build_fa and app.pattern.compile_pattern. Keys start with the kind
+# of object stored ('fa' or 'pattern') followed by the regex and the options
+# that affect the result.
+compiled_cache = LRUCache(maxsize=512)
+
+
+def fa_cache_key(regex, if_remove_duplicate_transitions, if_convert_to_dfa, if_minimize_dfa, byte_mode=False,
+                 construction='thompson'):
+    """Cache key of a build_fa result."""
+    return ('fa', regex, if_remove_duplicate_transitions, if_convert_to_dfa, if_minimize_dfa, byte_mode,
+            construction)
+
+
+def set_cache_size(maxsize):
+    """Sets the maximum number of cached entries (0 disables caching, None means unbounded)."""
+    compiled_cache.resize(maxsize)
+
+
+def cache_stats():
+    """Returns the size, limit and hit / miss / eviction counters of the cache."""
+    return compiled_cache.stats()
+
+
+def purge_cache():
+    """Drops every cached automaton and pattern."""
+    compiled_cache.purge()
@@ -1,4 +1,14 @@
 class ASTNode:
+    """
+    Node of a regex AST: SYMBOL (value = the symbol), STAR (one child), and
+    the n-ary CONCAT and UNION (two or more children, in order). The parser
+    flattens nested CONCATs and UNIONs, so long regexes give wide, shallow
+    trees. Every traversal is iterative, so deep trees cannot exhaust the
+    Python stack.
+    """
+
+    __slots__ = ('type', 'value', 'children')
+
     def __init__(self, type, value=None, children=None):
         self.type = type
         self.value = value
@@ -10,9 +20,60 @@ class ASTNode:
         return f"ASTNode({self.type}, {self.children})"
 
     def traverse_postorder(self, func):
-        for child in reversed(self.children):
-            child.traverse_postorder(func)
-        func(self)
+        # Children are visited left to right, so the builders pop the last
+        # operand first and CONCAT keeps its order.
+        order = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children)
+        for node in reversed(order):
+            func(node)
+
+    def _transform(self, function):
+        """
+        Rebuilds the tree bottom-up: function(node, new_children) returns the
+        new node replacing `node`.
+        """
+        results = []
+
+        def visit(node):
+            count = len(node.children)
+            children = results[len(results) - count:] if count else []
+            del results[len(results) - count:]
+            results.append(function(node, children))
+
+        self.traverse_postorder(visit)
+        return results.pop()
+
+    def reversed(self):
+        """
+        Returns a new tree for the reversed language, i.e. with the children of
+        every CONCAT node in reverse order.
+        """
+        def reverse(node, children):
+            if node.type == "CONCAT":
+                children.reverse()
+            return ASTNode(node.type, node.value, children)
+
+        return self._transform(reverse)
+
+    def to_bytes(self):
+        """
+        Returns a new tree over bytes (byte mode): every symbol is replaced by
+        the CONCAT of its UTF-8 bytes, byte b being the symbol chr(b).
+        ASCII symbols are left unchanged.
+        """
+        def encode(node, children):
+            if node.type != "SYMBOL":
+                return ASTNode(node.type, node.value, children)
+            encoded = node.value.encode("utf-8")
+            if len(encoded) == 1:
+                return ASTNode("SYMBOL", chr(encoded[0]))
+            return ASTNode("CONCAT", None, [ASTNode("SYMBOL", chr(byte)) for byte in encoded])
+
+        return self._transform(encode)
 
     def pretty_print(self, depth=0, last=True, prefix=""):
         """
@@ -23,23 +84,18 @@ class ASTNode:
             last: Whether this is the last child of its parent (default: True)
             prefix: The prefix string for the current line (default: "")
         """
-        # Create the current line's prefix
-        current_prefix = prefix + ("└── " if last else "├── ")
-        
-        # Print the current node
-        print(f"{current_prefix}{self.type}", end="")
-        if self.value is not None:
-            print(f"({self.value})")
-        else:
-            print()
-        
-        # Create the prefix for children
-        child_prefix = prefix + ("    " if last else "│   ")
-        
-        # Print children
-        if self.children:
-            for i, child in enumerate(self.children):
-                is_last = (i == len(self.children) - 1)
-                child.pretty_print(depth + 1, is_last, child_prefix)
+        stack = [(self, last, prefix)]
+        while stack:
+            node, last, prefix = stack.pop()
 
-        
+            # Print the current node
+            current_prefix = prefix + ("└── " if last else "├── ")
+            if node.value is not None:
+                print(f"{current_prefix}{node.type}({node.value})")
+            else:
+                print(f"{current_prefix}{node.type}")
+
+            # Children are pushed last first, so they print in order
+            child_prefix = prefix + ("    " if last else "│   ")
+            for i in range(len(node.children) - 1, -1, -1):
+                stack.append((node.children[i], i == len(node.children) - 1, child_prefix))
@@ -0,0 +1,83 @@
+class StateSet:
+    """
+    Immutable set of automaton states (non-negative ints), stored as the bits
+    of a Python int: state i belongs to the set when bit i is set.
+
+    Union, intersection and difference are single int operations, and equal
+    sets have equal ints, so a StateSet hashes and compares like its `bits`
+    and can be used directly as a dict key (e.g. to intern subsets). Hot
+    loops (NFASimulator, LazyDFA) work on the raw ints and only wrap them with
+    from_bits at their boundaries.
+    """
+
+    __slots__ = ('bits',)
+
+    def __init__(self, states=()):
+        bits = 0
+        for state in states:
+            bits |= 1 << state
+        self.bits = bits
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Wraps an int bitset without copying it."""
+        state_set = cls.__new__(cls)
+        state_set.bits = bits
+        return state_set
+
+    def __or__(self, other):
+        return StateSet.from_bits(self.bits | other.bits)
+
+    def __and__(self, other):
+        return StateSet.from_bits(self.bits & other.bits)
+
+    def __sub__(self, other):
+        return StateSet.from_bits(self.bits & ~other.bits)
+
+    def __xor__(self, other):
+        return StateSet.from_bits(self.bits ^ other.bits)
+
+    def union(self, *others):
+        bits = self.bits
+        for other in others:
+            bits |= other.bits
+        return StateSet.from_bits(bits)
+
+    def issubset(self, other):
+        return self.bits & ~other.bits == 0
+
+    def isdisjoint(self, other):
+        return self.bits & other.bits == 0
+
+    def to_frozenset(self):
+        return frozenset(self)
+
+    def __contains__(self, state):
+        return state >= 0 and self.bits >> state & 1 == 1
+
+    def __iter__(self):
+        """Iterates over the states in increasing order."""
+        return iter_bits(self.bits)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __eq__(self, other):
+        return isinstance(other, StateSet) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __repr__(self):
+        return f"StateSet({list(self)})"
+
+
+def iter_bits(bits):
+    """Yields the indices of the set bits of an int, in increasing order."""
+    while bits:
+        low_bit = bits & -bits
+        yield low_bit.bit_length() - 1
+        bits ^= low_bit
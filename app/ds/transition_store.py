@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class TransitionStore:
+    """
+    Labelled transitions of an automaton, for incremental construction.
+
+    Each state keeps its outgoing edges as a list of (dest, symbol) pairs in
+    insertion order, plus a {symbol: [targets]} index, so adding an edge,
+    listing the edges of a state and looking up the targets of a (state,
+    symbol) pair are all O(1). The edge count is kept up to date on every
+    mutation. freeze() packs everything into a read-only CSR layout; it is
+    only used to serialize automata (see app.fa.serialization.dump_fa), the
+    matchers build their own tables (CompiledDFA, NFASimulator).
+    """
+
+    __slots__ = ('size', '_edges', '_index', '_edge_count')
+
+    def __init__(self, size=0):
+        self.size = size
+        self._edges = [[] for _ in range(size)]  # state -> [(dest, symbol)]
+        self._index = [{} for _ in range(size)]  # state -> {symbol: [dest]}
+        self._edge_count = 0
+
+    def add_vertex(self):
+        """Adds a state, with index size - 1."""
+        self.size += 1
+        self._edges.append([])
+        self._index.append({})
+
+    def delete_vertex(self, vertex):
+        """
+        Deletes a state and every edge from or to it. States after it move
+        down one index, and edges are renumbered accordingly.
+        """
+        self._edge_count -= len(self._edges[vertex])
+        del self._edges[vertex]
+        del self._index[vertex]
+        self.size -= 1
+
+        for src in range(self.size):
+            edges = self._edges[src]
+            if not any(dest >= vertex for dest, _ in edges):
+                continue
+            kept = [(dest - (dest > vertex), symbol) for dest, symbol in edges if dest != vertex]
+            self._edge_count -= len(edges) - len(kept)
+            self._set_edges(src, kept)
+
+    def _set_edges(self, src, edges):
+        self._edges[src] = edges
+        index = {}
+        for dest, symbol in edges:
+            index.setdefault(symbol, []).append(dest)
+        self._index[src] = index
+
+    def add_edge(self, src, dest, symbol):
+        """Adds an edge labelled `symbol` ("" for epsilon). Duplicates are allowed."""
+        self._edges[src].append((dest, symbol))
+        self._index[src].setdefault(symbol, []).append(dest)
+        self._edge_count += 1
+
+    def delete_edge(self, src, dest, symbol=None):
+        """
+        Deletes the edge(s) from src to dest.
+        If symbol is specified, only deletes edges with that symbol.
+        """
+        edges = self._edges[src]
+        kept = [(d, s) for d, s in edges if not (d == dest and (symbol is None or s == symbol))]
+        if len(kept) != len(edges):
+            self._edge_count -= len(edges) - len(kept)
+            self._set_edges(src, kept)
+
+    def get_edges(self, src, dest=None):
+        """
+        Returns the (dest, symbol) edges from src, or the symbols of the edges
+        from src to dest if dest is given. The returned list must not be modified.
+        """
+        if dest is None:
+            return self._edges[src]
+        return [symbol for d, symbol in self._edges[src] if d == dest]
+
+    def targets(self, src, symbol):
+        """Returns the states reached from src on `symbol`, in O(1)."""
+        return self._index[src].get(symbol, ())
+
+    def symbols(self, src):
+        """Returns the distinct symbols labelling edges from src."""
+        return self._index[src].keys()
+
+    def remove_duplicate_edges(self):
+        """Removes duplicate edges (same source, destination and symbol), keeping the first."""
+        for src in range(self.size):
+            edges = self._edges[src]
+            unique = list(dict.fromkeys(edges))
+            if len(unique) != len(edges):
+                self._edge_count -= len(edges) - len(unique)
+                self._set_edges(src, unique)
+
+    def get_edges_count(self):
+        """Returns the number of edges, in O(1)."""
+        return self._edge_count
+
+    def freeze(self):
+        """Returns a read-only CSR copy of the transitions (see FrozenTransitions)."""
+        offsets = np.zeros(self.size + 1, dtype=np.int64)
+        targets = []
+        labels = []
+        for src, edges in enumerate(self._edges):
+            for dest, symbol in edges:
+                targets.append(dest)
+                labels.append(symbol)
+            offsets[src + 1] = len(targets)
+        return FrozenTransitions(offsets, np.array(targets, dtype=np.int32), np.array(labels, dtype=np.str_))
+
+    def __repr__(self):
+        return f"TransitionStore(states={self.size}, edges={self._edge_count})"
+
+
+class FrozenTransitions:
+    """
+    Transitions in compressed sparse row form: the edges of state i are
+    targets[offsets[i]:offsets[i + 1]], labelled by the matching slice of
+    labels (a numpy str array of symbols, "" for epsilon).
+    """
+
+    __slots__ = ('offsets', 'targets', 'labels', 'size')
+
+    def __init__(self, offsets, targets, labels):
+        self.offsets = offsets
+        self.targets = targets
+        self.labels = labels
+        self.size = len(offsets) - 1
+
+    def get_edges(self, src, dest=None):
+        """Same as TransitionStore.get_edges."""
+        start, end = int(self.offsets[src]), int(self.offsets[src + 1])
+        edges = list(zip(self.targets[start:end].tolist(), self.labels[start:end].tolist()))
+        if dest is None:
+            return edges
+        return [symbol for d, symbol in edges if d == dest]
+
+    def get_edges_count(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f"FrozenTransitions(states={self.size}, edges={len(self.labels)})"
@@ -0,0 +1,135 @@
+"""
+asyncio front end of StreamMatcher: matches an asyncio.StreamReader or any
+async iterable of chunks as the data arrives, without buffering the payload.
+"""
+import asyncio
+from app.fa.stream_matcher import StreamMatcher
+from app.pattern import Pattern
+
+# Chunks at least this long are matched in an executor, not on the event loop
+OFFLOAD_THRESHOLD = 64 * 1024
+
+# Size of the reads issued on a StreamReader
+READ_SIZE = 64 * 1024
+
+
+async def iter_chunks(source, read_size=READ_SIZE):
+    """
+    Yields the chunks of an asyncio.StreamReader (anything with an async
+    read(n) method, read until it returns an empty chunk) or of an async
+    iterable of chunks.
+    """
+    read = getattr(source, "read", None)
+    if read is None:
+        async for chunk in source:
+            yield chunk
+        return
+
+    while True:
+        chunk = await read(read_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class AsyncStreamMatcher:
+    """
+    StreamMatcher for asyncio streams.
+
+    Chunks shorter than `offload_threshold` are matched directly on the event
+    loop; longer ones are matched in an executor, so one large chunk never
+    stalls the other streams served by the loop. Only the matcher state and
+    the offset are kept between chunks.
+
+    Use one AsyncStreamMatcher per stream. Streams can share a CompiledDFA
+    (e.g. Pattern.dfa, built in byte mode to match raw bytes): it is never
+    modified while matching, so executor threads can step it concurrently.
+    LazyDFAs are copied per stream by StreamMatcher.
+
+    A Pattern checks the chunks like its own methods do: without an
+    encoding, a str pattern takes str chunks and a byte-mode pattern
+    bytes-like ones.
+    """
+
+    def __init__(self, matcher, encoding=None, executor=None, offload_threshold=OFFLOAD_THRESHOLD):
+        """
+        Args:
+            matcher: anything StreamMatcher accepts, or a Pattern (its
+                     minimized CompiledDFA is used)
+            encoding: see StreamMatcher; without one, byte chunks are matched
+                      as byte-mode symbols
+            executor: concurrent.futures executor for large chunks (default:
+                      the event loop's default executor)
+            offload_threshold: minimum chunk length matched in the executor
+
+        Raises:
+            TypeError: if an encoding is given with a byte-mode Pattern
+        """
+        self._check_chunk = None
+        if isinstance(matcher, Pattern):
+            if matcher.byte_mode and encoding is not None:
+                raise TypeError("cannot decode chunks for a byte-mode pattern")
+            if encoding is None:
+                self._check_chunk = matcher._check_type
+            matcher = matcher.dfa
+        self.stream = StreamMatcher(matcher, encoding)
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+
+    @property
+    def offset(self):
+        """Number of symbols consumed so far."""
+        return self.stream.offset
+
+    def is_accepting(self):
+        return self.stream.is_accepting()
+
+    def is_dead(self):
+        return self.stream.is_dead()
+
+    async def feed(self, chunk):
+        """Consumes a chunk and returns its events, see StreamMatcher.feed."""
+        if self._check_chunk is not None:
+            self._check_chunk(chunk)
+        if len(chunk) >= self.offload_threshold:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.stream.feed, chunk)
+        return self.stream.feed(chunk)
+
+    async def events(self, source):
+        """
+        Consumes a source (see iter_chunks) and yields its (kind, offset)
+        events as they happen. Stops reading once no continuation can be
+        accepted (after the DEAD event). At the end of the source, the events
+        of the characters still buffered by the decoder are yielded too.
+        """
+        async for chunk in iter_chunks(source):
+            for event in await self.feed(chunk):
+                yield event
+            if self.stream.is_dead():
+                return
+        for event in self.stream.flush():
+            yield event
+
+    async def verdict(self, source):
+        """
+        Consumes a source (see iter_chunks) and returns True if the whole
+        stream is accepted. Stops reading as soon as the verdict is known to be
+        False, leaving the rest of the source unread.
+        """
+        async for chunk in iter_chunks(source):
+            await self.feed(chunk)
+            if self.stream.is_dead():
+                return False
+        return self.stream.close()
+
+
+async def match_stream(source, matcher, **options):
+    """Returns True if the whole stream is accepted, see AsyncStreamMatcher.verdict."""
+    return await AsyncStreamMatcher(matcher, **options).verdict(source)
+
+
+async def stream_events(source, matcher, **options):
+    """Yields the events of a stream, see AsyncStreamMatcher.events."""
+    async for event in AsyncStreamMatcher(matcher, **options).events(source):
+        yield event
@@ -0,0 +1,48 @@
+"""
+Matching on bytes-like inputs (bytes, bytearray, memoryview, mmap).
+
+Automata built in byte mode (see ASTNode.to_bytes) have one symbol per byte
+value: byte b is the symbol chr(b). Inputs are read through memoryviews, so
+matching never copies or decodes them.
+"""
+
+# Symbol of every byte value
+BYTE_SYMBOLS = tuple(chr(byte) for byte in range(256))
+
+
+def byte_view(data, pos=0, endpos=None):
+    """Returns a flat unsigned-byte memoryview of data[pos:endpos], without copying."""
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view[pos:endpos]
+
+
+class ByteSymbols:
+    """
+    Read-only sequence of the byte-mode symbols of a bytes-like object,
+    i.e. chr(data[i]) for every i, backed by a memoryview of the data.
+    Lets the str-based matchers (LazyDFA, Pattern scans) run on bytes.
+    """
+
+    def __init__(self, data):
+        self.view = byte_view(data)
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, index):
+        return BYTE_SYMBOLS[self.view[index]]
+
+    def __iter__(self):
+        return map(BYTE_SYMBOLS.__getitem__, self.view)
+
+    def release(self):
+        """Releases the view (required before closing an mmap it points into)."""
+        self.view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,209 @@
+from app.fa.compiled_dfa import CompiledDFA
+
+# Self-loops are skipped with str.lstrip on slices of at most this many
+# characters, so a loop visited often never copies the rest of the input
+SPAN_CHUNK = 64
+
+# Shortest literal run worth a str.startswith check: shorter runs, like the
+# loops of dense DFAs, are faster stepped one symbol at a time
+MIN_LITERAL = 4
+
+
+def _outgoing(dfa, state):
+    """Returns {dest_state: [symbols]} for the live transitions of a state."""
+    targets = {}
+    for symbol, symbol_class in dfa.class_map.items():
+        dest = dfa.table[state, symbol_class]
+        if dest:
+            targets.setdefault(int(dest), []).append(symbol)
+    for dest in targets:
+        targets[dest].sort()
+    return targets
+
+
+def _literal_run(dfa, outgoing, symbol, dest):
+    """
+    Follows the chain of states starting with `symbol` -> `dest` while each
+    state is non-accepting and has a single outgoing symbol. Returns the
+    collected literal and the state it ends in.
+    """
+    literal = symbol
+    seen = {dest}
+    while not dfa.accepting[dest] and len(outgoing[dest]) == 1:
+        (next_dest, next_symbols), = outgoing[dest].items()
+        if len(next_symbols) != 1 or next_dest in seen:
+            break
+        literal += next_symbols[0]
+        dest = next_dest
+        seen.add(dest)
+    return literal, dest
+
+
+def _worth_dispatch(outgoing, branches):
+    """
+    Returns True if some state of the dispatch loop skips several symbols at
+    once: a literal run of at least MIN_LITERAL symbols, or a self-loop on
+    more symbols than the state leaves on (so spans are likely to be long).
+    """
+    for state, state_branches in branches.items():
+        if any(literal is not None and len(literal) >= MIN_LITERAL for _, literal, _ in state_branches):
+            return True
+        loop_symbols = outgoing[state].get(state, [])
+        if len(loop_symbols) > sum(len(symbols) for symbols, _, _ in state_branches):
+            return True
+    return False
+
+
+def _generate_row_walk(dfa, outgoing, name):
+    """
+    Generates `name(s)` as a walk over linked rows: the row of a state maps
+    each symbol to the row of the next state, and accepting rows hold the key
+    None. Each symbol then costs one dict subscript, with no state dispatch
+    and no symbol class lookup; a missing key means the input is rejected.
+    """
+    rows_name = f"_{name}_rows"
+    reachable = [dfa.start]
+    for state in reachable:
+        for dest in outgoing[state]:
+            if dest not in reachable:
+                reachable.append(dest)
+
+    lines = [f"{rows_name} = {{state: {{}} for state in {sorted(reachable)!r}}}"]
+    for state in sorted(reachable):
+        transitions = ", ".join(f"{symbol!r}: {rows_name}[{dest}]"
+                                for dest, symbols in sorted(outgoing[state].items()) for symbol in symbols)
+        if transitions:
+            lines.append(f"{rows_name}[{state}].update({{{transitions}}})")
+        if dfa.accepting[state]:
+            lines.append(f"{rows_name}[{state}][None] = True")
+    lines += [
+        "",
+        "",
+        f"def {name}(s):",
+        f"    row = {rows_name}[{dfa.start}]",
+        "    try:",
+        "        for c in s:",
+        "            row = row[c]",
+        "    except KeyError:",
+        "        return False",
+        "    return None in row",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_source(dfa, name="match"):
+    """
+    Generates the source of a Python function `name(s)` returning True if the
+    whole string s is accepted by the DFA.
+
+    When some state can skip several symbols at once (see _worth_dispatch),
+    every state becomes a branch of a dispatch loop. Within a state:
+      - a self-loop becomes a str.lstrip span scan over the looping symbols,
+      - chains of single-successor states become one str.startswith check,
+      - the remaining transitions are compared symbol by symbol.
+    Other DFAs, e.g. the dense (a+b)*abb, would pay the if/elif dispatch on
+    every symbol; they are generated as a walk over linked dict rows instead
+    (see _generate_row_walk).
+    """
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+
+    if dfa.start == 0:
+        return "\n".join([f"def {name}(s):", "    return False", ""])
+
+    outgoing = [_outgoing(dfa, state) for state in range(dfa.num_states)]
+
+    # Branches of every state as (symbols, literal, end state); states only
+    # entered from inside a literal run are left out of the generated code
+    branches = {}
+    pending = [dfa.start]
+    while pending:
+        state = pending.pop()
+        if state in branches:
+            continue
+        branches[state] = []
+        for dest, symbols in outgoing[state].items():
+            if dest == state:
+                continue
+            literal, end = _literal_run(dfa, outgoing, symbols[0], dest) if len(symbols) == 1 else (None, dest)
+            branches[state].append((symbols, literal, end))
+            pending.append(end)
+    if not _worth_dispatch(outgoing, branches):
+        return _generate_row_walk(dfa, outgoing, name)
+
+    accepting = tuple(state for state in branches if dfa.accepting[state])
+    lines = [
+        f"def {name}(s):",
+        "    n = len(s)",
+        "    pos = 0",
+        f"    state = {dfa.start}",
+        "    try:",
+        "        while True:",
+    ]
+
+    keyword = "if"
+    for state in sorted(branches, key=lambda state: (state != dfa.start, state)):
+        lines.append(f"            {keyword} state == {state}:")
+        keyword = "elif"
+
+        loop_symbols = "".join(outgoing[state].get(state, []))
+        if loop_symbols:
+            # Only slice once the loop is known to consume something
+            lines += [
+                f"                while pos < n and s[pos] in {loop_symbols!r}:",
+                f"                    chunk = s[pos:pos + {SPAN_CHUNK}]",
+                f"                    rest = chunk.lstrip({loop_symbols!r})",
+                "                    pos += len(chunk) - len(rest)",
+                "                    if rest:",
+                "                        break",
+            ]
+
+        if not branches[state]:
+            lines.append(f"                return {'pos == n' if dfa.accepting[state] else 'False'}")
+            continue
+
+        # Raises IndexError at the end of the input, see the except clause below
+        lines.append("                c = s[pos]")
+        for symbols, literal, end in branches[state]:
+            condition = f"c == {symbols[0]!r}" if len(symbols) == 1 else f"c in {''.join(symbols)!r}"
+            lines.append(f"                if {condition}:")
+            if literal is not None and len(literal) > 1:
+                lines += [
+                    f"                    if not s.startswith({literal!r}, pos):",
+                    "                        return False",
+                    f"                    pos += {len(literal)}",
+                ]
+            else:
+                lines.append("                    pos += 1")
+            lines += [
+                f"                    state = {end}",
+                "                    continue",
+            ]
+        lines.append("                return False")
+
+    lines += [
+        "    except IndexError:",
+        f"        return state in {accepting!r}",
+    ]
+    lines.append("")
+    return "\n".join(lines)
+
+
+def compile_dfa_function(dfa):
+    """
+    Returns a generated Python function matching the whole input against the
+    DFA (see generate_source). The function is compiled once with compile()
+    and cached on the CompiledDFA.
+    """
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+    function = dfa._generated_function
+    if function is None:
+        source = generate_source(dfa, name="match")
+        namespace = {}
+        exec(compile(source, "<generated dfa>", "exec"), namespace)
+        function = namespace["match"]
+        function.source = source
+        dfa._generated_function = function
+    return function
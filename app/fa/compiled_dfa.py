@@ -0,0 +1,421 @@
+from collections import deque
+import numpy as np
+from app.fa.byte_input import BYTE_SYMBOLS, byte_view
+
+# Largest padded matrix (strings x longest length) match_many encodes at once
+MAX_BLOCK_CELLS = 1 << 22
+
+# match_many steps a block one input position at a time, which only pays
+# with many strings per block: longer strings are matched one by one with run()
+MAX_BATCH_LENGTH = 1 << 16
+
+
+class CompiledDFA:
+    """
+    Table-driven matcher for a deterministic FA (the output of convert_to_dfa or
+    minimize_dfa).
+
+    States are renumbered densely with 0 reserved for the dead state. Columns
+    of the transition table are symbol classes (see app.fa.symbol_classes):
+    symbols the automaton never tells apart share a column, so the table is
+    only as wide as the number of distinct behaviours. Column 0 collects every
+    symbol the automaton has never seen, so it always leads to the dead state.
+    """
+
+    DEAD = 0
+
+    # Maximum number of entries of the sequence table used by transition_map
+    STRIDE_TABLE_SIZE = 1 << 20
+
+    def __init__(self, table, accepting, class_map, start, tags=None):
+        """
+        Args:
+            table: 2D array-like of shape (num_states, num_classes) holding next-state ids
+            accepting: 1D array-like of booleans, one per state
+            class_map: dict mapping each symbol to its column (class) in the table
+            start: id of the starting state
+            tags: optional list holding, for each state, a tuple of pattern ids
+        """
+        self.table = np.asarray(table, dtype=np.int32)
+        self.accepting = np.asarray(accepting, dtype=bool)
+        self.class_map = dict(class_map)
+        self.start = start
+        self.num_states, self.num_classes = self.table.shape
+        self.tags = list(tags) if tags is not None else [()] * self.num_states
+
+        # Plain Python copies for the scalar loop; indexing a numpy array one
+        # element at a time is much slower than indexing a list.
+        self._flat = self.table.ravel().tolist()
+        self._accept = self.accepting.tolist()
+        self._batch_tables = None  # Built on the first match_many() call
+        self._byte_table = None  # Built on the first run_bytes() call
+        self._stride_tables = None  # Built on the first transition_map() call
+        self._generated_function = None  # Set by codegen.compile_dfa_function
+
+    @classmethod
+    def from_fa(cls, fa):
+        """
+        Compiles a deterministic FA into a dense transition table.
+        States are numbered in BFS order from the starting state (visiting symbols
+        in sorted order), so equal minimized DFAs always produce equal tables.
+        Unreachable states are dropped.
+
+        Raises:
+            ValueError: if the FA has epsilon transitions or more than one
+                        transition for the same (state, symbol) pair
+        """
+        symbol_classes = fa.symbol_classes()
+        class_map = symbol_classes.class_map
+        width = symbol_classes.num_classes
+        representatives = [symbol for _, symbol in symbol_classes.representatives()]
+
+        # Per-state {symbol: dest_index} view of the transitions
+        moves = []
+        for state_index in fa.states:
+            row = {}
+            for dest_index, symbol in fa.transitions.get_edges(state_index):
+                if symbol == "":
+                    raise ValueError("CompiledDFA requires an FA without epsilon transitions")
+                if row.get(symbol, dest_index) != dest_index:
+                    raise ValueError(f"FA is not deterministic on symbol '{symbol}'")
+                row[symbol] = dest_index
+            moves.append(row)
+
+        table = [[cls.DEAD] * width]
+        accepting = [False]
+        tags = [()]
+        if fa.starting_state is None:
+            return cls(table, accepting, class_map, cls.DEAD, tags)
+
+        # Renumber reachable states in BFS order, 0 being the dead state
+        start_index = fa.starting_state
+        new_id = {start_index: 1}
+        order = [start_index]
+        queue = deque([start_index])
+        while queue:
+            state_index = queue.popleft()
+            for symbol in representatives:
+                dest_index = moves[state_index].get(symbol)
+                if dest_index is not None and dest_index not in new_id:
+                    new_id[dest_index] = len(order) + 1
+                    order.append(dest_index)
+                    queue.append(dest_index)
+
+        for state_index in order:
+            row = [cls.DEAD] * width
+            for symbol, dest_index in moves[state_index].items():
+                row[class_map[symbol]] = new_id[dest_index]
+            table.append(row)
+            accepting.append(state_index in fa.final_states)
+            tags.append(tuple(sorted(fa.get_tags(state_index))))
+
+        return cls(table, accepting, class_map, 1, tags)
+
+    def to_fa(self):
+        """
+        Converts the table back into an FA (table state s becomes state s - 1,
+        the dead state left out).
+        """
+        from app.fa.fa import FA  # fa.py imports this module
+
+        fa = FA()
+        symbols = {}
+        for symbol, symbol_class in sorted(self.class_map.items()):
+            symbols.setdefault(symbol_class, []).append(symbol)
+        for state in range(1, self.num_states):
+            fa.add_state()
+        for state in range(1, self.num_states):
+            if self._accept[state]:
+                fa.add_final_state(state - 1)
+                for tag in self.tags[state]:
+                    fa.add_tag(state - 1, tag)
+            for symbol_class, dest in enumerate(self._flat[state * self.num_classes:(state + 1) * self.num_classes]):
+                if dest:
+                    for symbol in symbols.get(symbol_class, ()):
+                        fa.add_transition(state - 1, symbol, dest - 1)
+        if self.start:
+            fa.starting_state = self.start - 1
+        return fa
+
+    def step(self, state, symbol):
+        """Returns the state reached from `state` on `symbol`."""
+        return self._flat[state * self.num_classes + self.class_map.get(symbol, 0)]
+
+    def is_accepting(self, state):
+        return self._accept[state]
+
+    def run(self, input_string):
+        """
+        Returns True if the whole input string is accepted.
+        Single pass over the input, one table lookup per symbol, no copies.
+        Bytes-like inputs are matched with run_bytes.
+        """
+        if not isinstance(input_string, str):
+            return self.run_bytes(input_string)
+        flat = self._flat
+        width = self.num_classes
+        class_of = self.class_map.get
+        state = self.start
+
+        for char in input_string:
+            state = flat[state * width + class_of(char, 0)]
+            if not state:
+                return False
+
+        return self._accept[state]
+
+    def match_tags(self, input_string):
+        """
+        Runs the whole input and returns the tags (pattern ids) of the state
+        reached, or an empty tuple if the input is rejected.
+        """
+        if not isinstance(input_string, str):
+            state = self._run_bytes_state(input_string)
+            return self.tags[state] if self._accept[state] else ()
+        flat = self._flat
+        width = self.num_classes
+        class_of = self.class_map.get
+        state = self.start
+
+        for char in input_string:
+            state = flat[state * width + class_of(char, 0)]
+            if not state:
+                return ()
+
+        return self.tags[state] if self._accept[state] else ()
+
+    @property
+    def byte_classes(self):
+        """
+        The 256-wide class map of byte mode: entry b is the column of the
+        symbol chr(b) (see ASTNode.to_bytes), 0 if it is not in the alphabet.
+        """
+        return np.array([self.class_map.get(symbol, 0) for symbol in BYTE_SYMBOLS], dtype=np.intp)
+
+    def _run_bytes_state(self, data, pos=0, endpos=None):
+        """Runs data[pos:endpos] and returns the state reached (DEAD if rejected)."""
+        if self._byte_table is None:
+            # One column per byte value, so a step needs no class translation.
+            # Entries hold the row offset of the next state (state * 256)
+            # rather than its id, which saves a multiplication per byte.
+            self._byte_table = (self.table[:, self.byte_classes] * 256).ravel().tolist()
+        table = self._byte_table
+        offset = self.start * 256
+
+        view = byte_view(data, pos, endpos)
+        try:
+            for byte in view:
+                offset = table[offset + byte]
+                if not offset:
+                    break
+        finally:
+            view.release()
+        return offset >> 8
+
+    def run_bytes(self, data, pos=0, endpos=None):
+        """
+        Returns True if data[pos:endpos] is accepted, reading the bytes in place.
+
+        Args:
+            data: bytes, bytearray, memoryview or mmap; byte b is matched as
+                  the symbol chr(b), so the DFA should be built in byte mode
+            pos, endpos: bounds of the matched range, as in slicing
+        """
+        return self._accept[self._run_bytes_state(data, pos, endpos)]
+
+    def _build_stride_tables(self):
+        """
+        Builds the tables used by transition_map: the per-class transition
+        functions (one row of next states per class), and the functions of
+        every sequence of `stride` classes, with the largest stride keeping
+        that table under STRIDE_TABLE_SIZE entries.
+        """
+        width = self.num_states
+        functions = np.ascontiguousarray(self.table.T).astype(np.intp)
+        stride_functions = functions
+        stride = 1
+        while stride < 16 and len(stride_functions) * self.num_classes * width <= self.STRIDE_TABLE_SIZE:
+            # Row (sequence, c) applies the sequence, then class c
+            stride_functions = functions[:, stride_functions].transpose(1, 0, 2).reshape(-1, width)
+            stride += 1
+        powers = self.num_classes ** np.arange(stride - 1, -1, -1)
+        self._stride_tables = (functions, stride_functions, stride, powers)
+
+    @staticmethod
+    def _compose(functions):
+        """Composes an array of transition functions (rows), first row applied first."""
+        width = functions.shape[1]
+        while len(functions) > 1:
+            if len(functions) % 2:
+                # Fold the odd function out into its predecessor
+                functions[-2] = functions[-1][functions[-2]]
+                functions = functions[:-1]
+            # Row i of the result applies functions[2i], then functions[2i + 1]
+            offsets = np.arange(0, len(functions) // 2 * width, width)[:, None]
+            functions = functions[1::2].reshape(-1).take(functions[0::2] + offsets)
+        return functions[0]
+
+    def transition_map(self, data, pos=0, endpos=None, block_size=1 << 16):
+        """
+        Returns a numpy array mapping every state to the state reached after
+        reading data[pos:endpos] from it (bytes-like input, see run_bytes).
+
+        The input is simulated from all states at once, which is what lets
+        chunks of one input be processed independently and composed in order
+        afterwards (see app.parallel.match_record). Symbols are grouped into
+        fixed-length sequences whose combined transition functions are looked
+        up in a precomputed table, and each block of such functions is then
+        composed pairwise in log2(block_size) vectorized steps.
+        """
+        if self._stride_tables is None:
+            self._build_stride_tables()
+        functions, stride_functions, stride, powers = self._stride_tables
+        byte_classes = self.byte_classes
+        mapping = np.arange(self.num_states)
+
+        view = byte_view(data, pos, endpos)
+        try:
+            symbols = np.frombuffer(view, dtype=np.uint8)
+            for block_start in range(0, len(symbols), block_size * stride):
+                classes = byte_classes[symbols[block_start:block_start + block_size * stride]]
+                whole = len(classes) // stride * stride
+                if whole:
+                    codes = classes[:whole].reshape(-1, stride) @ powers
+                    mapping = self._compose(stride_functions[codes])[mapping]
+                for symbol_class in classes[whole:]:
+                    mapping = functions[symbol_class][mapping]
+            del symbols  # Must not outlive the view
+        finally:
+            view.release()
+        return mapping
+
+    def _build_batch_tables(self):
+        """
+        Builds the lookup arrays used by match_many:
+          - a code point -> class array covering the alphabet, followed by one
+            entry for "any other code point" (class 0) and one for padding,
+          - the flattened transition table with one extra padding column mapping
+            every state to itself, so padded positions leave states unchanged.
+        """
+        size = max((ord(symbol) for symbol in self.class_map if len(symbol) == 1), default=0) + 1
+        class_lookup = np.zeros(size + 2, dtype=np.intp)
+        for symbol, symbol_class in self.class_map.items():
+            if len(symbol) == 1:
+                class_lookup[ord(symbol)] = symbol_class
+        class_lookup[size + 1] = self.num_classes
+
+        identity = np.arange(self.num_states).reshape(-1, 1)
+        padded_table = np.hstack([self.table, identity]).astype(np.intp).ravel()
+        self._batch_tables = (class_lookup, padded_table)
+
+    def match_many(self, strings, block_size=65536):
+        """
+        Matches every string of a batch against the DFA.
+
+        Strings are sorted by length and cut into blocks of similar lengths.
+        Each block is encoded into a padded matrix of code points, mapped to
+        symbol classes, and a vector with one DFA state per string is advanced
+        one input position at a time with numpy fancy indexing. Blocks hold at
+        most MAX_BLOCK_CELLS padded symbols, so a few long strings never blow
+        up the matrix of a block of short ones. Strings longer than
+        MAX_BATCH_LENGTH are matched on their own with run().
+        Bytes-like inputs (bytes, bytearray, memoryview, mmap) are read as
+        byte-mode symbols, like run_bytes: their bytes are mapped through
+        byte_classes without any decoding.
+
+        Args:
+            strings: sequence of str, or sequence of bytes-like objects
+            block_size: number of strings encoded at once (bounds memory use)
+
+        Returns:
+            numpy bool array, True where the whole string is accepted
+
+        Raises:
+            TypeError: if the batch mixes str and bytes-like inputs
+        """
+        if self._batch_tables is None:
+            self._build_batch_tables()
+        padded_table = self._batch_tables[1]
+        padded_width = self.num_classes + 1
+
+        strings = strings if isinstance(strings, (list, tuple)) else list(strings)
+        result = np.zeros(len(strings), dtype=bool)
+        text_mode = not strings or isinstance(strings[0], str)
+        if any(isinstance(string, str) != text_mode for string in strings):
+            raise TypeError("cannot match a batch mixing str and bytes-like objects")
+
+        if text_mode:
+            lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+        else:
+            lengths = np.fromiter((memoryview(data).nbytes for data in strings),
+                                  dtype=np.intp, count=len(strings))
+        order = np.argsort(lengths, kind="stable")
+        sorted_lengths = lengths[order]
+
+        block_start = 0
+        while block_start < len(order):
+            if sorted_lengths[block_start] > MAX_BATCH_LENGTH:
+                for index in order[block_start:]:
+                    result[index] = self.run(strings[index])
+                break
+            # Lengths grow along order, so the padded size of the first k
+            # strings, k * (length of the k-th), grows with k
+            padded_sizes = sorted_lengths[block_start:block_start + block_size] * np.arange(
+                1, min(block_size, len(order) - block_start) + 1)
+            count = max(1, int(np.searchsorted(padded_sizes, MAX_BLOCK_CELLS, side="right")))
+            block_end = block_start + count
+            indices = order[block_start:block_end]
+            block = [strings[index] for index in indices]
+            block_start = block_end
+
+            states = np.full(len(block), self.start, dtype=np.intp)
+            if text_mode:
+                classes = self._text_classes(block)
+            else:
+                classes = self._byte_classes(block)
+
+            for column in classes:
+                states = padded_table.take(states * padded_width + column)
+                if not states.any():
+                    break
+
+            result[indices] = self.accepting[states]
+
+        return result
+
+    def _text_classes(self, block):
+        """
+        Returns the (position, string) matrix of symbol classes of a block of
+        str, padded with the padding column of the batch tables.
+        """
+        class_lookup = self._batch_tables[0]
+        other_code = len(class_lookup) - 2
+        # Lengths come from Python: numpy drops trailing NUL characters
+        lengths = np.fromiter(map(len, block), dtype=np.intp, count=len(block))
+        width = int(lengths.max()) if len(block) else 0
+        if not width:
+            return np.empty((0, len(block)), dtype=np.intp)
+
+        codes = np.array(block, dtype=f"<U{width}").view(np.uint32).reshape(len(block), width)
+        # One contiguous row of codes per input position
+        positions = np.empty((width, len(block)), dtype=np.uint32)
+        np.minimum(codes.T, other_code, out=positions)
+        positions[np.arange(width)[:, None] >= lengths] = other_code + 1
+        return class_lookup.take(positions)
+
+    def _byte_classes(self, block):
+        """
+        Returns the (position, string) matrix of symbol classes of a block of
+        bytes-like objects, padded with the padding column of the batch tables.
+        """
+        rows = [np.frombuffer(data, dtype=np.uint8) for data in block]
+        width = max((len(row) for row in rows), default=0)
+        # Byte value 256 stands for padding
+        positions = np.full((width, len(block)), 256, dtype=np.intp)
+        for index, row in enumerate(rows):
+            positions[:len(row), index] = row
+        byte_lookup = np.append(self.byte_classes, self.num_classes)
+        return byte_lookup.take(positions)
+
+    def __repr__(self):
+        return f"CompiledDFA(states={self.num_states}, classes={self.num_classes}, start={self.start})"
@@ -0,0 +1,155 @@
+from collections import deque
+from app.fa.byte_input import ByteSymbols
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.fa import FA
+from app.regex.terms import complement, empty, from_ast, intersect, union
+
+
+class DerivativeDFA:
+    """
+    DFA whose states are the Brzozowski derivatives of a regex term (see
+    app.regex.terms), built on demand.
+
+    State 0 is the dead state (the empty term) and state 1 the term itself.
+    The state reached from a state on a symbol is the derivative of its term,
+    computed the first time the transition is taken and memoized. Symbols
+    that do not occur in the term all behave alike and share one transition
+    (stored under None), which keeps complements correct on any input.
+
+    Terms are closed under intersection and complement, so `&`, `|` and `~`
+    combine DerivativeDFAs by combining their terms, without any product
+    construction.
+    """
+
+    DEAD = 0
+
+    def __init__(self, term):
+        self.term = term
+        self.alphabet = term.alphabet()
+        self._ids = {}    # term -> state id
+        self._terms = []  # state id -> term
+        self._next = []   # state id -> {symbol: state id}
+        self._accept = []
+        self._intern(empty())
+        self.start = self._intern(term)
+
+    @classmethod
+    def from_ast(cls, ast):
+        return cls(from_ast(ast))
+
+    @classmethod
+    def from_regex(cls, regex, byte_mode=False):
+        from app.pattern import parse_regex  # pattern.py imports app.fa modules
+
+        ast = parse_regex(regex)
+        return cls.from_ast(ast.to_bytes() if byte_mode else ast)
+
+    @property
+    def num_states(self):
+        """Number of states built so far, the dead state included."""
+        return len(self._terms)
+
+    def _intern(self, term):
+        state = self._ids.get(term)
+        if state is None:
+            state = len(self._terms)
+            self._ids[term] = state
+            self._terms.append(term)
+            self._next.append({})
+            self._accept.append(term.nullable)
+        return state
+
+    def step(self, state, symbol):
+        """Returns the state reached from `state` on `symbol`."""
+        next_state = self._next[state].get(symbol)
+        if next_state is None:
+            key = symbol if symbol in self.alphabet else None
+            next_state = self._next[state].get(key)
+            if next_state is None:
+                next_state = self._intern(self._terms[state].derivative(key))
+                self._next[state][key] = next_state
+            self._next[state][symbol] = next_state
+        return next_state
+
+    def is_accepting(self, state):
+        return self._accept[state]
+
+    def run(self, input_string):
+        """
+        Returns True if the whole input string is accepted.
+        Bytes-like inputs are read in place as byte-mode symbols (see ByteSymbols).
+        """
+        if not isinstance(input_string, (str, ByteSymbols)):
+            with ByteSymbols(input_string) as symbols:
+                return self.run(symbols)
+        cache = self._next
+        state = self.start
+
+        for char in input_string:
+            next_state = cache[state].get(char)
+            if next_state is None:
+                next_state = self.step(state, char)
+            state = next_state
+            if state == self.DEAD:
+                return False
+
+        return self._accept[state]
+
+    def explore(self):
+        """Builds every state reachable from the start state."""
+        symbols = sorted(self.alphabet) + [None]
+        seen = {self.start}
+        queue = deque([self.start])
+        while queue:
+            state = queue.popleft()
+            for symbol in symbols:
+                next_state = self.step(state, symbol)
+                if next_state not in seen:
+                    seen.add(next_state)
+                    queue.append(next_state)
+
+    def to_compiled(self):
+        """
+        Returns the complete DFA as a CompiledDFA, one column per symbol of
+        the alphabet. Column 0 holds the transitions on every other symbol,
+        which only lead somewhere else than the dead state when the term
+        contains a complement.
+        """
+        self.explore()
+        symbols = sorted(self.alphabet)
+        class_map = {symbol: column for column, symbol in enumerate(symbols, 1)}
+        table = [[self.step(state, symbol) for symbol in [None] + symbols]
+                 for state in range(self.num_states)]
+        return CompiledDFA(table, self._accept, class_map, self.start)
+
+    def __and__(self, other):
+        return DerivativeDFA(intersect(self.term, other.term))
+
+    def __or__(self, other):
+        return DerivativeDFA(union(self.term, other.term))
+
+    def __invert__(self):
+        return DerivativeDFA(complement(self.term))
+
+    def stats(self):
+        return {
+            'states': len(self._terms),
+            'transitions': sum(len(row) for row in self._next),
+        }
+
+    def __repr__(self):
+        return f"DerivativeDFA(states={len(self._terms)}, term={self.term!r})"
+
+
+class DerivativeBuilder:
+    """
+    Builds a DFA from a regex AST through Brzozowski derivatives (see
+    DerivativeDFA), for build_fa. Like PositionBuilder, the result is already
+    deterministic.
+    """
+
+    def build_from_postorder(self, postorder_list):
+        """Build a DFA from a postorder-traversed AST"""
+        if not postorder_list:
+            return FA()
+        return DerivativeDFA.from_ast(postorder_list[-1]).to_compiled().to_fa()
@@ -1,139 +1,153 @@
-from app.ds.dsu import DSU
 from app.fa.fa import FA
-from app.ds.set import Set
+
 
 def minimize_dfa(fa):
     """
-    Minimizes a DFA using Hopcroft's algorithm with Union-Find data structure.
-    Returns a new minimized FA.
+    Minimizes a DFA with Hopcroft's partition refinement, in
+    O(n * classes * log n). Returns a new minimized FA.
+
+    Missing transitions go to an implicit dead state, which is dropped from
+    the result together with every state equivalent to it. Symbols of the same
+    class (see FA.symbol_classes) move every state alike, so refinement works
+    on one column per class.
+
+    Raises:
+        ValueError: if the FA has epsilon transitions or more than one
+                    transition for the same (state, symbol) pair
     """
-    # Initialize new FA
     minimized_fa = FA()
-    
-    # Convert states to indices for DSU
-    state_to_idx = {state: idx for idx, state in enumerate(fa.states)}
-    idx_to_state = {idx: state for state, idx in state_to_idx.items()}
-    
-    # Initialize DSU with two initial partitions: final and non-final states
-    dsu = DSU(len(fa.states))
-    
-    # Initially merge all final states
-    final_states_list = list(fa.final_states)
-    for i in range(len(final_states_list) - 1):
-        dsu.union(
-            state_to_idx[final_states_list[i]],
-            state_to_idx[final_states_list[i + 1]]
-        )
-    
-    # Initially merge all non-final states
-    non_final_states = fa.states.difference(fa.final_states)
-    non_final_states_list = list(non_final_states)
-    for i in range(len(non_final_states_list) - 1):
-        dsu.union(
-            state_to_idx[non_final_states_list[i]],
-            state_to_idx[non_final_states_list[i + 1]]
-        )
-    
-    # Refine partitions based on transitions
-    changed = True
-    alphabet = fa.get_alphabet()
-    
-    while changed:
-        changed = False
-        current_sets = dsu.get_sets()
-        
-        for symbol in alphabet:
-            if symbol == '':  # Skip epsilon transitions for DFA
+    if fa.starting_state is None:
+        return minimized_fa
+
+    symbol_classes = fa.symbol_classes()
+    representatives = symbol_classes.representatives()
+    num_states = len(fa.states)
+    dead = num_states
+    size = num_states + 1
+
+    # Complete transition table, one column per class, and its inverse:
+    # inverse[c][t] lists the states moving to t on class c
+    delta = []
+    inverse = []
+    for symbol_class, symbol in representatives:
+        column = [dead] * size
+        column_inverse = [[] for _ in range(size)]
+        for state in fa.states:
+            targets = fa.transitions.targets(state, symbol)
+            if len(targets) > 1:
+                raise ValueError(f"FA is not deterministic on symbol '{symbol}'")
+            if targets:
+                column[state] = targets[0]
+        for state, target in enumerate(column):
+            column_inverse[target].append(state)
+        delta.append(column)
+        inverse.append(column_inverse)
+    if any(fa.transitions.targets(state, "") for state in fa.states):
+        raise ValueError("minimize_dfa requires an FA without epsilon transitions")
+
+    # Initial partition: final states grouped by pattern tags, then every
+    # non-final state along with the dead state
+    groups = {}
+    for state in fa.final_states:
+        groups.setdefault(fa.get_tags(state).to_frozenset(), []).append(state)
+    initial_blocks = list(groups.values())
+    initial_blocks.append([state for state in range(size) if state not in fa.final_states])
+
+    # Blocks are contiguous ranges elements[first[b]:end[b]]; location[s] is
+    # the position of s in elements, and marked[b] counts the states of b
+    # moved to the front of its range by the current splitter
+    elements = []
+    block_of = [0] * size
+    first = []
+    end = []
+    for block, states in enumerate(initial_blocks):
+        first.append(len(elements))
+        for state in states:
+            block_of[state] = block
+            elements.append(state)
+        end.append(len(elements))
+    location = [0] * size
+    for position, state in enumerate(elements):
+        location[state] = position
+    marked = [0] * len(first)
+
+    # Worklist of (block, class index) splitters; every initial block but a
+    # largest one is enough
+    largest = max(range(len(first)), key=lambda block: end[block] - first[block])
+    worklist = [(block, column) for block in range(len(first)) if block != largest
+                for column in range(len(delta))]
+    waiting = set(worklist)
+
+    while worklist:
+        splitter = worklist.pop()
+        waiting.discard(splitter)
+        block, column = splitter
+
+        # States moving into the splitter block on this class
+        column_inverse = inverse[column]
+        sources = [state for target in elements[first[block]:end[block]] for state in column_inverse[target]]
+
+        # Move them to the front of their blocks
+        touched = []
+        for state in sources:
+            source_block = block_of[state]
+            if marked[source_block] == 0:
+                touched.append(source_block)
+            position = first[source_block] + marked[source_block]
+            other = elements[position]
+            elements[position], elements[location[state]] = state, other
+            location[other] = location[state]
+            location[state] = position
+            marked[source_block] += 1
+
+        # Split every block that is only partly marked
+        for source_block in touched:
+            count = marked[source_block]
+            marked[source_block] = 0
+            if count == end[source_block] - first[source_block]:
                 continue
-                
-            for partition in current_sets:
-                partition_list = list(partition)
-                if len(partition_list) <= 1:
-                    continue
-                    
-                # Get transition destinations for first state
-                first_state = idx_to_state[partition_list[0]]
-                first_state_idx = state_to_idx[first_state]
-                first_transitions = fa.transitions.get_edges(first_state_idx)
-                first_dest = None
-                
-                for dest_idx, sym in first_transitions:
-                    if sym == symbol:
-                        first_dest = dsu.find(dest_idx)
-                        break
-                
-                # Compare with other states in partition
-                split_needed = False
-                states_to_split = []
-                
-                for state_idx in partition_list[1:]:
-                    state = idx_to_state[state_idx]
-                    transitions = fa.transitions.get_edges(state_to_idx[state])
-                    current_dest = None
-                    
-                    for dest_idx, sym in transitions:
-                        if sym == symbol:
-                            current_dest = dsu.find(dest_idx)
-                            break
-                    
-                    # If destinations are in different partitions, mark for splitting
-                    if first_dest != current_dest:
-                        split_needed = True
-                        states_to_split.append(state_idx)
-                
-                # If split is needed, perform it
-                if split_needed:
-                    changed = True
-                    # Split states into new partition
-                    for state_idx in states_to_split:
-                        dsu.split(state_idx)
-                    break
-                    
-            if changed:
-                break
-    
-    # Create new minimized DFA
-    final_partitions = dsu.get_sets()
-    
-    # Create new states for each partition
-    partition_to_new_state = {}
-    for partition in final_partitions:
-        new_state = f"q{len(partition_to_new_state)}"
-        partition_to_new_state[frozenset(partition)] = new_state
-        minimized_fa.add_state(new_state)
-        
-        # Check if partition contains any final states
-        for state_idx in partition:
-            if idx_to_state[state_idx] in fa.final_states:
-                minimized_fa.add_final_state(new_state)
-                break
-        
-        # Set starting state
-        if any(idx_to_state[state_idx] == fa.starting_state for state_idx in partition):
-            minimized_fa.starting_state = new_state
-    
-    # Add transitions
-    for partition in final_partitions:
-        # Take first state from partition as representative
-        rep_state_idx = list(partition)[0]
-        rep_state = idx_to_state[rep_state_idx]
-        from_state = partition_to_new_state[frozenset(partition)]
-        
-        # Get transitions
-        transitions = fa.transitions.get_edges(state_to_idx[rep_state])
-        for dest_idx, symbol in transitions:
-            if symbol == '':  # Skip epsilon transitions
+
+            new_block = len(first)
+            first.append(first[source_block])
+            end.append(first[source_block] + count)
+            marked.append(0)
+            first[source_block] += count
+            for position in range(first[new_block], end[new_block]):
+                block_of[elements[position]] = new_block
+
+            smaller = new_block if count <= end[source_block] - first[source_block] else source_block
+            for other_column in range(len(delta)):
+                if (source_block, other_column) in waiting:
+                    pending = (new_block, other_column)
+                else:
+                    pending = (smaller, other_column)
+                waiting.add(pending)
+                worklist.append(pending)
+
+    # One new state per block, in order of the smallest original state;
+    # the block of the dead state is dropped unless it holds the start
+    dead_block = block_of[dead]
+    if block_of[fa.starting_state] == dead_block:
+        dead_block = None
+    new_state = {}
+    for state in range(num_states):
+        block = block_of[state]
+        if block != dead_block and block not in new_state:
+            new_state[block] = minimized_fa.add_state()
+            if state in fa.final_states:
+                minimized_fa.add_final_state(new_state[block])
+                for tag in fa.get_tags(state):
+                    minimized_fa.add_tag(new_state[block], tag)
+
+    # Transitions of every block, read from its first element
+    for block, from_state in new_state.items():
+        state = elements[first[block]]
+        for column, (symbol_class, _) in enumerate(representatives):
+            dest_block = block_of[delta[column][state]]
+            if dest_block == dead_block:
                 continue
-            
-            # Find which partition contains the destination state
-            dest_partition = next(
-                p for p in final_partitions 
-                if dsu.find(dest_idx) in p
-            )
-            to_state = partition_to_new_state[frozenset(dest_partition)]
-            
-            # Add transition to minimized DFA
-            minimized_fa.add_transition(from_state, symbol, to_state)
-    
-    return minimized_fa
+            for symbol in symbol_classes.classes[symbol_class]:
+                minimized_fa.add_transition(from_state, symbol, new_state[dest_block])
 
+    minimized_fa.starting_state = new_state[block_of[fa.starting_state]]
+    return minimized_fa
@@ -1,125 +1,203 @@
 import numpy as np
 from app.ds.set import Set
-from app.ds.graph import Graph
+from app.ds.state_set import StateSet
+from app.ds.transition_store import TransitionStore
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.lazy_dfa import PerThreadLazyDFA
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.symbol_classes import compute_symbol_classes
 from collections import deque
 
 class FA:
-    
+    """
+    Finite automaton with dense integer states.
+
+    States are the ints 0 .. len(states) - 1, in creation order, and are used
+    directly as indices into the transition store, so every state access is
+    O(1). Names are optional and only used for display (see name_of).
+    """
+
+    __slots__ = ('final_states', 'transitions', 'tags', 'names', '_matcher', '_starting_state')
+
     def __init__(self):
-        self.states = Set()
-        self._state_list = []  # Maintain ordered list of states
         self.final_states = Set()
-        self.transitions = Graph(0)
+        self.transitions = TransitionStore()
+        self.tags = {}  # Accepting state -> Set of pattern ids (multi-pattern automata)
+        self.names = {}  # State -> display name, for the states that have one
+        self._matcher = None  # Cached matcher, dropped on every mutation
         self.starting_state = None
 
+    @property
+    def states(self):
+        """The states of the FA, as a range of ints."""
+        return range(self.transitions.size)
+
+    def name_of(self, state):
+        """Returns the display name of a state (q<id> if it has none)."""
+        return self.names.get(state, f"q{state}")
+
+    @property
+    def starting_state(self):
+        return self._starting_state
+
+    @starting_state.setter
+    def starting_state(self, state):
+        self._starting_state = state
+        self._matcher = None
+
     def epsilon_closure(self, states):
         """
         Compute the epsilon closure of a set of states.
         That is, all states reachable from these states via epsilon (empty string) transitions.
+
+        Args:
+            states: any iterable of states (e.g. a StateSet)
+
+        Returns:
+            the closure, as a StateSet
         """
-        closure = Set(states)
         stack = list(states)
+        closure = StateSet(stack).bits
+        targets = self.transitions.targets
 
         while stack:
             state = stack.pop()
-            state_index = list(self.states).index(state)
-            edges = self.transitions.get_edges(state_index)
-            
-            for dest_index, symbol in edges:
-                if symbol == "":  # epsilon transition
-                    dest_state = list(self.states)[dest_index]
-                    if dest_state not in closure:
-                        closure.add(dest_state)
-                        stack.append(dest_state)
-
-        return closure
+            for dest_state in targets(state, ""):
+                if not closure >> dest_state & 1:
+                    closure |= 1 << dest_state
+                    stack.append(dest_state)
+
+        return StateSet.from_bits(closure)
+
+    def is_deterministic(self):
+        """
+        Returns True if the FA has no epsilon transitions and at most one
+        transition per (state, symbol) pair.
+        """
+        for state in self.states:
+            seen = set()
+            for _, symbol in self.transitions.get_edges(state):
+                if symbol == "" or symbol in seen:
+                    return False
+                seen.add(symbol)
+        return True
+
+    def matcher(self):
+        """
+        Returns the matcher used by run(): a table-driven CompiledDFA for
+        deterministic automata, a LazyDFA (subset construction on demand, with
+        NFA stepping as fallback) otherwise.
+        The result is cached until the FA is modified. A LazyDFA mutates its
+        cache while matching, so each thread gets its own (see PerThreadLazyDFA).
+        """
+        matcher = self._matcher
+        if matcher is None:
+            if self.is_deterministic():
+                matcher = CompiledDFA.from_fa(self)
+            else:
+                matcher = PerThreadLazyDFA(NFASimulator(self))
+            self._matcher = matcher
+        if isinstance(matcher, PerThreadLazyDFA):
+            return matcher.dfa
+        return matcher
+
+    def compile(self):
+        """
+        Returns the CompiledDFA for this FA.
+        Raises ValueError if the FA is not deterministic (use convert_to_dfa first).
+        """
+        matcher = self.matcher()
+        if not isinstance(matcher, CompiledDFA):
+            raise ValueError("FA is not deterministic; convert it with convert_to_dfa first")
+        return matcher
 
     def run(self, input_string):
         """
-        Simulates the epsilon-NFA on an input string.
-        Each execution thread maintains its own remaining input.
-        Uses visited set to prevent infinite loops through epsilon transitions.
+        Returns True if the FA accepts the input string.
+        Deterministic automata (e.g. after convert_to_dfa / minimize_dfa) are
+        matched with a single table-driven pass; epsilon-NFAs are determinized
+        lazily, only for the subset states the input actually reaches.
+        Bytes-like inputs (bytes, bytearray, memoryview, mmap) are read in
+        place, byte b standing for the symbol chr(b); build the FA with
+        build_fa(..., byte_mode=True) to match non-ASCII patterns on UTF-8 bytes.
         """
-        from collections import deque
+        return self.matcher().run(input_string)
 
-        # Start with epsilon closure of the starting state
-        initial_states = self.epsilon_closure(Set([self.starting_state]))
-        queue = deque([(state, input_string) for state in initial_states])
-        
-        # Keep track of visited (state, remaining_input) pairs
-        visited = set()
-        
-        while queue:
-            state, remaining_input = queue.popleft()
-            
-            if (state, remaining_input) in visited:
-                continue
-                
-            visited.add((state, remaining_input))
-            
-            if not remaining_input and state in self.final_states:
-                return True
-                
-            # Use consistent state indexing
-            state_index = self.get_state_index(state)
-            edges = self.transitions.get_edges(state_index)
-            
-            for dest_index, symbol in edges:
-                # Use _state_list for consistent state lookup
-                dest_state = self._state_list[dest_index]
-                if symbol == "":
-                    if (dest_state, remaining_input) not in visited:
-                        queue.append((dest_state, remaining_input))
-                elif remaining_input and remaining_input[0] == symbol:
-                    new_input = remaining_input[1:]
-                    if (dest_state, new_input) not in visited:
-                        queue.append((dest_state, new_input))
-        
-        return False
+    def match_many(self, strings):
+        """
+        Matches a batch of strings at once with numpy, see CompiledDFA.match_many.
+        The FA must be deterministic (use convert_to_dfa / minimize_dfa first).
+
+        Returns:
+            numpy bool array, True where the whole string is accepted
+        """
+        return self.compile().match_many(strings)
     
     def remove_duplicate_transitions(self):
         """
         Minimizes the FA by removing duplicate transitions.
         """
         self.transitions.remove_duplicate_edges()
+        self._matcher = None
 
-    def add_state(self, state):
+    def add_state(self, name=None):
+        """Adds a state and returns its id. The name is only used for display."""
+        state = self.transitions.size
+        self.transitions.add_vertex()
+        if name is not None:
+            self.names[state] = name
+        self._matcher = None
+        return state
+
+    def del_state(self, state):
+        """
+        Deletes a state and its transitions. States created after it move
+        down one id, like the indices of a list.
+        """
         if state not in self.states:
-            self.states.add(state)
-            self._state_list.append(state)
-            self.transitions.add_vertex()
+            return
 
-    def get_state_index(self, state):
-        """Get the consistent index for a state"""
-        return self._state_list.index(state)
+        def renumber(other):
+            return other - 1 if other > state else other
 
-    def del_state(self, state):
-        if state in self.states:
-            state_index = list(self.states).index(state)
-            self.states.remove(state)
-            if state in self.final_states:
-                self.final_states.remove(state)
-            self.transitions.delete_vertex(state_index)
+        self.transitions.delete_vertex(state)
+        self.final_states = Set(renumber(other) for other in self.final_states if other != state)
+        self.tags = {renumber(other): tags for other, tags in self.tags.items() if other != state}
+        self.names = {renumber(other): name for other, name in self.names.items() if other != state}
+        if self.starting_state == state:
+            self.starting_state = None
+        elif self.starting_state is not None:
+            self.starting_state = renumber(self.starting_state)
+        self._matcher = None
 
     def add_final_state(self, state):
         self.final_states.add(state)
+        self._matcher = None
 
     def del_final_state(self, state):
         self.final_states.remove(state)
+        self._matcher = None
+
+    def add_tag(self, state, tag):
+        """Attaches a pattern id to an accepting state."""
+        self.tags.setdefault(state, Set()).add(tag)
+        self._matcher = None
+
+    def get_tags(self, state):
+        """Returns the Set of pattern ids attached to a state."""
+        return self.tags.get(state, Set())
 
     def add_transition(self, state_from, input_string, state_to):
         """
         Adds a transition for a given input string.
         The input can be an epsilon transition ("" for empty string).
         """
-        from_index = list(self.states).index(state_from)
-        to_index = list(self.states).index(state_to)
-        self.transitions.add_edge(from_index, to_index, input_string)
+        self.transitions.add_edge(state_from, state_to, input_string)
+        self._matcher = None
 
     def del_transition(self, state_from, input_string, state_to):
-        from_index = list(self.states).index(state_from)
-        to_index = list(self.states).index(state_to)
-        self.transitions.delete_edge(from_index, to_index, input_string)
+        self.transitions.delete_edge(state_from, state_to, input_string)
+        self._matcher = None
 
     def get_alphabet(self):
         """
@@ -127,9 +205,7 @@ class FA:
         """
         alphabet = Set()
         for state in self.states:
-            state_index = list(self.states).index(state)
-            edges = self.transitions.get_edges(state_index)
-            for _, input_string in edges:
+            for _, input_string in self.transitions.get_edges(state):
                 if input_string == "":
                     alphabet.add('')
                 else:
@@ -137,27 +213,34 @@ class FA:
                         alphabet.add(char)
         return alphabet
 
+    def symbol_classes(self):
+        """
+        Returns the equivalence classes of the alphabet: symbols labelling
+        exactly the same transitions share a class (see app.fa.symbol_classes).
+        """
+        return compute_symbol_classes(self)
+
     def pretty_print(self):
         """
         Pretty prints the finite automaton.
         """
         print("Finite Automaton:")
         print("=================")
-        print(f"States ({len(self.states)}): {', '.join(map(str, self.states))}")
-        print(f"Starting State: {self.starting_state}")
-        print(f"Final States ({len(self.final_states)}): {', '.join(map(str, self.final_states))}")
+        name_of = self.name_of
+        starting_state = None if self.starting_state is None else name_of(self.starting_state)
+        print(f"States ({len(self.states)}): {', '.join(map(name_of, self.states))}")
+        print(f"Starting State: {starting_state}")
+        print(f"Final States ({len(self.final_states)}): {', '.join(map(name_of, self.final_states))}")
         print(f"Transitions ({self.transitions.get_edges_count()}):")
         
         # Get all transitions for each state
         for state in self.states:
-            state_index = list(self.states).index(state)
-            edges = self.transitions.get_edges(state_index)
+            edges = self.transitions.get_edges(state)
             if edges:  # If state has outgoing transitions
-                for dest_index, input_string in edges:
-                    dest_state = list(self.states)[dest_index]
-                    print(f"  {state} --[{input_string}]--> {dest_state}")
+                for dest_state, input_string in edges:
+                    print(f"  {name_of(state)} --[{input_string}]--> {name_of(dest_state)}")
             else:  # If state has no outgoing transitions
-                print(f"  {state} (no outgoing transitions)")
+                print(f"  {name_of(state)} (no outgoing transitions)")
         
         print(f"Alphabet: {', '.join(map(str, self.get_alphabet()))}")
 
@@ -4,57 +4,75 @@ from app.fa.fa import FA
 
 
 class FABuilder:
-    def __init__(self):
-        self.state_counter = 0
-
-    def new_state(self):
-        """Returns a unique state ID"""
-        self.state_counter += 1
-        return f"q{self.state_counter}"
-
     def build_from_postorder(self, postorder_list):
         """Build FA from a postorder-traversed AST"""
-        stack = []
         fa = FA()
+        fragment = self._build_fragment(fa, postorder_list)
+
+        # Set the final states and starting state
+        if fragment:
+            start, end = fragment
+            fa.starting_state = start
+            fa.add_final_state(end)
+
+        return fa
+
+    def build_union(self, postorder_lists):
+        """
+        Build one FA accepting the union of several postorder-traversed ASTs.
+        The accepting state of the i-th AST is tagged with i, so a match can be
+        traced back to every pattern it satisfies.
+        """
+        fa = FA()
+        start = fa.add_state()
+        fa.starting_state = start
+
+        for pattern_id, postorder_list in enumerate(postorder_lists):
+            fragment = self._build_fragment(fa, postorder_list)
+            if fragment:
+                fa.add_transition(start, "", fragment[0])
+                fa.add_final_state(fragment[1])
+                fa.add_tag(fragment[1], pattern_id)
+
+        return fa
+
+    def _build_fragment(self, fa, postorder_list):
+        """
+        Adds the Thompson construction of a postorder-traversed AST to `fa`.
+        Returns its (start, end) states, or None for an empty list.
+        """
+        stack = []
 
         def create_basic_fa(char):
             """Creates a basic FA for a single character"""
-            start = self.new_state()
-            end = self.new_state()
-            fa.add_state(start)
-            fa.add_state(end)
+            start = fa.add_state()
+            end = fa.add_state()
             fa.add_transition(start, char, end)
             return (start, end)
 
-        def concat_fa(fa1, fa2):
-            """Concatenates two FAs"""
-            # Connect fa1's end to fa2's start with epsilon transition
-            fa.add_transition(fa1[1], "", fa2[0])
-            return (fa1[0], fa2[1])
+        def concat_fa(fas):
+            """Concatenates FAs, in order"""
+            # Connect each FA's end to the next FA's start with epsilon transition
+            for fa1, fa2 in zip(fas, fas[1:]):
+                fa.add_transition(fa1[1], "", fa2[0])
+            return (fas[0][0], fas[-1][1])
 
-        def union_fa(fa1, fa2):
-            """Creates a union (|) of two FAs"""
-            start = self.new_state()
-            end = self.new_state()
-            fa.add_state(start)
-            fa.add_state(end)
+        def union_fa(fas):
+            """Creates a union (|) of FAs"""
+            start = fa.add_state()
+            end = fa.add_state()
             
-            # Connect new start to both FA starts
-            fa.add_transition(start, "", fa1[0])
-            fa.add_transition(start, "", fa2[0])
-            
-            # Connect both FA ends to new end
-            fa.add_transition(fa1[1], "", end)
-            fa.add_transition(fa2[1], "", end)
+            # Connect new start to every FA start, and every FA end to new end
+            for fa1 in fas:
+                fa.add_transition(start, "", fa1[0])
+                fa.add_transition(fa1[1], "", end)
             
             return (start, end)
 
         def star_fa(fa1):
             """Creates a Kleene star (*) of an FA"""
-            start = self.new_state()
-            end = self.new_state()
-            fa.add_state(start)
-            fa.add_state(end)
+            start = fa.add_state()
+            end = fa.add_state()
             
             # Empty string case
             fa.add_transition(start, "", end)
@@ -72,26 +90,13 @@ class FABuilder:
         for node in postorder_list:
             if node.type == "SYMBOL":
                 stack.append(create_basic_fa(node.value))
-            elif node.type == "CONCAT":
-                fa2 = stack.pop()
-                fa1 = stack.pop()
-                stack.append(concat_fa(fa1, fa2))
-            elif node.type == "UNION":
-                fa2 = stack.pop()
-                fa1 = stack.pop()
-                stack.append(union_fa(fa1, fa2))
+            elif node.type in ("CONCAT", "UNION"):
+                # N-ary nodes: their operands are the last fragments on the stack
+                fas = stack[len(stack) - len(node.children):]
+                del stack[len(stack) - len(node.children):]
+                stack.append(concat_fa(fas) if node.type == "CONCAT" else union_fa(fas))
             elif node.type == "STAR":
                 fa1 = stack.pop()
                 stack.append(star_fa(fa1))
 
-        # Set the final states and starting state
-        if stack:
-            start, end = stack.pop()
-            fa.starting_state = start
-            fa.add_final_state(end)
-            
-            # Make sure all states are added to the FA
-            fa.add_state(start)
-            fa.add_state(end)
-
-        return fa
+        return stack.pop() if stack else None
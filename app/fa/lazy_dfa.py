@@ -0,0 +1,209 @@
+import threading
+from app.fa.byte_input import ByteSymbols
+from app.fa.nfa_simulator import NFASimulator
+
+
+class LazyDFA:
+    """
+    DFA built on demand from an epsilon-NFA.
+
+    Subset states are only created when matching reaches them, and are kept in
+    a cache of at most `max_states` states. When the cache is full it is cleared
+    and rebuilt from the current state (clear-and-restart). If the cache keeps
+    filling up again before it has paid for itself (fewer than
+    `min_symbols_per_state` input symbols scanned per cached state since the
+    last clear), run() finishes the current input with plain NFA stepping
+    instead. Symbols stepped that way count as scanned too, so after enough
+    input the cache is cleared and used again. step() has to return a state
+    id, so it always clears the cache, thrashing or not.
+
+    State ids are only valid until the next cache clear; the id returned by
+    step() is always valid.
+    """
+
+    DEAD = 0
+
+    def __init__(self, nfa, max_states=10000, min_symbols_per_state=10, unanchored=False):
+        """
+        Args:
+            nfa: an FA or an already built NFASimulator
+            max_states: maximum number of subset states kept in the cache
+            min_symbols_per_state: thrashing threshold, see class docstring
+            unanchored: if True, the start state is re-entered before every
+                        symbol, i.e. the automaton behaves as if the pattern
+                        was prefixed with `.*`
+        """
+        self.sim = nfa if isinstance(nfa, NFASimulator) else NFASimulator(nfa)
+        self.max_states = max(max_states, 3)
+        self.min_symbols_per_state = min_symbols_per_state
+        self.unanchored = unanchored
+
+        self._ids = {}    # subset bitset -> state id
+        self._sets = []   # state id -> subset bitset
+        self._next = []   # state id -> {symbol: state id}
+        self._class_next = []  # state id -> {symbol class: state id}
+        self._accept = []
+        self._symbols_since_clear = 0
+
+        self.cache_clears = 0
+        self.nfa_fallbacks = 0
+        self._reset_cache()
+
+    def copy(self):
+        """
+        Returns a new LazyDFA over the same NFASimulator, with the same options
+        and an empty cache, for a user that needs state ids nobody else can
+        invalidate (see StreamMatcher).
+        """
+        return LazyDFA(self.sim, self.max_states, self.min_symbols_per_state, self.unanchored)
+
+    def _reset_cache(self):
+        self._ids.clear()
+        self._sets.clear()
+        self._next.clear()
+        self._class_next.clear()
+        self._accept.clear()
+        self._intern(0)  # dead state
+        self.start = self._intern(self.sim.start)
+
+    def _intern(self, subset):
+        state = self._ids.get(subset)
+        if state is None:
+            state = len(self._sets)
+            self._ids[subset] = state
+            self._sets.append(subset)
+            self._next.append({})
+            self._class_next.append({})
+            self._accept.append(bool(subset & self.sim.final_mask))
+        return state
+
+    def _thrashing(self):
+        # The first fill has nothing to pay back: only a refill can thrash
+        return (self.cache_clears > 0
+                and self._symbols_since_clear < self.min_symbols_per_state * self.max_states)
+
+    def _add_transition(self, state, symbol, scanned):
+        """
+        Computes and caches the transition of `state` on `symbol`.
+        `scanned` is the number of symbols consumed since the last cache miss.
+        Returns the next state id, or None if the cache is thrashing; the subset
+        to continue from is then left in self._fallback_subset.
+
+        Transitions are computed once per symbol class (see FA.symbol_classes);
+        other symbols of an already computed class only add a cache entry.
+        """
+        self._symbols_since_clear += scanned
+        symbol_class = self.sim.class_map.get(symbol, 0)
+        next_state = self._class_next[state].get(symbol_class)
+        if next_state is not None:
+            self._next[state][symbol] = next_state
+            return next_state
+
+        subset = self.sim.step_class(self._sets[state], symbol_class)
+        if self.unanchored:
+            subset |= self.sim.start
+
+        if subset not in self._ids and len(self._sets) >= self.max_states:
+            if self._thrashing():
+                self._fallback_subset = subset
+                return None
+            self.cache_clears += 1
+            self._symbols_since_clear = 0
+            self._reset_cache()
+            return self._intern(subset)
+
+        next_state = self._intern(subset)
+        self._next[state][symbol] = next_state
+        self._class_next[state][symbol_class] = next_state
+        return next_state
+
+    def step(self, state, symbol):
+        """Returns the state reached from `state` on `symbol`."""
+        self._symbols_since_clear += 1
+        next_state = self._next[state].get(symbol)
+        if next_state is None:
+            next_state = self._add_transition(state, symbol, 0)
+            if next_state is None:
+                # Thrashing, but the caller needs a state id: there is no NFA
+                # fallback here, the cache is cleared like a full one
+                self.cache_clears += 1
+                self._symbols_since_clear = 0
+                self._reset_cache()
+                next_state = self._intern(self._fallback_subset)
+        return next_state
+
+    def is_accepting(self, state):
+        return self._accept[state]
+
+    def run(self, input_string):
+        """
+        Returns True if the whole input string is accepted.
+        Bytes-like inputs are read in place as byte-mode symbols (see ByteSymbols).
+        """
+        if not isinstance(input_string, (str, ByteSymbols)):
+            with ByteSymbols(input_string) as symbols:
+                return self.run(symbols)
+        cache = self._next
+        state = self.start
+        last_miss = 0
+
+        for pos, char in enumerate(input_string):
+            next_state = cache[state].get(char)
+            if next_state is None:
+                next_state = self._add_transition(state, char, pos - last_miss)
+                last_miss = pos
+                if next_state is None:
+                    self.nfa_fallbacks += 1
+                    return self._run_nfa(self._fallback_subset, input_string, pos + 1)
+            state = next_state
+            if state == self.DEAD:
+                return False
+
+        return self._accept[state]
+
+    def _run_nfa(self, subset, input_string, pos):
+        """
+        Finishes a run with plain NFA stepping, starting at `pos`.
+        The symbols stepped count as scanned since the last clear, so once
+        enough input went by the next full cache is cleared again instead of
+        falling back.
+        """
+        step = self.sim.step
+        start = self.sim.start if self.unanchored else 0
+        for index in range(pos, len(input_string)):
+            subset = step(subset, input_string[index]) | start
+            if not subset:
+                self._symbols_since_clear += index + 1 - pos
+                return False
+        self._symbols_since_clear += len(input_string) - pos
+        return self.sim.is_accepting(subset)
+
+    def stats(self):
+        return {
+            'cached_states': len(self._sets),
+            'cache_clears': self.cache_clears,
+            'nfa_fallbacks': self.nfa_fallbacks,
+        }
+
+    def __repr__(self):
+        return f"LazyDFA(cached_states={len(self._sets)}, max_states={self.max_states})"
+
+
+class PerThreadLazyDFA(threading.local):
+    """
+    One LazyDFA per thread over a shared NFASimulator.
+
+    A LazyDFA fills and clears its cache while matching, so it cannot be used
+    by several threads at once; the NFASimulator it is built from never
+    changes after construction. Objects shared between threads (cached FAs
+    and Patterns, see app.cache) keep the simulator and build the LazyDFA of
+    each thread the first time that thread reads `dfa`.
+    """
+
+    def __init__(self, sim, **options):
+        """
+        Args:
+            sim: the NFASimulator shared by every thread
+            options: keyword arguments of LazyDFA
+        """
+        self.dfa = LazyDFA(sim, **options)
@@ -0,0 +1,95 @@
+from app.ds.state_set import StateSet
+
+
+class NFASimulator:
+    """
+    Thompson-style simulation of an epsilon-NFA.
+
+    The whole set of active states is advanced one input symbol at a time.
+    Sets of states are the raw ints of StateSet bitsets (bit i = state index i),
+    and the epsilon closure of every state is computed once up front, so each
+    step costs O(active states) and a full run is O(len(input) x states).
+
+    Moves are indexed by symbol class (see FA.symbol_classes): class_map gives
+    the class of each symbol, and symbols outside the alphabet (class 0) lead
+    nowhere.
+    """
+
+    def __init__(self, fa):
+        self.num_states = len(fa.states)
+
+        edges = [fa.transitions.get_edges(i) for i in range(self.num_states)]
+
+        # Epsilon closure of each single state, as a bitset
+        self.closures = [fa.epsilon_closure((state_index,)).bits for state_index in range(self.num_states)]
+
+        self.symbol_classes = fa.symbol_classes()
+        self.class_map = self.symbol_classes.class_map
+
+        # moves[i][c] = closure of every state reachable from i on a symbol of class c
+        self.moves = []
+        for state_index in range(self.num_states):
+            row = {}
+            for dest_index, symbol in edges[state_index]:
+                if symbol != "":
+                    symbol_class = self.class_map[symbol]
+                    row[symbol_class] = row.get(symbol_class, 0) | self.closures[dest_index]
+            self.moves.append(row)
+
+        self.final_mask = StateSet(fa.final_states).bits
+
+        if fa.starting_state is None:
+            self.start = 0
+        else:
+            self.start = self.closures[fa.starting_state]
+
+    def state_set(self, states):
+        """Wraps a set of states returned by the simulator into a StateSet."""
+        return StateSet.from_bits(states)
+
+    def step(self, states, symbol):
+        """Returns the set of states reached from `states` on `symbol`."""
+        return self.step_class(states, self.class_map.get(symbol, 0))
+
+    def step_class(self, states, symbol_class):
+        """Returns the set of states reached from `states` on any symbol of a class."""
+        moves = self.moves
+        next_states = 0
+        while states:
+            low_bit = states & -states
+            target = moves[low_bit.bit_length() - 1].get(symbol_class)
+            if target:
+                next_states |= target
+            states ^= low_bit
+        return next_states
+
+    def is_accepting(self, states):
+        return bool(states & self.final_mask)
+
+    def run(self, input_string):
+        """
+        Returns True if the whole input string is accepted.
+        Iterates over the input once without slicing it.
+        """
+        moves = self.moves
+        class_of = self.class_map.get
+        states = self.start
+
+        for char in input_string:
+            # Same as self.step, inlined for the hot loop
+            symbol_class = class_of(char, 0)
+            next_states = 0
+            while states:
+                low_bit = states & -states
+                target = moves[low_bit.bit_length() - 1].get(symbol_class)
+                if target:
+                    next_states |= target
+                states ^= low_bit
+            if not next_states:
+                return False
+            states = next_states
+
+        return bool(states & self.final_mask)
+
+    def __repr__(self):
+        return f"NFASimulator(states={self.num_states})"
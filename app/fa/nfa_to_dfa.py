@@ -1,102 +1,95 @@
-from app.ds.set import Set
-from app.fa.fa import FA
-from collections import deque
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.nfa_simulator import NFASimulator
 
-def convert_to_dfa(nfa):
+
+def determinize(nfa, stats=None):
+    """
+    Subset construction, straight into a CompiledDFA.
+
+    The epsilon closure of every NFA state and its move on every symbol class
+    are computed once up front (see NFASimulator), so the successors of a
+    subset are unions of precomputed bitsets, gathered for all classes in a
+    single pass over the subset's states. Subsets are interned into table ids
+    as they are discovered, in BFS order over the classes, which gives the
+    same canonical numbering as CompiledDFA.from_fa. The empty subset is the
+    dead state 0.
+
+    Args:
+        nfa: The input NFA (FA object)
+        stats: optional dict, filled with 'visited_subsets' (the number of
+               non-empty subsets explored)
+
+    Returns:
+        A CompiledDFA accepting the same language, with the union of the NFA
+        tags on every accepting state
+    """
+    sim = NFASimulator(nfa)
+    width = sim.symbol_classes.num_classes
+    moves = sim.moves
+    final_mask = sim.final_mask
+    dead = CompiledDFA.DEAD
+
+    table = [[dead] * width]
+    accepting = [False]
+    tags = [()]
+    subsets = [0]
+    ids = {0: dead}
+    if nfa.starting_state is not None:
+        ids[sim.start] = 1
+        subsets.append(sim.start)
+
+    state = 1
+    while state < len(subsets):
+        subset = subsets[state]
+
+        # Successor of the subset on every class, in one pass over its states
+        targets = [0] * width
+        remaining = subset
+        while remaining:
+            low_bit = remaining & -remaining
+            for symbol_class, target in moves[low_bit.bit_length() - 1].items():
+                targets[symbol_class] |= target
+            remaining ^= low_bit
+
+        row = []
+        for target in targets:
+            dest = ids.get(target)
+            if dest is None:
+                dest = ids[target] = len(subsets)
+                subsets.append(target)
+            row.append(dest)
+        table.append(row)
+
+        final_states = subset & final_mask
+        accepting.append(bool(final_states))
+        tags.append(_subset_tags(nfa, sim.state_set(final_states)))
+        state += 1
+
+    if stats is not None:
+        stats['visited_subsets'] = len(subsets) - 1
+
+    return CompiledDFA(table, accepting, sim.class_map, 1 if len(subsets) > 1 else dead, tags)
+
+
+def _subset_tags(nfa, final_states):
+    """Returns the sorted pattern ids of the accepting NFA states of a subset."""
+    if not nfa.tags:
+        return ()
+    tags = set()
+    for state in final_states:
+        tags.update(nfa.get_tags(state))
+    return tuple(sorted(tags))
+
+
+def convert_to_dfa(nfa, stats=None):
     """
-    Converts NFA to DFA using BFS to explore state combinations.
-    
+    Converts NFA to DFA (see determinize).
+
     Args:
         nfa: The input NFA (FA object)
-    
+        stats: optional dict, see determinize
+
     Returns:
         A new FA object that is deterministic
     """
-    dfa = FA()
-    
-    # Get alphabet (excluding epsilon)
-    alphabet = Set()
-    for state in nfa.states:
-        state_index = list(nfa.states).index(state)
-        edges = nfa.transitions.get_edges(state_index)
-        for _, symbol in edges:
-            if symbol != "":
-                alphabet.add(symbol)
-    
-    # Start with epsilon closure of initial state
-    initial_states = nfa.epsilon_closure(Set([nfa.starting_state]))
-    
-    # BFS queue and visited set
-    queue = deque([initial_states])
-    visited = Set()  # Set of frozensets
-    
-    # Map NFA state combinations to DFA state names
-    state_counter = 0
-    state_map = {}
-    
-    while queue:
-        current_states = queue.popleft()
-        current_key = current_states.to_frozenset()
-        
-        # Skip if we've seen this combination
-        if current_key in visited:
-            continue
-            
-        # Mark as visited
-        visited.add(current_key)
-        
-        # Create new DFA state for this combination
-        if current_key not in state_map:
-            dfa_state = f"q{state_counter}"
-            state_map[current_key] = dfa_state
-            state_counter += 1
-            
-            # Add state to DFA
-            dfa.add_state(dfa_state)
-            
-            # Mark as final if it contains any final states
-            if any(state in nfa.final_states for state in current_states):
-                dfa.add_final_state(dfa_state)
-        
-        current_dfa_state = state_map[current_key]
-        
-        # For each input symbol
-        for symbol in alphabet:
-            next_states = Set()
-            
-            # Get all possible next states
-            for state in current_states:
-                state_index = list(nfa.states).index(state)
-                edges = nfa.transitions.get_edges(state_index)
-                
-                for dest_index, edge_symbol in edges:
-                    if edge_symbol == symbol:
-                        dest_state = list(nfa.states)[dest_index]
-                        # Include epsilon closure of destination
-                        next_states.update(nfa.epsilon_closure(Set([dest_state])))
-            
-            # If we have next states
-            if next_states:
-                next_key = next_states.to_frozenset()
-                
-                # Create new DFA state if needed
-                if next_key not in state_map:
-                    dfa_state = f"q{state_counter}"
-                    state_map[next_key] = dfa_state
-                    state_counter += 1
-                    dfa.add_state(dfa_state)
-                    
-                    # Mark as final if needed
-                    if any(state in nfa.final_states for state in next_states):
-                        dfa.add_final_state(dfa_state)
-                    
-                    # Add to BFS queue
-                    queue.append(next_states)
-                
-                # Add transition
-                dfa.add_transition(current_dfa_state, symbol, state_map[next_key])
-    
-    # Set initial state
-    dfa.starting_state = state_map[initial_states.to_frozenset()]
-    
-    return dfa
+    return determinize(nfa, stats).to_fa()
@@ -0,0 +1,108 @@
+from app.ds.state_set import StateSet
+from app.fa.fa import FA
+
+
+class PositionBuilder:
+    """
+    Builds a DFA directly from a regex AST with the followpos (position
+    automaton) construction, without going through an epsilon-NFA.
+
+    Every SYMBOL leaf is a position, numbered in postorder, and an end marker
+    position is appended after the whole regex. nullable, firstpos and lastpos
+    are computed bottom-up and followpos is filled from the CONCAT and STAR
+    nodes; the DFA states are then sets of positions, starting with
+    firstpos(root), and a state is accepting when it holds the end marker.
+    Sets of positions are int bitsets (see StateSet), so one AST pass plus one
+    pass over the positions of each DFA state is all the work done.
+
+    Unlike FABuilder, the result is already deterministic.
+    """
+
+    def build_from_postorder(self, postorder_list):
+        """Build a DFA from a postorder-traversed AST"""
+        fa = FA()
+        if not postorder_list:
+            return fa
+
+        symbols, followpos, start, end_marker = self._positions(postorder_list)
+
+        # DFA states are interned position sets, explored in BFS order
+        ids = {start: fa.add_state()}
+        fa.starting_state = ids[start]
+        queue = [start]
+        for positions in queue:
+            state = ids[positions]
+            if positions >> end_marker & 1:
+                fa.add_final_state(state)
+
+            # Positions reached on every symbol, in one pass over the set
+            targets = {}
+            for position in StateSet.from_bits(positions):
+                if position != end_marker:
+                    symbol = symbols[position]
+                    targets[symbol] = targets.get(symbol, 0) | followpos[position]
+
+            for symbol in sorted(targets):
+                target = targets[symbol]
+                if target not in ids:
+                    ids[target] = fa.add_state()
+                    queue.append(target)
+                fa.add_transition(state, symbol, ids[target])
+
+        return fa
+
+    def _positions(self, postorder_list):
+        """
+        Numbers the positions of a postorder-traversed AST and computes their
+        followpos sets.
+
+        Returns:
+            (symbols, followpos, start, end_marker): the symbol of every
+            position, the followpos bitset of every position, the firstpos
+            bitset of the augmented regex and the end marker position
+        """
+        symbols = []
+        followpos = []
+
+        # Stack of (nullable, firstpos, lastpos) of the subtrees seen so far
+        stack = []
+        for node in postorder_list:
+            if node.type == "SYMBOL":
+                position = 1 << len(symbols)
+                symbols.append(node.value)
+                followpos.append(0)
+                stack.append((False, position, position))
+            elif node.type == "CONCAT":
+                operands = stack[len(stack) - len(node.children):]
+                del stack[len(stack) - len(node.children):]
+                nullable, firstpos, lastpos = operands[0]
+                for right_nullable, right_firstpos, right_lastpos in operands[1:]:
+                    for position in StateSet.from_bits(lastpos):
+                        followpos[position] |= right_firstpos
+                    if nullable:
+                        firstpos |= right_firstpos
+                    lastpos = lastpos | right_lastpos if right_nullable else right_lastpos
+                    nullable = nullable and right_nullable
+                stack.append((nullable, firstpos, lastpos))
+            elif node.type == "UNION":
+                operands = stack[len(stack) - len(node.children):]
+                del stack[len(stack) - len(node.children):]
+                nullable, firstpos, lastpos = False, 0, 0
+                for child_nullable, child_firstpos, child_lastpos in operands:
+                    nullable = nullable or child_nullable
+                    firstpos |= child_firstpos
+                    lastpos |= child_lastpos
+                stack.append((nullable, firstpos, lastpos))
+            elif node.type == "STAR":
+                _, firstpos, lastpos = stack.pop()
+                for position in StateSet.from_bits(lastpos):
+                    followpos[position] |= firstpos
+                stack.append((True, firstpos, lastpos))
+
+        # Augment the regex with the end marker: regex . #
+        nullable, firstpos, lastpos = stack.pop()
+        end_marker = len(symbols)
+        for position in StateSet.from_bits(lastpos):
+            followpos[position] |= 1 << end_marker
+        start = firstpos | (1 << end_marker if nullable else 0)
+        return symbols, followpos, start, end_marker
@@ -0,0 +1,276 @@
+"""
+Compact binary format for minimized DFAs.
+
+Layout (little-endian):
+    header     32 bytes, see HEADER below
+    class map  num_symbols x (code point u32, class u32)
+    table      num_states x num_classes int32, row-major
+    accept     ceil(num_states / 8) bytes, bit i = state i is accepting
+    tags       only if FLAG_TAGS: per state, a u32 count followed by its u32 tags
+
+The checksum is the CRC-32 of everything after the header. State 0 is the
+dead state and class 0 stands for symbols outside the alphabet, as in
+CompiledDFA.
+
+Automata that are not table-compilable (epsilon-NFAs, intermediate DFAs)
+use dump_fa / load_fa instead: zlib-compressed JSON of states and edges.
+"""
+import json
+import mmap
+import struct
+import sys
+import zlib
+import numpy as np
+from app.fa.byte_input import BYTE_SYMBOLS, byte_view
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.fa import FA
+
+MAGIC = b"RDFA"
+VERSION = 1
+FLAG_TAGS = 1
+
+# magic, version, flags, num_states, num_classes, start, num_symbols, checksum, reserved
+HEADER = struct.Struct("<4sHHIIIIII")
+
+
+def dump_dfa(dfa):
+    """
+    Serializes a DFA to bytes.
+
+    Args:
+        dfa: a CompiledDFA, or a deterministic FA (e.g. the output of minimize_dfa)
+    """
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+
+    symbols = sorted(dfa.class_map.items())
+    if any(len(symbol) != 1 for symbol, _ in symbols):
+        raise ValueError("only single-character symbols can be serialized")
+
+    parts = []
+    for symbol, symbol_class in symbols:
+        parts.append(struct.pack("<II", ord(symbol), symbol_class))
+    parts.append(dfa.table.astype("<i4").tobytes())
+    parts.append(np.packbits(dfa.accepting, bitorder="little").tobytes())
+
+    flags = 0
+    if any(dfa.tags):
+        flags |= FLAG_TAGS
+        for state_tags in dfa.tags:
+            parts.append(struct.pack(f"<I{len(state_tags)}I", len(state_tags), *state_tags))
+
+    body = b"".join(parts)
+    header = HEADER.pack(MAGIC, VERSION, flags, dfa.num_states, dfa.num_classes,
+                         dfa.start, len(symbols), zlib.crc32(body), 0)
+    return header + body
+
+
+def dump_fa(fa):
+    """Serializes any FA (including epsilon-NFAs) to compressed bytes."""
+    frozen = fa.transitions.freeze()
+    sources = np.repeat(np.arange(frozen.size), np.diff(frozen.offsets))
+    edges = [list(edge) for edge in zip(sources.tolist(), frozen.targets.tolist(), frozen.labels.tolist())]
+
+    data = {
+        'states': [fa.name_of(state) for state in fa.states],
+        'start': fa.starting_state,
+        'final': list(fa.final_states),
+        'edges': edges,
+        'tags': [[state, sorted(tags)] for state, tags in fa.tags.items()],
+    }
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def load_fa(data):
+    """Rebuilds an FA from bytes produced by dump_fa."""
+    data = json.loads(zlib.decompress(data).decode("utf-8"))
+    fa = FA()
+    for name in data['states']:
+        fa.add_state(name)
+    for src, dest, symbol in data['edges']:
+        fa.add_transition(src, symbol, dest)
+    for state in data['final']:
+        fa.add_final_state(state)
+    for state, tags in data['tags']:
+        for tag in tags:
+            fa.add_tag(state, tag)
+    fa.starting_state = data['start']
+    return fa
+
+
+def save_dfa(dfa, path):
+    """Writes a DFA to a file in the binary format (see dump_dfa)."""
+    with open(path, "wb") as f:
+        f.write(dump_dfa(dfa))
+
+
+def load_dfa(path, verify=True):
+    """
+    Memory-maps a file written by save_dfa and returns a MappedDFA matching
+    straight from the mapped buffer.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return MappedDFA(mapped, verify=verify)
+    except Exception:
+        mapped.close()
+        raise
+
+
+def loads_dfa(data, verify=True):
+    """Returns a MappedDFA reading from an in-memory buffer produced by dump_dfa."""
+    return MappedDFA(data, verify=verify)
+
+
+class MappedDFA:
+    """
+    DFA backed by a serialized buffer (bytes or mmap).
+
+    The transition table and accept bitmap are read in place through
+    memoryviews; only the (small) class map is decoded into a dict. Offers the
+    same matching interface as CompiledDFA.
+    """
+
+    DEAD = 0
+
+    def __init__(self, buffer, verify=True):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError("buffer too small for a DFA header")
+
+        (magic, version, flags, num_states, num_classes, start,
+         num_symbols, checksum, _) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("not a serialized DFA (bad magic)")
+        if version != VERSION:
+            raise ValueError(f"unsupported DFA format version {version}")
+        if verify and zlib.crc32(view[HEADER.size:]) != checksum:
+            raise ValueError("DFA checksum mismatch")
+
+        self.num_states = num_states
+        self.num_classes = num_classes
+        self.start = start
+
+        offset = HEADER.size
+        self.class_map = {}
+        for code_point, symbol_class in struct.iter_unpack("<II", view[offset:offset + 8 * num_symbols]):
+            self.class_map[chr(code_point)] = symbol_class
+        offset += 8 * num_symbols
+        # Byte mode class map, see CompiledDFA.byte_classes
+        self._byte_classes = [self.class_map.get(symbol, 0) for symbol in BYTE_SYMBOLS]
+
+        table_size = 4 * num_states * num_classes
+        self._table_offset = offset
+        table = view[offset:offset + table_size]
+        if sys.byteorder == "little":
+            self._flat = table.cast("i")
+        else:
+            self._flat = np.frombuffer(table, dtype="<i4").tolist()
+        offset += table_size
+
+        accept_size = (num_states + 7) // 8
+        self._accept_bits = view[offset:offset + accept_size]
+        offset += accept_size
+
+        # Every view into the buffer, released by close()
+        self._views = [view, table, self._accept_bits]
+        if sys.byteorder == "little":
+            self._views.append(self._flat)
+
+        self.tags = [()] * num_states
+        if flags & FLAG_TAGS:
+            self.tags = []
+            for _ in range(num_states):
+                (count,) = struct.unpack_from("<I", view, offset)
+                self.tags.append(struct.unpack_from(f"<{count}I", view, offset + 4))
+                offset += 4 + 4 * count
+
+    def step(self, state, symbol):
+        """Returns the state reached from `state` on `symbol`."""
+        return self._flat[state * self.num_classes + self.class_map.get(symbol, 0)]
+
+    def is_accepting(self, state):
+        return bool(self._accept_bits[state >> 3] >> (state & 7) & 1)
+
+    def run(self, input_string):
+        """Returns True if the whole input string (str or bytes-like) is accepted."""
+        if not isinstance(input_string, str):
+            return self.run_bytes(input_string)
+        flat = self._flat
+        width = self.num_classes
+        class_of = self.class_map.get
+        state = self.start
+
+        for char in input_string:
+            state = flat[state * width + class_of(char, 0)]
+            if not state:
+                return False
+
+        return self.is_accepting(state)
+
+    def match_tags(self, input_string):
+        """Returns the tags of the state reached, or () if the input is rejected."""
+        if not isinstance(input_string, str):
+            state = self._run_bytes_state(input_string)
+            return self.tags[state] if self.is_accepting(state) else ()
+        flat = self._flat
+        width = self.num_classes
+        class_of = self.class_map.get
+        state = self.start
+
+        for char in input_string:
+            state = flat[state * width + class_of(char, 0)]
+            if not state:
+                return ()
+
+        return self.tags[state] if self.is_accepting(state) else ()
+
+    def _run_bytes_state(self, data, pos=0, endpos=None):
+        flat = self._flat
+        width = self.num_classes
+        byte_classes = self._byte_classes
+        state = self.start
+
+        view = byte_view(data, pos, endpos)
+        try:
+            for byte in view:
+                state = flat[state * width + byte_classes[byte]]
+                if not state:
+                    break
+        finally:
+            view.release()
+        return state
+
+    def run_bytes(self, data, pos=0, endpos=None):
+        """Returns True if data[pos:endpos] is accepted, see CompiledDFA.run_bytes."""
+        return self.is_accepting(self._run_bytes_state(data, pos, endpos))
+
+    def to_compiled(self):
+        """Returns a CompiledDFA (e.g. for match_many); the table is copied once."""
+        table = np.frombuffer(self._buffer, dtype="<i4", count=self.num_states * self.num_classes,
+                              offset=self._table_offset).astype(np.int32)
+        table = table.reshape(self.num_states, self.num_classes)
+        accepting = np.unpackbits(np.frombuffer(self._accept_bits, dtype=np.uint8),
+                                  bitorder="little")[:self.num_states].astype(bool)
+        return CompiledDFA(table, accepting, self.class_map, self.start, self.tags)
+
+    def close(self):
+        """Releases the buffer (unmaps the file for load_dfa)."""
+        self._flat = None
+        self._accept_bits = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"MappedDFA(states={self.num_states}, classes={self.num_classes}, start={self.start})"
@@ -31,12 +31,10 @@ def find_shortest_accepting_string(fa):
         visited.add(current)
         
         # Get all transitions from current state
-        current_index = list(fa.states).index(current)
-        edges = fa.transitions.get_edges(current_index)
+        edges = fa.transitions.get_edges(current)
         
         # Add all possible next states to priority queue
-        for dest_index, symbol in edges:
-            dest_state = list(fa.states)[dest_index]
+        for dest_state, symbol in edges:
             if dest_state not in visited:
                 # For epsilon transitions, don't increase path length
                 new_length = length if symbol == "" else length + 1
@@ -87,12 +85,10 @@ def find_all_shortest_accepting_strings(fa, max_count=5):
         visited[current].add(length)
         
         # Get all transitions from current state
-        current_index = list(fa.states).index(current)
-        edges = fa.transitions.get_edges(current_index)
+        edges = fa.transitions.get_edges(current)
         
         # Add all possible next states to priority queue
-        for dest_index, symbol in edges:
-            dest_state = list(fa.states)[dest_index]
+        for dest_state, symbol in edges:
             # For epsilon transitions, don't increase path length
             new_length = length if symbol == "" else length + 1
             new_string = string if symbol == "" else string + symbol
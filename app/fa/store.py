@@ -0,0 +1,201 @@
+import hashlib
+import json
+import sqlite3
+import time
+from app.app import build_fa
+from app.cache import compiled_cache, fa_cache_key
+from app.fa.dfa_minimization import minimize_dfa
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.fa.serialization import dump_fa, load_fa, dump_dfa, loads_dfa
+
+SCHEMA_VERSION = 1
+
+# Pipeline stages kept for every regex, with the build_fa flags producing them
+STAGES = {
+    'nfa': (False, False),
+    'dfa': (True, False),
+    'minimized': (True, True),
+}
+
+# Pipeline options that change the stored automata, with their defaults
+DEFAULT_OPTIONS = {'if_remove_duplicate_transitions': False}
+
+
+def normalize_regex(regex):
+    """Drops the characters the lexer ignores, so equivalent spellings share a key."""
+    return regex.replace(' ', '').replace('\t', '')
+
+
+def _options_json(options):
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown pipeline options: {', '.join(sorted(unknown))}")
+    return json.dumps({**DEFAULT_OPTIONS, **options}, sort_keys=True)
+
+
+def _check_stages(stages):
+    # Stage names are interpolated into SQL as column names
+    for stage in stages:
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+
+
+class AutomatonStore:
+    """
+    SQLite-backed store of compiled automata.
+
+    Every regex is stored with its three pipeline stages (Thompson NFA, DFA and
+    minimized DFA), keyed by a hash of the normalized regex and the pipeline
+    options. Automata themselves live in a content-addressed blob table, so
+    identical minimized DFAs built from different regexes are stored once.
+    Minimized DFAs use the binary format of app.fa.serialization, the other
+    stages its compressed FA encoding.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                name  TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS automata (
+                key       TEXT PRIMARY KEY,
+                regex     TEXT NOT NULL,
+                options   TEXT NOT NULL,
+                nfa       TEXT REFERENCES blobs(hash),
+                dfa       TEXT REFERENCES blobs(hash),
+                minimized TEXT REFERENCES blobs(hash),
+                created   REAL NOT NULL
+            );
+        """)
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+        elif int(row[0]) != SCHEMA_VERSION:
+            raise ValueError(f"unsupported automaton store schema version {row[0]}")
+
+    @staticmethod
+    def key(regex, **options):
+        """Hash of the normalized regex and the pipeline options."""
+        text = normalize_regex(regex) + "\0" + _options_json(options)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _put_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, data))
+        return digest
+
+    def _get_blob(self, digest):
+        row = self._db.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, regex, nfa, dfa, minimized, **options):
+        """Stores the three stages of a regex. Returns its key."""
+        key = self.key(regex, **options)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO automata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, regex, _options_json(options),
+                 self._put_blob(dump_fa(nfa)), self._put_blob(dump_fa(dfa)),
+                 self._put_blob(dump_dfa(minimized)), time.time()))
+        return key
+
+    def compile(self, regex, if_remove_duplicate_transitions=False):
+        """
+        Returns the minimized DFA of a regex, building and storing all its
+        stages first if the store does not have them yet.
+        """
+        options = {'if_remove_duplicate_transitions': if_remove_duplicate_transitions}
+        minimized = self.load(regex, 'minimized', **options)
+        if minimized is not None:
+            return minimized
+
+        # The NFA is built once and the later stages derived from it; every
+        # stage is also cached, as build_fa would
+        nfa = build_fa(regex, if_remove_duplicate_transitions=if_remove_duplicate_transitions)
+        dfa = convert_to_dfa(nfa)
+        stages = {'nfa': nfa, 'dfa': dfa, 'minimized': minimize_dfa(dfa)}
+        for stage, (if_convert_to_dfa, if_minimize_dfa) in STAGES.items():
+            compiled_cache.put(fa_cache_key(regex, if_remove_duplicate_transitions, if_convert_to_dfa,
+                                            if_minimize_dfa), stages[stage])
+        self.put(regex, stages['nfa'], stages['dfa'], stages['minimized'], **options)
+        return stages['minimized']
+
+    def load(self, regex, stage='minimized', **options):
+        """Returns one stage of a stored regex as an FA, or None if it is not stored."""
+        _check_stages((stage,))
+        row = self._db.execute(f"SELECT {stage} FROM automata WHERE key = ?",
+                               (self.key(regex, **options),)).fetchone()
+        if row is None:
+            return None
+        data = self._get_blob(row[0])
+        if stage == 'minimized':
+            return loads_dfa(data).to_compiled().to_fa()
+        return load_fa(data)
+
+    def load_compiled(self, regex, **options):
+        """Returns the minimized DFA of a stored regex as a MappedDFA, or None."""
+        row = self._db.execute("SELECT minimized FROM automata WHERE key = ?",
+                               (self.key(regex, **options),)).fetchone()
+        return None if row is None else loads_dfa(self._get_blob(row[0]))
+
+    def preload(self, cache=compiled_cache, stages=('minimized',)):
+        """
+        Loads stored automata into the in-process cache used by build_fa, so
+        later build_fa calls for these regexes are cache hits.
+        Returns the number of automata loaded.
+
+        Raises:
+            ValueError: if stages names a stage not in STAGES
+        """
+        _check_stages(stages)
+        count = 0
+        rows = self._db.execute(f"SELECT regex, options, {', '.join(stages)} FROM automata").fetchall()
+        for row in rows:
+            regex, options = row[0], json.loads(row[1])
+            for stage, digest in zip(stages, row[2:]):
+                data = self._get_blob(digest)
+                fa = loads_dfa(data).to_compiled().to_fa() if stage == 'minimized' else load_fa(data)
+                if_convert_to_dfa, if_minimize_dfa = STAGES[stage]
+                cache.put(fa_cache_key(regex, options['if_remove_duplicate_transitions'],
+                                       if_convert_to_dfa, if_minimize_dfa), fa)
+                count += 1
+        return count
+
+    def delete(self, regex, **options):
+        """Removes a regex and garbage-collects blobs no longer referenced."""
+        with self._db:
+            self._db.execute("DELETE FROM automata WHERE key = ?", (self.key(regex, **options),))
+            self._db.execute("""
+                DELETE FROM blobs WHERE hash NOT IN (
+                    SELECT nfa FROM automata UNION SELECT dfa FROM automata
+                    UNION SELECT minimized FROM automata)
+            """)
+
+    def stats(self):
+        """Returns the number of stored regexes and of distinct blobs."""
+        return {
+            'automata': self._db.execute("SELECT COUNT(*) FROM automata").fetchone()[0],
+            'blobs': self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+            'distinct_minimized': self._db.execute(
+                "SELECT COUNT(DISTINCT minimized) FROM automata").fetchone()[0],
+        }
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"AutomatonStore({self.path!r})"
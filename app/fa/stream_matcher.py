@@ -0,0 +1,152 @@
+import codecs
+from app.fa.byte_input import ByteSymbols
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.lazy_dfa import LazyDFA
+
+# Event kinds reported by StreamMatcher.feed
+ACCEPT = "accept"  # the input consumed so far is accepted
+REJECT = "reject"  # the input consumed so far stopped being accepted
+DEAD = "dead"      # no continuation can be accepted anymore
+
+
+class StreamMatcher:
+    """
+    Resumable matcher for input that arrives in chunks.
+
+    Works with any matcher exposing `start`, `step(state, symbol)` and
+    `is_accepting(state)` with 0 as the dead state: a CompiledDFA (state is an
+    int), a LazyDFA (state is a cache id) or an NFASimulator (state is the
+    active-set bitset). Only the current state and the offset are carried from
+    one chunk to the next, so memory does not grow with the input.
+
+    Events are only reported when acceptance changes. With an unanchored
+    LazyDFA, an ACCEPT event marks the first offset of a run of offsets where
+    a match ends, and the next REJECT the end of that run: regex a on aaba
+    gives [(ACCEPT, 1), (REJECT, 3), (ACCEPT, 4)], the match ending at offset
+    2 being covered by the first event.
+
+    A LazyDFA renumbers its states when its cache is cleared, so every stream
+    steps its own: a LazyDFA given directly, or the one of a non-deterministic
+    FA (also used by FA.run), is replaced by a copy over the same
+    NFASimulator (see LazyDFA.copy). CompiledDFA and NFASimulator states are
+    stable and shared as they are.
+    """
+
+    def __init__(self, matcher, encoding=None):
+        """
+        Args:
+            matcher: a CompiledDFA, LazyDFA, NFASimulator or an FA (its
+                     FA.matcher() is used)
+            encoding: if set, feed() takes bytes and decodes them incrementally,
+                      so multi-byte characters may be split across chunks.
+                      Without an encoding, bytes-like chunks are matched as
+                      byte-mode symbols (see app.fa.byte_input) and offsets
+                      count bytes.
+        """
+        if hasattr(matcher, "matcher"):
+            matcher = matcher.matcher()
+        if isinstance(matcher, LazyDFA):
+            matcher = matcher.copy()
+        self.matcher = matcher
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        """Forgets all input fed so far."""
+        self.state = self.matcher.start
+        self.offset = 0
+        self._accepting = self.matcher.is_accepting(self.state)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)() if self.encoding else None
+
+    def is_accepting(self):
+        """Returns True if all the input fed so far is accepted."""
+        return self._accepting
+
+    def is_dead(self):
+        """Returns True if no further input can lead to acceptance."""
+        return self.state == 0
+
+    def feed(self, chunk):
+        """
+        Consumes a chunk of input.
+
+        Returns:
+            list of (kind, offset) events, where offset counts symbols from the
+            start of the stream and kind is ACCEPT, REJECT or DEAD
+        """
+        if self._decoder is not None:
+            chunk = self._decoder.decode(chunk)
+        elif not isinstance(chunk, str):
+            with ByteSymbols(chunk) as symbols:
+                return self._consume(symbols)
+        return self._consume(chunk)
+
+    def flush(self):
+        """
+        Consumes the characters still buffered by the decoder (if any), at the
+        end of the stream, and returns their events (see feed).
+        Raises UnicodeDecodeError if the stream ends inside a multi-byte character.
+        """
+        if self._decoder is None:
+            return []
+        return self._consume(self._decoder.decode(b"", final=True))
+
+    def close(self):
+        """
+        Flushes the decoder (see flush) and returns the final verdict.
+        Raises UnicodeDecodeError if the stream ends inside a multi-byte character.
+        """
+        self.flush()
+        return self._accepting
+
+    def _consume(self, text):
+        if self.state == 0:
+            self.offset += len(text)
+            return []
+        if isinstance(self.matcher, CompiledDFA):
+            return self._consume_table(text)
+
+        matcher = self.matcher
+        events = []
+        state = self.state
+        accepting = self._accepting
+
+        for index, char in enumerate(text):
+            state = matcher.step(state, char)
+            if matcher.is_accepting(state) != accepting:
+                accepting = not accepting
+                events.append((ACCEPT if accepting else REJECT, self.offset + index + 1))
+            if state == 0:
+                events.append((DEAD, self.offset + index + 1))
+                break
+
+        self.state = state
+        self._accepting = accepting
+        self.offset += len(text)
+        return events
+
+    def _consume_table(self, text):
+        """_consume() specialised for CompiledDFA: indexes the table directly."""
+        dfa = self.matcher
+        flat = dfa._flat
+        accept = dfa._accept
+        width = dfa.num_classes
+        class_of = dfa.class_map.get
+
+        events = []
+        state = self.state
+        accepting = self._accepting
+
+        for index, char in enumerate(text):
+            state = flat[state * width + class_of(char, 0)]
+            if accept[state] != accepting:
+                accepting = not accepting
+                events.append((ACCEPT if accepting else REJECT, self.offset + index + 1))
+            if not state:
+                events.append((DEAD, self.offset + index + 1))
+                break
+
+        self.state = state
+        self._accepting = accepting
+        self.offset += len(text)
+        return events
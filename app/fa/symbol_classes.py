@@ -0,0 +1,57 @@
+class SymbolClasses:
+    """
+    Partition of an alphabet into equivalence classes.
+
+    Two symbols share a class when no transition of the automaton tells them
+    apart, i.e. they label exactly the same (source, destination) edges. Every
+    matcher and construction can then work on one representative per class.
+    Class 0 is reserved for symbols outside the alphabet; the classes of the
+    alphabet are numbered from 1, in order of their smallest symbol.
+    """
+
+    def __init__(self, classes):
+        """
+        Args:
+            classes: list of lists of symbols, one list per class (without class 0)
+        """
+        self.classes = [[]] + [sorted(members) for members in sorted(classes, key=min)]
+        self.class_map = {}
+        for symbol_class, members in enumerate(self.classes):
+            for symbol in members:
+                self.class_map[symbol] = symbol_class
+
+    @property
+    def num_classes(self):
+        """Number of classes, class 0 included."""
+        return len(self.classes)
+
+    def class_of(self, symbol):
+        return self.class_map.get(symbol, 0)
+
+    def representatives(self):
+        """Returns (class, smallest symbol of the class) for every class of the alphabet."""
+        return [(symbol_class, members[0]) for symbol_class, members in enumerate(self.classes) if members]
+
+    def __len__(self):
+        return len(self.classes) - 1
+
+    def __repr__(self):
+        return f"SymbolClasses({len(self.class_map)} symbols, {len(self)} classes)"
+
+
+def compute_symbol_classes(fa):
+    """
+    Computes the SymbolClasses of an FA (epsilon transitions are ignored).
+    Each symbol gets the set of edges it labels as signature, and symbols with
+    equal signatures are merged, in O(edges).
+    """
+    edges_of = {}
+    for state_index in range(len(fa.states)):
+        for dest_index, symbol in fa.transitions.get_edges(state_index):
+            if symbol != "":
+                edges_of.setdefault(symbol, set()).add((state_index, dest_index))
+
+    groups = {}
+    for symbol, edges in edges_of.items():
+        groups.setdefault(frozenset(edges), []).append(symbol)
+    return SymbolClasses(list(groups.values()))
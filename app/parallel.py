@@ -0,0 +1,186 @@
+"""
+Parallel matching of large files.
+
+The file is split into chunks which are matched by a pool of worker
+processes. The DFA is shipped to every worker once, in the binary format of
+app.fa.serialization, when the pool starts; tasks only carry byte ranges,
+and workers read the file themselves through mmap, so no file data goes
+through the pool.
+
+  - match_file matches every line of the file (chunks end on line boundaries),
+  - match_record matches the whole file as one input: every chunk is
+    simulated from all DFA states at once (CompiledDFA.transition_map), and
+    the resulting state -> state mappings are composed in file order.
+"""
+import mmap
+import os
+from multiprocessing import Pool
+from app.fa.serialization import dump_dfa, loads_dfa
+from app.pattern import Pattern, compile_pattern
+
+MODES = ('search', 'fullmatch')
+
+# Chunks are never smaller than this, so small files do not pay for a pool
+MIN_CHUNK_SIZE = 1 << 20
+
+# CompiledDFA of the worker process, set by _init_worker
+_worker_dfa = None
+
+
+def _init_worker(dfa_data):
+    global _worker_dfa
+    _worker_dfa = loads_dfa(dfa_data).to_compiled()
+
+
+def _run_task(task):
+    """Runs function(dfa, *args) in a worker, with the DFA of the worker."""
+    function, args = task
+    return function(_worker_dfa, *args)
+
+
+def _chunk_mapping(dfa, path, start, end):
+    """Returns the state -> state mapping of the byte range [start, end) of a file."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return dfa.transition_map(data, start, end)
+
+
+def _match_lines(dfa, path, start, end, count):
+    """
+    Matches every line of the byte range [start, end) of a file, start being
+    the beginning of a line. Lines are matched in place in the mapped file.
+
+    Returns:
+        (number of lines, matches), matches being the number of matching lines
+        if count is True, else a list of (line index in the chunk, line)
+    """
+    matches = 0 if count else []
+    if start >= end:
+        return 0, matches
+
+    lines = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        run = dfa.run_bytes
+        pos = start
+        while pos < end:
+            line_end = data.find(b"\n", pos, end)
+            next_pos = line_end + 1
+            if line_end < 0:
+                line_end = next_pos = end
+            if run(data, pos, line_end):
+                if count:
+                    matches += 1
+                else:
+                    matches.append((lines, data[pos:line_end]))
+            lines += 1
+            pos = next_pos
+    return lines, matches
+
+
+def split_lines(path, chunk_size):
+    """
+    Returns the (start, end) byte ranges of chunks of about chunk_size bytes
+    covering the file, every chunk starting at the beginning of a line.
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()  # Move on to the start of the next line
+            end = min(f.tell(), size)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def _run_pool(function, tasks, dfa, workers):
+    """Runs the tasks in order, in a pool sharing the DFA if there is more than one."""
+    if workers == 1 or len(tasks) <= 1:
+        return [function(dfa, *task) for task in tasks]
+    with Pool(min(workers, len(tasks)), initializer=_init_worker,
+              initargs=(dump_dfa(dfa),)) as pool:
+        return pool.map(_run_task, [(function, task) for task in tasks], chunksize=1)
+
+
+def _pattern_dfa(pattern, mode):
+    if mode not in MODES:
+        raise ValueError(f"unknown mode '{mode}', expected one of {', '.join(MODES)}")
+    regex = pattern.regex if isinstance(pattern, Pattern) else pattern
+    pattern = compile_pattern(regex, byte_mode=True)
+    return pattern.search_dfa if mode == 'search' else pattern.dfa
+
+
+def match_file(path, pattern, workers=None, mode='search', count=False, chunk_size=None):
+    """
+    Matches every line of a file against a pattern, like grep, using a pool
+    of worker processes.
+
+    Args:
+        path: file to scan; lines are separated by b"\\n"
+        pattern: a regex or a Pattern, matched in byte mode (UTF-8)
+        workers: number of worker processes (default: os.cpu_count())
+        mode: 'search' selects lines containing a match, 'fullmatch' lines
+              matching entirely
+        count: if True, only count the matching lines
+        chunk_size: approximate number of bytes per task (default: the file
+                    split in 8 chunks per worker, at least MIN_CHUNK_SIZE)
+
+    Returns:
+        the number of matching lines if count is True, otherwise the list of
+        (line number, line) of the matching lines in file order, line numbers
+        starting at 1 and lines as bytes without the line separator
+    """
+    dfa = _pattern_dfa(pattern, mode)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(os.path.getsize(path) // (workers * 8), MIN_CHUNK_SIZE)
+    chunks = split_lines(path, chunk_size)
+
+    tasks = [(path, start, end, count) for start, end in chunks]
+    results = _run_pool(_match_lines, tasks, dfa, workers)
+
+    if count:
+        return sum(matches for _, matches in results)
+
+    # Chunk-local line indices become file line numbers
+    found = []
+    first_line = 1
+    for lines, matches in results:
+        found.extend((first_line + index, line) for index, line in matches)
+        first_line += lines
+    return found
+
+
+def match_record(path, pattern, workers=None, mode='fullmatch', chunk_size=None):
+    """
+    Matches the whole content of a file as a single input (e.g. one huge
+    record without line breaks), using a pool of worker processes.
+
+    The file is split into equal chunks regardless of its content. Each
+    worker computes the state -> state mapping of its chunk, and composing
+    the mappings in order from the start state gives the exact final state.
+
+    Args:
+        path: file to match
+        pattern: a regex or a Pattern, matched in byte mode (UTF-8)
+        workers: number of worker processes (default: os.cpu_count())
+        mode: 'fullmatch' tests whether the whole file matches, 'search'
+              whether it contains a match
+        chunk_size: number of bytes per task (default: one chunk per worker,
+                    at least MIN_CHUNK_SIZE)
+
+    Returns:
+        True if the file matches
+    """
+    dfa = _pattern_dfa(pattern, mode)
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if chunk_size is None:
+        chunk_size = max(-(-size // workers), MIN_CHUNK_SIZE)
+
+    tasks = [(path, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    state = dfa.start
+    for mapping in _run_pool(_chunk_mapping, tasks, dfa, workers):
+        state = mapping[state]
+    return dfa.is_accepting(int(state))
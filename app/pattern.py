@@ -0,0 +1,446 @@
+from app.regex.lexer import Lexer
+from app.regex.parser import Parser
+from app.regex.literals import Literals, extract_literals
+from contextlib import nullcontext
+from app.fa.byte_input import ByteSymbols, byte_view
+from app.fa.compiled_dfa import CompiledDFA
+from app.fa.fa_builder import FABuilder
+from app.fa.lazy_dfa import PerThreadLazyDFA
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.fa.dfa_minimization import minimize_dfa
+from app.cache import compiled_cache
+
+
+def parse_regex(regex):
+    """Lexes and parses a regex into an AST."""
+    return Parser(Lexer(regex).tokenize()).parse()
+
+
+def build_nfa(ast):
+    """Builds a Thompson epsilon-NFA from an AST."""
+    postorder = []
+    ast.traverse_postorder(postorder.append)
+    return FABuilder().build_from_postorder(postorder)
+
+
+def build_search_dfa(sim):
+    """
+    Builds the CompiledDFA telling whether the input *contains* a match of an
+    NFA: the full subset construction of its unanchored form (start states
+    re-entered before every symbol), with accepting states made absorbing.
+    Unlike the usual CompiledDFA, column 0 (symbols outside the alphabet)
+    goes back to the start state instead of the dead state.
+
+    Args:
+        sim: the NFASimulator of the pattern
+    """
+    width = sim.symbol_classes.num_classes
+    ids = {sim.start: 1}
+    subsets = [sim.start]
+    table = [[CompiledDFA.DEAD] * width]
+    accepting = [False]
+
+    for state, subset in enumerate(subsets, 1):
+        if subset & sim.final_mask:
+            table.append([state] * width)
+            accepting.append(True)
+            continue
+        row = []
+        for symbol_class in range(width):
+            next_subset = sim.step_class(subset, symbol_class) | sim.start
+            if next_subset not in ids:
+                ids[next_subset] = len(subsets) + 1
+                subsets.append(next_subset)
+            row.append(ids[next_subset])
+        table.append(row)
+        accepting.append(False)
+
+    return CompiledDFA(table, accepting, sim.class_map, 1)
+
+
+class Match:
+    """
+    A match found by Pattern.match / search / finditer.
+    For byte-mode patterns, string is the bytes-like input and group()
+    returns a slice of it (a byte view of it for memoryviews).
+    """
+
+    def __init__(self, string, start, end):
+        self.string = string
+        self._start = start
+        self._end = end
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+    def span(self):
+        return (self._start, self._end)
+
+    def group(self):
+        if isinstance(self.string, memoryview):
+            # Positions are byte offsets, whatever the item size of the view
+            return byte_view(self.string, self._start, self._end)
+        return self.string[self._start:self._end]
+
+    def __repr__(self):
+        return f"Match(span={self.span()}, match={self.group()!r})"
+
+
+# Anchored scans of at most this many positions are not recorded in the
+# _ScanMemo: they are cheaper to redo than to remember, and still add up to
+# O(len(input)) for a whole finditer call
+MEMO_MIN_SCAN = 8
+
+
+class _ScanMemo:
+    """
+    What the anchored scans of one finditer call already learned:
+    best[(index, state)] is the end of the longest match continuing from the
+    DFA state `state` at input position `index`, -1 if there is none. Only
+    positions before `horizon`, the furthest a recorded scan got, can be in
+    it. The memo is tied to the LazyDFA state ids of one cache generation
+    (`clears`) and is emptied when the cache is cleared.
+    """
+
+    def __init__(self, clears):
+        self.reset(clears)
+
+    def reset(self, clears):
+        self.clears = clears
+        self.horizon = 0
+        self.best = {}
+
+
+class Pattern:
+    """
+    A compiled regex with whole-string and unanchored matching.
+
+    Matches follow leftmost-longest semantics. Searching uses three lazy DFAs
+    built from the same AST:
+      - a forward unanchored DFA (implicit leading `.*`) that finds the end of
+        the earliest match, so inputs without any match are rejected in one pass,
+      - a reverse unanchored DFA, run once from the end of the input, that marks
+        every position where a match starts,
+      - a forward anchored DFA that extends each leftmost start to its longest end.
+    The anchored scans of one finditer call share a memo (see _ScanMemo): a
+    scan stops as soon as it reaches a (position, DFA state) pair an earlier
+    long scan went through, so finditer is O(len(input) x DFA states) even
+    when scans overlap, e.g. a+(a*b) on aaa...
+
+    Byte-mode patterns (byte_mode=True) are built over the UTF-8 bytes of the
+    regex (see ASTNode.to_bytes) and match bytes, bytearray, memoryview and mmap
+    inputs in place; positions are then byte offsets.
+    """
+
+    def __init__(self, regex, byte_mode=False):
+        self.regex = regex
+        self.byte_mode = byte_mode
+        self.ast = parse_regex(regex)
+        if byte_mode:
+            self.ast = self.ast.to_bytes()
+        self.nfa = build_nfa(self.ast)
+        self.literals = extract_literals(self.ast)
+        if byte_mode:
+            # Byte-mode symbols are latin-1 characters, see ASTNode.to_bytes
+            self.literals = Literals(*(None if literal is None else literal.encode("latin-1")
+                                       for literal in (self.literals.exact, self.literals.prefix,
+                                                       self.literals.suffix, self.literals.required)))
+        self._dfa = None
+        self._search_dfa = None
+
+        # Patterns are shared through compiled_cache: the simulators are
+        # immutable, the lazy DFAs filled while matching are per thread
+        self._sim = NFASimulator(self.nfa)
+        self._anchored = PerThreadLazyDFA(self._sim)
+        self._forward = PerThreadLazyDFA(self._sim, unanchored=True)
+        self._reverse = PerThreadLazyDFA(NFASimulator(build_nfa(self.ast.reversed())), unanchored=True)
+
+    @property
+    def dfa(self):
+        """The minimized DFA of the pattern, compiled to a table on first use."""
+        if self._dfa is None:
+            self._dfa = minimize_dfa(convert_to_dfa(self.nfa)).compile()
+        return self._dfa
+
+    @property
+    def search_dfa(self):
+        """
+        DFA accepting the strings that contain a match (see build_search_dfa),
+        built on first use. Used for grep-style line matching.
+        """
+        if self._search_dfa is None:
+            self._search_dfa = build_search_dfa(self._sim)
+        return self._search_dfa
+
+    def _check_type(self, string):
+        if self.byte_mode and isinstance(string, str):
+            raise TypeError("cannot use a byte-mode pattern on a str")
+        if not self.byte_mode and not isinstance(string, str):
+            raise TypeError("cannot use a str pattern on a bytes-like object")
+
+    def _symbols(self, string):
+        """
+        Returns a context manager giving the sequence of symbols the automata
+        read: the str itself, or a ByteSymbols view of a bytes-like input.
+        """
+        self._check_type(string)
+        return ByteSymbols(string) if self.byte_mode else nullcontext(string)
+
+    def _length(self, string):
+        """Length of the input in symbols, i.e. in bytes for byte-mode patterns."""
+        if not self.byte_mode:
+            return len(string)
+        with memoryview(string) as view:
+            return view.nbytes
+
+    def _has_prefix(self, string, pos, endpos):
+        # mmap and memoryview have no startswith / find: no prefiltering
+        if not hasattr(string, "startswith"):
+            return True
+        return string.startswith(self.literals.prefix, pos, endpos)
+
+    def _has_required(self, string, pos, endpos):
+        if not hasattr(string, "find"):
+            return True
+        return string.find(self.literals.required, pos, endpos) >= 0
+
+    def fullmatch(self, string):
+        """Returns True if the whole string matches."""
+        self._check_type(string)
+        if self.byte_mode:
+            return self.dfa.run_bytes(string)
+        literals = self.literals
+        if literals.exact is not None:
+            return string == literals.exact
+        if not (string.startswith(literals.prefix) and string.endswith(literals.suffix)
+                and literals.required in string):
+            return False
+        return self._anchored.dfa.run(string)
+
+    def match_many(self, strings):
+        """
+        Returns a numpy bool mask telling which strings fully match,
+        using the vectorized CompiledDFA.match_many on the minimized DFA.
+        Byte-mode patterns take bytes-like strings, read as UTF-8 bytes.
+        """
+        strings = strings if isinstance(strings, (list, tuple)) else list(strings)
+        for string in strings:
+            self._check_type(string)
+        return self.dfa.match_many(strings)
+
+    def match(self, string, pos=0, endpos=None):
+        """Returns the longest match starting exactly at `pos`, or None."""
+        self._check_type(string)
+        length = self._length(string)
+        endpos = length if endpos is None else min(endpos, length)
+        if not self._has_prefix(string, pos, endpos):
+            return None
+        with self._symbols(string) as symbols:
+            end = self._longest_end(symbols, pos, endpos)
+        if end < 0:
+            return None
+        return Match(string, pos, end)
+
+    def search(self, string, pos=0, endpos=None):
+        """Returns the leftmost-longest match in string[pos:endpos], or None."""
+        return next(self.finditer(string, pos, endpos), None)
+
+    def finditer(self, string, pos=0, endpos=None):
+        """
+        Yields non-overlapping leftmost-longest matches in string[pos:endpos].
+        An empty match is never reported twice at the same position.
+        """
+        self._check_type(string)
+        length = self._length(string)
+        endpos = length if endpos is None else min(endpos, length)
+        if pos > endpos or not self._has_required(string, pos, endpos):
+            return
+
+        with self._symbols(string) as symbols:
+            if self._earliest_end(symbols, pos, endpos) < 0:
+                return
+
+            starts = self._match_starts(symbols, pos, endpos)
+            memo = _ScanMemo(self._anchored.dfa.cache_clears)
+            current = pos
+            while current <= endpos:
+                offset = starts.find(1, current - pos)
+                if offset < 0:
+                    return
+                start = pos + offset
+                end = self._longest_end_memo(symbols, start, endpos, memo)
+                yield Match(string, start, end)
+                current = end if end > start else end + 1
+
+    def findall(self, string, pos=0, endpos=None):
+        """Returns the text of every match found by finditer."""
+        return [match.group() for match in self.finditer(string, pos, endpos)]
+
+    def _earliest_end(self, string, pos, endpos):
+        """
+        Scans forward with the unanchored DFA and returns the first position at
+        which some match ends, or -1 if string[pos:endpos] contains no match.
+        """
+        dfa = self._forward.dfa
+        state = dfa.start
+        if dfa.is_accepting(state):
+            return pos
+
+        for index in range(pos, endpos):
+            state = dfa.step(state, string[index])
+            if dfa.is_accepting(state):
+                return index + 1
+        return -1
+
+    def _match_starts(self, string, pos, endpos):
+        """
+        Scans string[pos:endpos] backwards with the reverse unanchored DFA.
+        Returns a bytearray where byte i is 1 if a match (ending at or before
+        endpos) starts at pos + i.
+        """
+        dfa = self._reverse.dfa
+        starts = bytearray(endpos - pos + 1)
+        state = dfa.start
+        if dfa.is_accepting(state):
+            starts[endpos - pos] = 1
+
+        for index in range(endpos - 1, pos - 1, -1):
+            state = dfa.step(state, string[index])
+            if dfa.is_accepting(state):
+                starts[index - pos] = 1
+        return starts
+
+    def _longest_end(self, string, start, endpos):
+        """
+        Runs the anchored DFA from `start` until it dies and returns the end of
+        the longest match, or -1 if no match starts there.
+        """
+        dfa = self._anchored.dfa
+        state = dfa.start
+        end = start if dfa.is_accepting(state) else -1
+
+        for index in range(start, endpos):
+            state = dfa.step(state, string[index])
+            if state == dfa.DEAD:
+                break
+            if dfa.is_accepting(state):
+                end = index + 1
+        return end
+
+    def _longest_end_memo(self, string, start, endpos, memo):
+        """
+        _longest_end for the scans of finditer, sharing `memo` (see _ScanMemo).
+        The scan stops at the first (position, state) pair already in the memo
+        and takes the rest of the answer from there; the pairs it went through
+        are then recorded (for scans longer than MEMO_MIN_SCAN), from the last
+        one backwards.
+        """
+        dfa = self._anchored.dfa
+        if memo.clears != dfa.cache_clears:
+            memo.reset(dfa.cache_clears)
+        known = memo.best
+        horizon = memo.horizon
+        clears = memo.clears
+
+        # path[i] is the state at position start + i
+        path = []
+        state = dfa.start
+        index = start
+        end = -1
+        tail = -1
+        while True:
+            if index < horizon and dfa.cache_clears == clears:
+                remembered = known.get((index, state))
+                if remembered is not None:
+                    tail = remembered
+                    break
+            path.append(state)
+            if dfa.is_accepting(state):
+                end = index
+            if index == endpos:
+                break
+            state = dfa.step(state, string[index])
+            index += 1
+            if state == dfa.DEAD:
+                break
+
+        if dfa.cache_clears != clears:
+            # State ids changed during the scan: nothing recorded is usable
+            memo.reset(dfa.cache_clears)
+        elif len(path) > MEMO_MIN_SCAN:
+            best = tail
+            for offset in range(len(path) - 1, -1, -1):
+                state = path[offset]
+                if best < 0 and dfa.is_accepting(state):
+                    best = start + offset
+                known[start + offset, state] = best
+            memo.horizon = max(horizon, start + len(path))
+        return tail if tail >= 0 else end
+
+    def __repr__(self):
+        if self.byte_mode:
+            return f"Pattern({self.regex!r}, byte_mode=True)"
+        return f"Pattern({self.regex!r})"
+
+
+def compile_pattern(regex, use_cache=True, byte_mode=False):
+    """
+    Compiles a regex into a Pattern (a byte-mode one if byte_mode is True).
+    Patterns are kept in the process-wide compiled_cache (see app.cache), so
+    compiling the same regex again is a dictionary lookup.
+    """
+    if not use_cache:
+        return Pattern(regex, byte_mode)
+
+    cache_key = ('pattern', regex, byte_mode)
+    pattern = compiled_cache.get(cache_key)
+    if pattern is None:
+        pattern = Pattern(regex, byte_mode)
+        compiled_cache.put(cache_key, pattern)
+    return pattern
+
+
+class PatternSet:
+    """
+    Many regexes matched together in one pass.
+
+    All patterns are unioned into one NFA whose accepting states are tagged with
+    the index of their pattern; the tags survive determinization and
+    minimization, so a single run over the input reports every pattern that
+    matches it.
+
+    If every pattern has a required literal, inputs containing none of them
+    are rejected with str `in` checks before the automaton runs.
+    """
+
+    def __init__(self, regexes):
+        self.regexes = list(regexes)
+        postorder_lists = []
+        required = set()
+        for regex in self.regexes:
+            ast = parse_regex(regex)
+            required.add(extract_literals(ast).required)
+            postorder = []
+            ast.traverse_postorder(postorder.append)
+            postorder_lists.append(postorder)
+        # Longest literals first: they are the least likely to occur
+        self._prefilter = None if "" in required else sorted(required, key=len, reverse=True)
+
+        self.nfa = FABuilder().build_union(postorder_lists)
+        self.dfa = minimize_dfa(convert_to_dfa(self.nfa)).compile()
+
+    def match(self, string):
+        """Returns the sorted ids (indices into regexes) of every pattern matching the whole string."""
+        if self._prefilter is not None and not any(literal in string for literal in self._prefilter):
+            return []
+        return list(self.dfa.match_tags(string))
+
+    def __len__(self):
+        return len(self.regexes)
+
+    def __repr__(self):
+        return f"PatternSet({len(self.regexes)} patterns)"
@@ -1,5 +1,5 @@
 from .tokens import (
-    Token, TokenType, ignore_chars, is_symbol
+    Token, TokenType, ignore_chars, is_symbol, token_types_by_char
 )
 
 
@@ -8,39 +8,29 @@ class Lexer:
         self.regex = regex
         self.pos = 0
 
-    def _current_char(self):
-        if self.pos >= len(self.regex):
-            return None
-        return self.regex[self.pos]
-
-    def _advance(self):
-        self.pos += 1
-
     def _preprocess_regex(self):
         self.regex = self.regex.replace(' ', '')
         self.regex = self.regex.replace('\t', '')
 
     def tokenize(self):
+        """
+        Splits the regex into tokens in a single pass, with one table lookup
+        per character.
+        """
         self._preprocess_regex()
         self.tokens = []
-        self.pos = 0
-
-        while self.pos < len(self.regex):
-            char = self._current_char()
-            
-            # Check if char matches any token type
-            token_found = False
-            for token_type in TokenType:
-                if token_type.value == char:
-                    self.tokens.append(Token(token_type))
-                    token_found = True
-                    break
-            
-            # If no token type matched, it's either a symbol or ignored
-            if not token_found:
-                if char not in ignore_chars:
-                    self.tokens.append(Token(TokenType.SYMBOL, char))
-            
-            self._advance()
-
+        append = self.tokens.append
+        token_type_of = token_types_by_char.get
+        ignored = frozenset(ignore_chars)
+        symbol = TokenType.SYMBOL
+
+        for char in self.regex:
+            token_type = token_type_of(char)
+            if token_type is not None:
+                append(Token(token_type))
+            # Otherwise it's either a symbol or ignored
+            elif char not in ignored:
+                append(Token(symbol, char))
+
+        self.pos = len(self.regex)
         return self.tokens
@@ -0,0 +1,124 @@
+class Literals:
+    """
+    Literal facts that hold for every string matched by a regex.
+
+    Attributes:
+        exact: the only string the regex matches, or None
+        prefix: every match starts with this string
+        suffix: every match ends with this string
+        required: every match contains this string (the longest one found)
+    """
+
+    def __init__(self, exact, prefix, suffix, required):
+        self.exact = exact
+        self.prefix = prefix
+        self.suffix = suffix
+        self.required = required
+
+    def __repr__(self):
+        return (f"Literals(exact={self.exact!r}, prefix={self.prefix!r}, "
+                f"suffix={self.suffix!r}, required={self.required!r})")
+
+
+def _longest(*strings):
+    return max(strings, key=len)
+
+
+def _common_prefix(a, b):
+    length = 0
+    while length < min(len(a), len(b)) and a[length] == b[length]:
+        length += 1
+    return a[:length]
+
+
+def _common_suffix(a, b):
+    length = 0
+    while length < min(len(a), len(b)) and a[-1 - length] == b[-1 - length]:
+        length += 1
+    return a[len(a) - length:]
+
+
+def _concat_literals(items):
+    """Literals of the concatenation of the items, in order."""
+    exacts = [item.exact for item in items]
+    exact = "".join(exacts) if None not in exacts else None
+
+    # Exact items at the start (end) extend the prefix (suffix) of the first
+    # (last) inexact one
+    pieces = []
+    for item in items:
+        if item.exact is None:
+            pieces.append(item.prefix)
+            break
+        pieces.append(item.exact)
+    prefix = "".join(pieces)
+    pieces = []
+    for item in reversed(items):
+        if item.exact is None:
+            pieces.append(item.suffix)
+            break
+        pieces.append(item.exact)
+    suffix = "".join(reversed(pieces))
+
+    # Every item is required, and so is the text across each boundary: the
+    # suffix of an item, the exact items after it and the prefix of the next
+    # inexact one. Only lengths are tracked until the longest run is known.
+    required = _longest(*(item.required for item in items))
+    best = None
+    run_start, run_length = 0, len(items[0].suffix)
+    for index in range(1, len(items)):
+        item = items[index]
+        length = run_length + len(item.prefix)
+        if length > (len(required) if best is None else best[0]):
+            best = (length, run_start, index)
+        if item.exact is not None:
+            run_length += len(item.exact)
+        else:
+            run_start, run_length = index, len(item.suffix)
+    if best is not None:
+        _, run_start, end = best
+        required = "".join([items[run_start].suffix] + exacts[run_start + 1:end] + [items[end].prefix])
+
+    return Literals(exact, prefix, suffix, required)
+
+
+def _union_literals(left, right):
+    """Literals of the union of two alternatives."""
+    exact = left.exact if left.exact == right.exact else None
+    prefix = _common_prefix(left.prefix, right.prefix)
+    suffix = _common_suffix(left.suffix, right.suffix)
+    if left.required == right.required:
+        required = left.required
+    else:
+        required = _longest(prefix, suffix)
+    return Literals(exact, prefix, suffix, required)
+
+
+def extract_literals(ast):
+    """
+    Computes the required literals of an AST (see Literals) bottom-up,
+    using the same postorder traversal and stack as FABuilder.
+    """
+    stack = []
+
+    def visit(node):
+        if node.type == "SYMBOL":
+            stack.append(Literals(node.value, node.value, node.value, node.value))
+        elif node.type in ("CONCAT", "UNION"):
+            # N-ary nodes: their operands are the last entries of the stack
+            items = stack[len(stack) - len(node.children):]
+            del stack[len(stack) - len(node.children):]
+            if node.type == "CONCAT":
+                stack.append(_concat_literals(items))
+            else:
+                literals = items[0]
+                for item in items[1:]:
+                    literals = _union_literals(literals, item)
+                stack.append(literals)
+        elif node.type == "STAR":
+            stack.pop()
+            # Matches the empty string, so nothing is required
+            stack.append(Literals(None, "", "", ""))
+
+    ast.traverse_postorder(visit)
+    return stack.pop()
@@ -3,87 +3,113 @@ from app.ds.ast import ASTNode
 
 
 class Parser:
+    """
+    Regex parser producing ASTNode trees.
+
+    Grammar, from loosest to tightest binding:
+        expression := term (term | '+' term)*   (sequence of terms, CONCAT)
+        term       := factor '*'*
+        factor     := SYMBOL | '(' expression ')'
+    '+' joins the two terms around it, so union binds tighter than
+    concatenation: ab+cd is a(b+c)d.
+
+    The parser is iterative: parenthesized groups push the state of the
+    enclosing expression on an explicit stack, so nesting depth is only
+    bounded by memory. Consecutive unions and concatenations are flattened
+    into single n-ary UNION and CONCAT nodes, which keeps the tree shallow.
+    """
+
     def __init__(self, tokens):
         self.tokens = tokens
         self.pos = 0
 
-    def _current_token(self):
-        if self.pos >= len(self.tokens):
-            return None
-        return self.tokens[self.pos]
-
-    def _advance(self):
-        self.pos += 1
-
     def parse(self):
         return self.parse_expression()
 
     def parse_expression(self):
+        """Parses an expression starting at the current token, see the class docstring."""
+        # The token list is read through locals (the position is written
+        # back on return), which keeps the per-token cost low
+        tokens = self.tokens
+        count = len(tokens)
+        pos = self.pos
+        SYMBOL, LPAREN, RPAREN = TokenType.SYMBOL, TokenType.LPAREN, TokenType.RPAREN
+        UNION, STAR = TokenType.UNION, TokenType.STAR
+
+        # Enclosing expressions of the open groups, as (terms, union_pending)
+        groups = []
         terms = []
-        
-        # Parse first term
-        terms.append(self.parse_term())
-        
-        # Keep parsing terms while we see SYMBOL, LPAREN, or UNION
-        while True:
-            token = self._current_token()
-            if token is None or token.type == TokenType.RPAREN:
-                break
-            
-            if token.type == TokenType.UNION:
-                self._advance()
-                terms.append(self.parse_term())
-                # Create UNION node immediately
-                last_two = terms[-2:]
-                terms = terms[:-2]
-                terms.append(ASTNode("UNION", None, last_two))
-            elif token.type in [TokenType.SYMBOL, TokenType.LPAREN]:
-                terms.append(self.parse_term())
-            else:
-                break
-        
-        # Build concatenation tree from right to left
-        while len(terms) > 1:
-            right = terms.pop()
-            left = terms.pop()
-            terms.append(ASTNode("CONCAT", None, [left, right]))
-        
-        return terms[0]
+        union_pending = False  # A '+' is waiting for its right operand
 
-    def parse_term(self):
-        # Parse a factor and handle any postfix operators
-        left = self.parse_factor()
+        try:
+            while True:
+                # Parse a factor, opening groups until a symbol is found
+                if pos >= count:
+                    raise SyntaxError("Unexpected end of input")
+                token = tokens[pos]
+                if token.type is LPAREN:
+                    pos += 1
+                    groups.append((terms, union_pending))
+                    terms, union_pending = [], False
+                    continue
+                if token.type is not SYMBOL:
+                    raise SyntaxError(f"Unexpected token: {token}")
+                pos += 1
+                node = ASTNode("SYMBOL", token.value)
 
-        while True:
-            token = self._current_token()
-            if token is None:
-                break
+                while True:
+                    # Postfix '*' operators of the factor
+                    while pos < count and tokens[pos].type is STAR:
+                        pos += 1
+                        node = ASTNode("STAR", None, [node])
 
-            if token.type == TokenType.STAR:
-                self._advance()
-                left = ASTNode("STAR", None, [left])
-            else:
-                break
+                    # Add the completed term to the current expression
+                    if union_pending:
+                        terms[-1] = self._union(terms[-1], node)
+                        union_pending = False
+                    else:
+                        terms.append(node)
 
-        return left
+                    # Keep parsing terms while we see SYMBOL, LPAREN, or UNION
+                    token_type = tokens[pos].type if pos < count else None
+                    if token_type is UNION:
+                        pos += 1
+                        union_pending = True
+                        break
+                    if token_type is SYMBOL or token_type is LPAREN:
+                        break
 
-    def parse_factor(self):
-        token = self._current_token()
-        
-        if token is None:
-            raise SyntaxError("Unexpected end of input")
+                    # End of the expression: it is either the whole regex or a group
+                    node = self._concat(terms)
+                    if not groups:
+                        return node
+                    if token_type is not RPAREN:
+                        raise SyntaxError("Expected closing parenthesis")
+                    pos += 1
+                    terms, union_pending = groups.pop()
+        finally:
+            self.pos = pos
 
-        if token.type == TokenType.SYMBOL:
-            self._advance()
-            return ASTNode("SYMBOL", token.value)
-        elif token.type == TokenType.LPAREN:
-            self._advance()
-            expr = self.parse_expression()
-            if self._current_token() is None or self._current_token().type != TokenType.RPAREN:
-                raise SyntaxError("Expected closing parenthesis")
-            self._advance()
-            return expr
+    @staticmethod
+    def _union(left, right):
+        """Returns the UNION of two nodes, merged into left if it is already a UNION."""
+        if left.type != "UNION":
+            left = ASTNode("UNION", None, [left])
+        if right.type == "UNION":
+            left.children.extend(right.children)
         else:
-            raise SyntaxError(f"Unexpected token: {token}")
-
+            left.children.append(right)
+        return left
 
+    @staticmethod
+    def _concat(terms):
+        """Returns the CONCAT of a sequence of terms, flattening nested CONCATs."""
+        if len(terms) == 1:
+            return terms[0]
+        children = []
+        for term in terms:
+            if term.type == "CONCAT":
+                children.extend(term.children)
+            else:
+                children.append(term)
+        return ASTNode("CONCAT", None, children)
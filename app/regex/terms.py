@@ -0,0 +1,232 @@
+"""
+Hash-consed regex terms and their Brzozowski derivatives.
+
+Terms are only created through the constructors below (empty, epsilon,
+symbol, concat, union, star, intersect, complement), which normalize them:
+  - unions and intersections are flattened, deduplicated and sorted
+    (associativity, commutativity, idempotence), concatenations flattened,
+  - the empty language and the empty string are simplified away
+    (r + {} = r, r.{} = {}, r.() = r, ()* = {}* = (), r** = r*, ~~r = r),
+and then interned, so structurally equal terms are the same object. A term
+can then be compared and hashed by identity, and used directly as a DFA
+state: the derivatives of a regex are finitely many up to this
+normalization, which is what makes the derivative DFA finite.
+"""
+import weakref
+
+EMPTY = "EMPTY"
+EPSILON = "EPSILON"
+SYMBOL = "SYMBOL"
+CONCAT = "CONCAT"
+UNION = "UNION"
+STAR = "STAR"
+INTERSECT = "INTERSECT"
+COMPLEMENT = "COMPLEMENT"
+
+# Interned terms, keyed by (kind, args); entries go away with their term
+_terms = weakref.WeakValueDictionary()
+
+
+class Term:
+    """
+    A normalized, interned regex term.
+
+    Attributes:
+        kind: one of the kind constants of this module
+        args: the symbol of a SYMBOL term, or the tuple of operand terms
+        nullable: True if the term matches the empty string
+        id: creation number, used to order the operands of unions and
+            intersections
+    """
+
+    __slots__ = ('kind', 'args', 'nullable', 'id', '_derivatives', '__weakref__')
+
+    _count = 0
+
+    def derivative(self, symbol):
+        """
+        Returns the derivative of the term with respect to a symbol: the term
+        matching every w such that symbol + w is matched by this term. Results
+        are memoized per (term, symbol). Any symbol that does not occur in the
+        term (e.g. None) stands for all such symbols.
+        """
+        result = self._derivatives.get(symbol)
+        if result is None:
+            result = self._derivatives[symbol] = _derive(self, symbol)
+        return result
+
+    def alphabet(self):
+        """Returns the set of symbols occurring in the term."""
+        symbols = set()
+        stack = [self]
+        seen = {self}
+        while stack:
+            term = stack.pop()
+            if term.kind == SYMBOL:
+                symbols.add(term.args)
+                continue
+            if term.kind in (EMPTY, EPSILON):
+                continue
+            for operand in term.args:
+                if operand not in seen:
+                    seen.add(operand)
+                    stack.append(operand)
+        return symbols
+
+    def __repr__(self):
+        if self.kind == EMPTY:
+            return "{}"
+        if self.kind == EPSILON:
+            return "()"
+        if self.kind == SYMBOL:
+            return self.args
+        if self.kind == STAR:
+            return f"({self.args[0]!r})*"
+        if self.kind == COMPLEMENT:
+            return f"~({self.args[0]!r})"
+        separator = {CONCAT: "", UNION: "+", INTERSECT: "&"}[self.kind]
+        return "(" + separator.join(map(repr, self.args)) + ")"
+
+
+def _make(kind, args, nullable):
+    key = (kind, args)
+    term = _terms.get(key)
+    if term is None:
+        term = Term.__new__(Term)
+        term.kind = kind
+        term.args = args
+        term.nullable = nullable
+        term.id = Term._count
+        term._derivatives = {}
+        Term._count += 1
+        _terms[key] = term
+    return term
+
+
+def empty():
+    """The term matching nothing."""
+    return _make(EMPTY, (), False)
+
+
+def epsilon():
+    """The term matching only the empty string."""
+    return _make(EPSILON, (), True)
+
+
+def symbol(value):
+    return _make(SYMBOL, value, False)
+
+
+def concat(*terms):
+    factors = []
+    for term in terms:
+        if term.kind == EMPTY:
+            return empty()
+        if term.kind == CONCAT:
+            factors.extend(term.args)
+        elif term.kind != EPSILON:
+            factors.append(term)
+    if not factors:
+        return epsilon()
+    if len(factors) == 1:
+        return factors[0]
+    return _make(CONCAT, tuple(factors), all(factor.nullable for factor in factors))
+
+
+def union(*terms):
+    operands = set()
+    for term in terms:
+        if term.kind == UNION:
+            operands.update(term.args)
+        elif term.kind != EMPTY:
+            operands.add(term)
+    if _universal() in operands:
+        return _universal()
+    if not operands:
+        return empty()
+    if len(operands) == 1:
+        return operands.pop()
+    operands = tuple(sorted(operands, key=lambda operand: operand.id))
+    return _make(UNION, operands, any(operand.nullable for operand in operands))
+
+
+def star(term):
+    if term.kind in (EMPTY, EPSILON):
+        return epsilon()
+    if term.kind == STAR:
+        return term
+    return _make(STAR, (term,), True)
+
+
+def intersect(*terms):
+    operands = set()
+    for term in terms:
+        if term.kind == EMPTY:
+            return empty()
+        if term.kind == INTERSECT:
+            operands.update(term.args)
+        else:
+            operands.add(term)
+    operands.discard(_universal())
+    if not operands:
+        return _universal()
+    if len(operands) == 1:
+        return operands.pop()
+    operands = tuple(sorted(operands, key=lambda operand: operand.id))
+    return _make(INTERSECT, operands, all(operand.nullable for operand in operands))
+
+
+def complement(term):
+    if term.kind == COMPLEMENT:
+        return term.args[0]
+    return _make(COMPLEMENT, (term,), not term.nullable)
+
+
+def _universal():
+    """The term matching every string, ~{}."""
+    return _make(COMPLEMENT, (empty(),), True)
+
+
+def _derive(term, value):
+    kind = term.kind
+    if kind in (EMPTY, EPSILON):
+        return empty()
+    if kind == SYMBOL:
+        return epsilon() if term.args == value else empty()
+    if kind == CONCAT:
+        head, rest = term.args[0], concat(*term.args[1:])
+        derivative = concat(head.derivative(value), rest)
+        if head.nullable:
+            derivative = union(derivative, rest.derivative(value))
+        return derivative
+    if kind == UNION:
+        return union(*(operand.derivative(value) for operand in term.args))
+    if kind == STAR:
+        return concat(term.args[0].derivative(value), term)
+    if kind == INTERSECT:
+        return intersect(*(operand.derivative(value) for operand in term.args))
+    return complement(term.args[0].derivative(value))
+
+
+def from_ast(ast):
+    """
+    Converts an AST into a term, using the same postorder traversal and
+    stack as FABuilder.
+    """
+    stack = []
+
+    def visit(node):
+        if node.type == "SYMBOL":
+            stack.append(symbol(node.value))
+            return
+        operands = stack[len(stack) - len(node.children):]
+        del stack[len(stack) - len(node.children):]
+        if node.type == "CONCAT":
+            stack.append(concat(*operands))
+        elif node.type == "UNION":
+            stack.append(union(*operands))
+        elif node.type == "STAR":
+            stack.append(star(operands[0]))
+
+    ast.traverse_postorder(visit)
+    return stack.pop()
@@ -9,20 +9,18 @@ class TokenType(Enum):
     UNION = '+'
     CONCAT = '.'
     SYMBOL = 'SYMBOL'
-    
+
+
+# Single-character token types, looked up once per character by the lexer
+token_types_by_char = {token.value: token for token in TokenType if token != TokenType.SYMBOL}
+
 
 def is_symbol(char):
-    for ignore_char in ignore_chars:
-        if ignore_char == char:
-            return False
-    
-    for token in TokenType:
-        if token.value == char:
-            return False
-        
-    return True
+    return char not in ignore_chars and char not in token_types_by_char
 
 class Token:
+    __slots__ = ('type', 'value')
+
     def __init__(self, type, value=None):
         self.type = type
         self.value = value
@@ -14,22 +14,21 @@ def generate_mermaid(fa):
     for state in fa.states:
         # Mark final states with double circles
         if state in fa.final_states:
-            result.append(f"    {state}: {state}")
-            result.append(f"    style {state} fill:#f9f,stroke-width:4px")
+            name = fa.name_of(state)
+            result.append(f"    {name}: {name}")
+            result.append(f"    style {name} fill:#f9f,stroke-width:4px")
         
     # Add transitions
     for state in fa.states:
-        state_index = list(fa.states).index(state)
-        edges = fa.transitions.get_edges(state_index)
+        edges = fa.transitions.get_edges(state)
         
-        for dest_index, symbol in edges:
-            dest_state = list(fa.states)[dest_index]
+        for dest_state, symbol in edges:
             # Use ε for epsilon transitions
             label = "ε" if symbol == "" else symbol
-            result.append(f"    {state} --> {dest_state}: {label}")
+            result.append(f"    {fa.name_of(state)} --> {fa.name_of(dest_state)}: {label}")
     
     # Mark starting state with an arrow
-    if fa.starting_state:
-        result.append(f"    [*] --> {fa.starting_state}")
+    if fa.starting_state is not None:
+        result.append(f"    [*] --> {fa.name_of(fa.starting_state)}")
     
     return "\n".join(result) 
\ No newline at end of file
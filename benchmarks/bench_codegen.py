@@ -0,0 +1,43 @@
+"""
+Benchmark: generated Python matcher (app.fa.codegen) vs the table-driven
+CompiledDFA.run on small, hot patterns.
+
+Run from the repository root:
+    python -m benchmarks.bench_codegen
+"""
+import random
+import timeit
+from app.pattern import compile_pattern
+from app.fa.codegen import compile_dfa_function
+
+CASES = [
+    ("err(0+1)*code", lambda: "err" + "".join(random.choice("01") for _ in range(200)) + "code"),
+    ("abcdefgh(x+y)", lambda: "abcdefgh" + random.choice("xy")),
+    ("(a+b)*abb", lambda: "".join(random.choice("ab") for _ in range(40)) + "abb"),
+    ("0(10)*(110)*", lambda: "0" + "10" * 20 + "110" * 10),
+]
+STRINGS_PER_CASE = 2000
+REPEAT = 5
+
+
+def bench(function, strings):
+    return min(timeit.repeat(lambda: [function(s) for s in strings], number=1, repeat=REPEAT))
+
+
+def main():
+    random.seed(0)
+    print(f"{'regex':<16} {'table (ms)':>11} {'generated (ms)':>15} {'speedup':>8}")
+    for regex, make_string in CASES:
+        dfa = compile_pattern(regex).dfa
+        generated = compile_dfa_function(dfa)
+        strings = [make_string() for _ in range(STRINGS_PER_CASE)]
+        assert [generated(s) for s in strings] == [dfa.run(s) for s in strings]
+
+        table_time = bench(dfa.run, strings)
+        generated_time = bench(generated, strings)
+        print(f"{regex:<16} {table_time * 1000:>11.2f} {generated_time * 1000:>15.2f} "
+              f"{table_time / generated_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: compile time and peak memory of the two ways build_fa gets a DFA
+  - thompson: Thompson epsilon-NFA (FABuilder), then convert_to_dfa,
+  - followpos: DFA built directly from the regex positions (PositionBuilder).
+
+Run from the repository root:
+    python -m benchmarks.bench_construction
+"""
+import random
+import time
+import tracemalloc
+from app.fa.fa_builder import FABuilder
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.fa.position_builder import PositionBuilder
+from app.pattern import parse_regex
+
+REPEAT = 3
+
+
+def random_regex(tokens):
+    random.seed(tokens)
+    return "".join(random.choice(["a", "b", "(a+b)", "c*", "(ab+ba)*"]) for _ in range(tokens))
+
+
+CASES = [
+    ("0(10)*(110)*", "0(10)*(110)*"),
+    ("(a+b)*a(a+b){8}", "(a+b)*a" + "(a+b)" * 8),
+    # Union binds tighter than concatenation: every keyword is its own group
+    ("keywords", "+".join(f"({keyword})" for keyword in ["if", "else", "while", "for", "return", "break",
+                                                         "continue", "switch", "case", "default", "struct",
+                                                         "union", "typedef"])),
+    ("random 100", random_regex(100)),
+    ("random 300", random_regex(300)),
+]
+
+
+def thompson(postorder):
+    return convert_to_dfa(FABuilder().build_from_postorder(postorder))
+
+
+def followpos(postorder):
+    return PositionBuilder().build_from_postorder(postorder)
+
+
+def bench(function, postorder):
+    """Returns (DFA, best time in seconds, peak memory in KiB)."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        dfa = function(postorder)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(postorder)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dfa, best, peak / 1024
+
+
+def main():
+    print(f"{'case':<18} {'states':>7} {'thompson (ms)':>14} {'followpos (ms)':>15} {'speedup':>8}"
+          f" {'thompson (KiB)':>15} {'followpos (KiB)':>16}")
+    for name, regex in CASES:
+        postorder = []
+        parse_regex(regex).traverse_postorder(postorder.append)
+
+        thompson_dfa, thompson_time, thompson_memory = bench(thompson, postorder)
+        followpos_dfa, followpos_time, followpos_memory = bench(followpos, postorder)
+        assert followpos_dfa.is_deterministic()
+
+        print(f"{name:<18} {len(followpos_dfa.states):>7} {thompson_time * 1000:>14.2f}"
+              f" {followpos_time * 1000:>15.2f} {thompson_time / followpos_time:>7.1f}x"
+              f" {thompson_memory:>15.0f} {followpos_memory:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
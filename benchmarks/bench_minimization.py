@@ -0,0 +1,279 @@
+"""
+Benchmark: Hopcroft partition refinement (app.fa.dfa_minimization) vs the
+previous DSU-based minimizer, kept below as legacy_minimize_dfa, on
+  - DFAs of (a+b)*a(a+b){k}(c+ac)*, which are nearly minimal,
+  - cyclic counters of n states that minimize to n / 8 states,
+  - random DFAs over 4 symbols.
+
+Run from the repository root:
+    python -m benchmarks.bench_minimization
+"""
+import random
+import time
+from app.app import build_fa
+from app.ds.set import Set
+from app.fa.fa import FA
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.fa.dfa_minimization import minimize_dfa
+
+# The legacy minimizer is only run below this many states
+LEGACY_LIMIT = 1000
+
+
+class DSU:
+    """The union-find used by legacy_minimize_dfa, unchanged."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))  # Each node is its own parent
+        self.rank = [1] * n  # Rank helps in Union by Rank
+        self.sets = Set()  # Track sets of elements
+        for i in range(n):
+            self.sets.add(Set([i]))  # Each element starts in its own set
+
+    def find(self, x):
+        if self.parent[x] != x:  # Path compression
+            self.parent[x] = self.find(self.parent[x])
+        return self.parent[x]
+
+    def union(self, x, y):
+        rootX = self.find(x)
+        rootY = self.find(y)
+
+        if rootX != rootY:  # Only merge if different sets
+            # Find the corresponding sets
+            setX = next(s for s in self.sets if rootX in s)
+            setY = next(s for s in self.sets if rootY in s)
+            
+            # Merge sets based on rank
+            if self.rank[rootX] > self.rank[rootY]:  # Attach smaller under larger
+                self.parent[rootY] = rootX
+                new_set = setX.union(setY)
+            elif self.rank[rootX] < self.rank[rootY]:
+                self.parent[rootX] = rootY
+                new_set = setX.union(setY)
+            else:
+                self.parent[rootY] = rootX
+                self.rank[rootX] += 1  # Increase rank when merging equal rank trees
+                new_set = setX.union(setY)
+            
+            # Update sets
+            self.sets.discard(setX)
+            self.sets.discard(setY)
+            self.sets.add(new_set)
+
+    def get_sets(self):
+        return self.sets.copy()
+
+    def split(self, x):
+        """
+        Splits element x into its own set
+        """
+        root = self.find(x)
+        # Find the set containing x
+        old_set = next(s for s in self.sets if root in s)
+        
+        # Create new sets
+        remaining_set = Set([i for i in old_set if i != x])
+        new_set = Set([x])
+        
+        # Update sets collection
+        self.sets.discard(old_set)
+        if len(remaining_set) > 0:
+            self.sets.add(remaining_set)
+        self.sets.add(new_set)
+        
+        # Update DSU structure: x becomes its own root, and the remaining
+        # elements are re-rooted so none of them still points through x
+        self.parent[x] = x
+        self.rank[x] = 1
+        if len(remaining_set) > 0:
+            new_root = next(iter(remaining_set))
+            for i in remaining_set:
+                self.parent[i] = new_root
+            self.rank[new_root] = 2 if len(remaining_set) > 1 else 1
+
+
+def legacy_minimize_dfa(fa):
+    """The minimizer replaced by Hopcroft's algorithm, unchanged."""
+    # Initialize new FA
+    minimized_fa = FA()
+    
+    # Initialize DSU with two initial partitions: final and non-final states
+    dsu = DSU(len(fa.states))
+    
+    # Initially merge all final states carrying the same pattern tags
+    # (untagged automata end up with a single final partition)
+    final_groups = {}
+    for state in fa.final_states:
+        final_groups.setdefault(fa.get_tags(state).to_frozenset(), []).append(state)
+    for final_states_list in final_groups.values():
+        for i in range(len(final_states_list) - 1):
+            dsu.union(final_states_list[i], final_states_list[i + 1])
+    
+    # Initially merge all non-final states
+    non_final_states_list = [state for state in fa.states if state not in fa.final_states]
+    for i in range(len(non_final_states_list) - 1):
+        dsu.union(non_final_states_list[i], non_final_states_list[i + 1])
+    
+    # Refine partitions based on transitions. Symbols of the same class
+    # (see FA.symbol_classes) move every state alike, so checking one
+    # representative per class is enough.
+    changed = True
+    representatives = [symbol for _, symbol in fa.symbol_classes().representatives()]
+    
+    while changed:
+        changed = False
+        current_sets = dsu.get_sets()
+        
+        for symbol in representatives:
+            for partition in current_sets:
+                partition_list = list(partition)
+                if len(partition_list) <= 1:
+                    continue
+                    
+                # Get transition destinations for first state
+                first_targets = fa.transitions.targets(partition_list[0], symbol)
+                first_dest = dsu.find(first_targets[0]) if first_targets else None
+                
+                # Compare with other states in partition, grouping the ones
+                # that disagree with the first state by their destination
+                split_needed = False
+                states_to_split = {}
+                
+                for state_idx in partition_list[1:]:
+                    targets = fa.transitions.targets(state_idx, symbol)
+                    current_dest = dsu.find(targets[0]) if targets else None
+                    
+                    # If destinations are in different partitions, mark for splitting
+                    if first_dest != current_dest:
+                        split_needed = True
+                        states_to_split.setdefault(current_dest, []).append(state_idx)
+                
+                # If split is needed, perform it
+                if split_needed:
+                    changed = True
+                    # Move each group of states into its own new partition
+                    for group in states_to_split.values():
+                        for state_idx in group:
+                            dsu.split(state_idx)
+                        for i in range(len(group) - 1):
+                            dsu.union(group[i], group[i + 1])
+                    break
+                    
+            if changed:
+                break
+    
+    # Create new minimized DFA
+    final_partitions = dsu.get_sets()
+    
+    # Create new states for each partition
+    partition_to_new_state = {}
+    for partition in final_partitions:
+        new_state = minimized_fa.add_state()
+        partition_to_new_state[frozenset(partition)] = new_state
+        
+        # Check if partition contains any final states
+        for state_idx in partition:
+            if state_idx in fa.final_states:
+                minimized_fa.add_final_state(new_state)
+                for tag in fa.get_tags(state_idx):
+                    minimized_fa.add_tag(new_state, tag)
+                break
+        
+        # Set starting state
+        if fa.starting_state in partition:
+            minimized_fa.starting_state = new_state
+    
+    # Add transitions
+    for partition in final_partitions:
+        # Take first state from partition as representative
+        rep_state_idx = list(partition)[0]
+        from_state = partition_to_new_state[frozenset(partition)]
+        
+        # Get transitions
+        transitions = fa.transitions.get_edges(rep_state_idx)
+        for dest_idx, symbol in transitions:
+            if symbol == '':  # Skip epsilon transitions
+                continue
+            
+            # Find which partition contains the destination state
+            dest_partition = next(
+                p for p in final_partitions 
+                if dsu.find(dest_idx) in p
+            )
+            to_state = partition_to_new_state[frozenset(dest_partition)]
+            
+            # Add transition to minimized DFA
+            minimized_fa.add_transition(from_state, symbol, to_state)
+    
+    return minimized_fa
+
+
+
+def regex_dfa(k):
+    return convert_to_dfa(build_fa("(a+b)*a" + "(a+b)" * k + "(c+ac)*", use_cache=False))
+
+
+def counter_dfa(n):
+    fa = FA()
+    for _ in range(n):
+        fa.add_state()
+    for state in range(n):
+        fa.add_transition(state, "a", (state + 1) % n)
+        fa.add_transition(state, "b", 0)
+        if state % 8 == 0:
+            fa.add_final_state(state)
+    fa.starting_state = 0
+    return fa
+
+
+def random_dfa(n):
+    random.seed(n)
+    fa = FA()
+    for _ in range(n):
+        fa.add_state()
+    for state in range(n):
+        for symbol in "abcd":
+            fa.add_transition(state, symbol, random.randrange(n))
+        if random.random() < 0.3:
+            fa.add_final_state(state)
+    fa.starting_state = 0
+    return fa
+
+
+CASES = [
+    ("regex k=5", lambda: regex_dfa(5)),
+    ("regex k=7", lambda: regex_dfa(7)),
+    ("regex k=11", lambda: regex_dfa(11)),
+    ("counter 256", lambda: counter_dfa(256)),
+    ("counter 800", lambda: counter_dfa(800)),
+    ("counter 20000", lambda: counter_dfa(20000)),
+    ("random 200", lambda: random_dfa(200)),
+    ("random 800", lambda: random_dfa(800)),
+    ("random 20000", lambda: random_dfa(20000)),
+]
+
+
+def bench(function, fa):
+    start = time.perf_counter()
+    result = function(fa)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'case':<14} {'states':>7} {'minimal':>8} {'hopcroft (s)':>13} {'legacy (s)':>11} {'speedup':>8}")
+    for name, make_dfa in CASES:
+        fa = make_dfa()
+        minimized, hopcroft_time = bench(minimize_dfa, fa)
+        line = f"{name:<14} {len(fa.states):>7} {len(minimized.states):>8} {hopcroft_time:>13.4f}"
+        if len(fa.states) <= LEGACY_LIMIT:
+            legacy, legacy_time = bench(legacy_minimize_dfa, fa)
+            assert (legacy.compile().table == minimized.compile().table).all()
+            line += f" {legacy_time:>11.4f} {legacy_time / hopcroft_time:>7.1f}x"
+        else:
+            line += f" {'-':>11} {'-':>8}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
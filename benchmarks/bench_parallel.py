@@ -0,0 +1,76 @@
+"""
+Benchmark: scaling with the number of worker processes of
+  - app.parallel.match_file, grep-style line matching of a generated log file,
+  - app.parallel.match_record, one generated record without line breaks
+    (chunk state mappings composed in order).
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel [size in MB]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from app.parallel import match_file, match_record
+
+# Union binds tighter than concatenation: each level is its own group
+REGEX = "((ERROR)+(FATAL))(0+1+2+3+4+5+6+7+8+9)*"
+LEVELS = ["INFO", "DEBUG", "WARN", "ERROR", "FATAL"]
+RECORD_REGEX = "(a+b+c)*abc(a+b+c)(a+b+c)"
+
+
+def write_log(path, size):
+    random.seed(0)
+    with open(path, "w") as f:
+        written = 0
+        while written < size:
+            line = (f"2024-01-01 12:00:{random.randint(0, 59):02d} {random.choice(LEVELS)}"
+                    f"{random.randint(0, 999)} request {random.getrandbits(32):08x} served\n")
+            f.write(line)
+            written += len(line)
+
+
+def write_record(path, size):
+    random.seed(0)
+    with open(path, "wb") as f:
+        f.write(bytes(random.choice(b"abc") for _ in range(size - 5)) + b"abcab")
+
+
+def bench(function, path, regex, worker_counts, size_mb):
+    print(f"{'workers':>7} {'time (s)':>9} {'MB/s':>7} {'speedup':>8}")
+    baseline = expected = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = function(path, regex, workers=workers)
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            baseline, expected = elapsed, result
+        assert result == expected
+        print(f"{workers:>7} {elapsed:>9.2f} {size_mb / elapsed:>7.1f} {baseline / elapsed:>7.1f}x")
+    return expected
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, cpus})
+    worker_counts = [workers for workers in worker_counts if workers <= max(cpus, 4)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.log")
+        write_log(path, size_mb << 20)
+        print(f"match_file: {size_mb} MB log, {cpus} CPUs, regex {REGEX}")
+        matches = bench(lambda *args, **kwargs: match_file(*args, count=True, **kwargs),
+                        path, REGEX, worker_counts, size_mb)
+        # About 2 lines in 5 are errors
+        assert matches > 0, "no ERROR / FATAL line matched"
+        print(f"matching lines: {matches}")
+
+        path = os.path.join(directory, "bench.record")
+        write_record(path, size_mb << 20)
+        print(f"\nmatch_record: {size_mb} MB record, {cpus} CPUs, regex {RECORD_REGEX}")
+        bench(match_record, path, RECORD_REGEX, worker_counts, size_mb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Makes the repository root importable (import app...) for a plain `pytest`
+# run, like `python -m pytest` does.
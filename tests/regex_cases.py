@@ -0,0 +1,70 @@
+"""
+Random regexes and inputs shared by the tests, with Python's re module as
+the reference matcher.
+"""
+import itertools
+import random
+import re
+from app.pattern import parse_regex
+
+ALPHABET = "abc"
+
+# Inputs also use a symbol outside the alphabet of every regex
+INPUT_SYMBOLS = ALPHABET + "d"
+
+
+def random_regex(rng, depth=3):
+    """Returns a random valid regex over ALPHABET."""
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(ALPHABET)
+    kind = rng.choice(["concat", "concat", "union", "star", "group"])
+    if kind == "concat":
+        return random_regex(rng, depth - 1) + random_regex(rng, depth - 1)
+    if kind == "union":
+        return "(" + random_regex(rng, depth - 1) + "+" + random_regex(rng, depth - 1) + ")"
+    if kind == "star":
+        return "(" + random_regex(rng, depth - 1) + ")*"
+    return "(" + random_regex(rng, depth - 1) + ")"
+
+
+def to_python_regex(node):
+    """
+    Translates an AST into an equivalent Python regex. Working on the AST
+    keeps the precedence of this grammar (union binds tighter than
+    concatenation).
+    """
+    if node.type == "SYMBOL":
+        return re.escape(node.value)
+    children = [to_python_regex(child) for child in node.children]
+    if node.type == "CONCAT":
+        return "(?:" + "".join(children) + ")"
+    if node.type == "UNION":
+        return "(?:" + "|".join(children) + ")"
+    return "(?:" + children[0] + ")*"
+
+
+def reference(regex):
+    """Returns the compiled Python regex equivalent to a regex of this grammar."""
+    return re.compile(to_python_regex(parse_regex(regex)))
+
+
+def random_inputs(rng, count=60, max_length=10):
+    """Every string of up to 3 symbols, then random longer ones."""
+    inputs = ["".join(symbols) for length in range(4)
+              for symbols in itertools.product(INPUT_SYMBOLS, repeat=length)]
+    inputs += ["".join(rng.choice(ALPHABET) for _ in range(rng.randrange(max_length)))
+               for _ in range(count)]
+    return inputs
+
+
+def cases(seed, count=40):
+    """Yields (regex, reference matcher, inputs) for random regexes."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        regex = random_regex(rng)
+        yield regex, reference(regex), random_inputs(rng)
+
+
+def assert_same_language(run, reference, inputs, regex):
+    for string in inputs:
+        assert run(string) == bool(reference.fullmatch(string)), (regex, string)
@@ -0,0 +1,107 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.app import build_fa
+from app.fa.async_stream import AsyncStreamMatcher, match_stream, stream_events
+from app.fa.stream_matcher import ACCEPT, DEAD, REJECT, StreamMatcher
+from app.pattern import Pattern, compile_pattern
+from regex_cases import reference
+
+
+async def chunks_of(data, size):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+async def read_events(data, matcher):
+    # StreamReader needs a running event loop
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return await collect(stream_events(reader, matcher))
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_events_match_stream_matcher():
+    pattern = Pattern("(ab)*c", byte_mode=True)
+    data = b"ababcx"
+    expected = StreamMatcher(pattern.dfa).feed(data)
+    assert expected == [(ACCEPT, 5), (REJECT, 6), (DEAD, 6)]
+    assert asyncio.run(collect(stream_events(chunks_of(data, 2), pattern))) == expected
+    assert asyncio.run(read_events(data, pattern)) == expected
+
+
+def test_verdict_stops_reading_after_dead():
+    reads = []
+
+    async def source():
+        for chunk in [b"x", b"ab", b"ab"]:
+            reads.append(chunk)
+            yield chunk
+
+    assert not asyncio.run(match_stream(source(), Pattern("ab", byte_mode=True)))
+    assert reads == [b"x"]
+
+
+def test_large_chunks_go_to_the_executor():
+    pattern = compile_pattern("(a+b)*abb", byte_mode=True)
+    data = bytes(random.Random(0).choice(b"ab") for _ in range(1000)) + b"abb"
+    with CountingExecutor(2) as executor:
+        assert asyncio.run(match_stream(chunks_of(data, 100), pattern, executor=executor, offload_threshold=64))
+        assert executor.submitted == 10
+        assert asyncio.run(match_stream(chunks_of(data, 10), pattern, executor=executor, offload_threshold=64))
+        assert executor.submitted == 10
+
+
+def test_concurrent_streams_of_one_nfa():
+    # Offloaded chunks of both streams step the FA's lazy DFA in executor
+    # threads, while fa.run() keeps clearing its cache
+    regex = "(0+1)*1" + "(0+1)" * 14
+    fa = build_fa(regex, use_cache=False)
+    rng = random.Random(0)
+    strings = ["".join(rng.choice("01") for _ in range(2000)) for _ in range(4)]
+
+    async def verdict(string):
+        matcher = AsyncStreamMatcher(fa, offload_threshold=1)
+        async for chunk in chunks_of(string, 50):
+            await matcher.feed(chunk)
+            fa.run("".join(rng.choice("01") for _ in range(200)))
+        return matcher.stream.close()
+
+    async def main():
+        return await asyncio.gather(*(verdict(string) for string in strings))
+
+    assert asyncio.run(main()) == [reference(regex).fullmatch(string) is not None for string in strings]
+
+
+def test_decoded_chunks_split_characters():
+    events = asyncio.run(collect(stream_events(chunks_of("aéé".encode(), 1), Pattern("aé*"), encoding="utf-8")))
+    assert events == [(ACCEPT, 1)]
+    with pytest.raises(UnicodeDecodeError):
+        asyncio.run(match_stream(chunks_of("é".encode()[:1], 1), Pattern("é"), encoding="utf-8"))
+
+
+def test_chunks_must_fit_the_pattern_mode():
+    data = "aé".encode()
+    with pytest.raises(TypeError):
+        asyncio.run(match_stream(chunks_of(data, 2), compile_pattern("aé")))
+    with pytest.raises(TypeError):
+        asyncio.run(match_stream(chunks_of("aé", 2), compile_pattern("aé", byte_mode=True)))
+    with pytest.raises(TypeError):
+        AsyncStreamMatcher(compile_pattern("aé", byte_mode=True), encoding="utf-8")
+    assert asyncio.run(match_stream(chunks_of(data, 2), compile_pattern("aé"), encoding="utf-8"))
+    assert asyncio.run(match_stream(chunks_of(data, 2), compile_pattern("aé", byte_mode=True)))
+    assert asyncio.run(match_stream(chunks_of("aé", 1), compile_pattern("aé")))
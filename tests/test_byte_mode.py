@@ -0,0 +1,64 @@
+import mmap
+import random
+from array import array
+import pytest
+from app.app import build_fa
+from app.pattern import Pattern
+from regex_cases import INPUT_SYMBOLS, random_regex, reference
+
+
+def random_string(rng, length):
+    return "".join(rng.choice(INPUT_SYMBOLS) for _ in range(length))
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_byte_mode_agrees_with_str_mode(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        regex = random_regex(rng)
+        pattern, byte_pattern = Pattern(regex), Pattern(regex, byte_mode=True)
+        strings = [random_string(rng, rng.randrange(12)) for _ in range(20)]
+        data = [string.encode() for string in strings]
+        assert [byte_pattern.fullmatch(item) for item in data] == [pattern.fullmatch(item) for item in strings]
+        assert byte_pattern.match_many(data).tolist() == pattern.match_many(strings).tolist()
+        for string, item in zip(strings, data):
+            spans = [match.span() for match in pattern.finditer(string)]
+            assert [match.span() for match in byte_pattern.finditer(bytearray(item))] == spans, (regex, string)
+
+
+def test_non_ascii_symbols_match_their_utf8_bytes():
+    pattern = Pattern("é(ab)*ü", byte_mode=True)
+    data = "xéababü-éü".encode()
+    assert [match.group() for match in pattern.finditer(data)] == ["éababü".encode(), "éü".encode()]
+    assert pattern.fullmatch("éü".encode()) and not pattern.fullmatch("eü".encode())
+    assert build_fa("é", byte_mode=True).run("é".encode())
+
+
+def test_memoryview_positions_are_byte_offsets():
+    pattern = Pattern("a(b)*", byte_mode=True)
+    view = memoryview(array("i", [0] * 4))
+    view.cast("B")[2:7] = b"abbba"
+    assert [match.span() for match in pattern.finditer(view)] == [(2, 6), (6, 7)]
+    assert bytes(pattern.match(view, 2).group()) == b"abbb"
+    assert pattern.match(view, 2, 4).span() == (2, 4)
+    assert not pattern.fullmatch(view)
+
+
+def test_mmap_input(tmp_path):
+    path = tmp_path / "input.bin"
+    path.write_bytes(b"--abb--ab")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        assert Pattern("ab(b)*", byte_mode=True).findall(data) == [b"abb", b"ab"]
+
+
+def test_mixing_str_and_bytes_raises():
+    with pytest.raises(TypeError):
+        Pattern("a").fullmatch(b"a")
+    with pytest.raises(TypeError):
+        Pattern("a", byte_mode=True).fullmatch("a")
+    with pytest.raises(TypeError):
+        Pattern("a", byte_mode=True).match_many([b"a", "a"])
+    with pytest.raises(TypeError):
+        Pattern("a").match_many(["a", b"a"])
+    with pytest.raises(TypeError):
+        Pattern("a").search(b"a")
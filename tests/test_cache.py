@@ -0,0 +1,91 @@
+import random
+import threading
+import pytest
+from app.app import build_fa
+from app.cache import cache_stats, compiled_cache, purge_cache, set_cache_size
+from app.ds.lru_cache import LRUCache
+from app.pattern import compile_pattern
+from regex_cases import INPUT_SYMBOLS, random_regex, reference
+
+
+@pytest.fixture
+def cache():
+    maxsize = compiled_cache.maxsize
+    purge_cache()
+    compiled_cache.reset_stats()
+    yield compiled_cache
+    set_cache_size(maxsize)
+    purge_cache()
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert "a" in lru and "b" not in lru and "c" in lru
+    assert lru.get("b", 0) == 0
+    assert lru.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_lru_resize():
+    lru = LRUCache(maxsize=None)
+    for key in range(10):
+        lru.put(key, key)
+    lru.resize(3)
+    assert len(lru) == 3 and lru.get(9) == 9 and lru.get(0) is None
+    lru.resize(0)
+    lru.put("x", 1)
+    assert len(lru) == 0
+
+
+def test_build_fa_reuses_cached_automaton(cache):
+    fa = build_fa("ab*c", if_convert_to_dfa=True)
+    assert build_fa("ab*c", if_convert_to_dfa=True) is fa
+    assert build_fa("ab*c") is not fa
+    assert build_fa("ab*c", if_convert_to_dfa=True, use_cache=False) is not fa
+    stats = cache_stats()
+    assert stats['size'] == 2 and stats['hits'] == 1
+
+
+def test_set_cache_size_and_purge(cache):
+    set_cache_size(2)
+    first = compile_pattern("a")
+    compile_pattern("b")
+    compile_pattern("c")
+    assert cache_stats()['evictions'] == 1
+    assert compile_pattern("a") is not first
+    purge_cache()
+    assert cache_stats()['size'] == 0
+    set_cache_size(0)
+    assert compile_pattern("a") is not compile_pattern("a")
+
+
+def test_shared_pattern_across_threads(cache):
+    rng = random.Random(0)
+    regexes = [random_regex(rng) for _ in range(8)]
+    inputs = ["".join(rng.choice(INPUT_SYMBOLS) for _ in range(rng.randrange(30))) for _ in range(200)]
+    expected = {regex: [bool(reference(regex).fullmatch(string)) for string in inputs] for regex in regexes}
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def work(seed):
+        order = random.Random(seed)
+        barrier.wait()
+        try:
+            for _ in range(20):
+                regex = order.choice(regexes)
+                pattern = compile_pattern(regex)
+                if [pattern.fullmatch(string) for string in inputs] != expected[regex]:
+                    errors.append(regex)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache_stats()['size'] == len(set(regexes))
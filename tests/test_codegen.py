@@ -0,0 +1,49 @@
+import random
+import pytest
+from app.fa.codegen import SPAN_CHUNK, compile_dfa_function, generate_source
+from app.pattern import Pattern
+from regex_cases import ALPHABET, assert_same_language, cases, reference
+
+
+def long_inputs(rng, count=30):
+    """Strings longer than SPAN_CHUNK, mostly made of repeated symbols."""
+    return ["".join(rng.choice(ALPHABET) * rng.randrange(1, 2 * SPAN_CHUNK) for _ in range(rng.randrange(1, 4)))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_generated_function_matches_re(seed):
+    rng = random.Random(seed)
+    for regex, python_regex, inputs in cases(seed):
+        dfa = Pattern(regex).dfa
+        match = compile_dfa_function(dfa)
+        assert_same_language(match, python_regex, inputs, regex)
+        # re backtracks exponentially on nested stars over long inputs
+        for string in long_inputs(rng):
+            assert match(string) == dfa.run(string), (regex, string)
+
+
+@pytest.mark.parametrize("regex, shape", [
+    ("(a+b)*abb", "row"),
+    ("(0+1)*1(0+1)(0+1)", "row"),
+    ("abcdef(a)*", "dispatch"),
+    ("(a+b+c)*d", "dispatch"),
+    ("x(abcd)*y(a+b)*", "dispatch"),
+])
+def test_both_shapes_match_re(regex, shape):
+    dfa = Pattern(regex).dfa
+    source = generate_source(dfa)
+    assert ("_match_rows" in source) == (shape == "row")
+    rng = random.Random(0)
+    symbols = sorted(set(regex) - set("()*+")) + ["z"]
+    inputs = ["".join(rng.choice(symbols) * rng.randrange(1, 80) for _ in range(rng.randrange(6)))
+              for _ in range(300)]
+    inputs += ["abcdef" + "a" * 200, "x" + "abcd" * 40 + "y" + "ab" * 70, "abc" * 50 + "d", "abcde"]
+    assert_same_language(compile_dfa_function(dfa), reference(regex), inputs, regex)
+
+
+def test_function_is_cached_on_the_dfa():
+    dfa = Pattern("ab*").dfa
+    match = compile_dfa_function(dfa)
+    assert compile_dfa_function(dfa) is match
+    assert match.source.startswith("_match_rows") or match.source.startswith("def match")
@@ -0,0 +1,59 @@
+import random
+import pytest
+from app.app import build_fa
+from app.fa.derivative_dfa import DerivativeDFA
+from app.regex import terms
+from regex_cases import assert_same_language, cases, random_inputs, random_regex, reference
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_derivative_construction(seed):
+    for regex, python_regex, inputs in cases(seed):
+        assert_same_language(DerivativeDFA.from_regex(regex).run, python_regex, inputs, regex)
+        dfa = build_fa(regex, use_cache=False, construction='derivatives')
+        assert dfa.is_deterministic()
+        assert_same_language(dfa.run, python_regex, inputs, regex)
+        compiled = DerivativeDFA.from_regex(regex).to_compiled()
+        assert_same_language(compiled.run, python_regex, inputs, regex)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_constructions_share_the_minimal_dfa(seed):
+    for regex, _, _ in cases(seed, count=20):
+        sizes = {len(build_fa(regex, use_cache=False, construction=construction,
+                              if_convert_to_dfa=True, if_minimize_dfa=True).states)
+                 for construction in ('thompson', 'followpos', 'derivatives')}
+        assert len(sizes) == 1, regex
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_derivative_boolean_operations(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        first, second = random_regex(rng), random_regex(rng)
+        first_re, second_re = reference(first), reference(second)
+        first_dfa, second_dfa = DerivativeDFA.from_regex(first), DerivativeDFA.from_regex(second)
+        for string in random_inputs(rng):
+            in_first = bool(first_re.fullmatch(string))
+            in_second = bool(second_re.fullmatch(string))
+            assert (first_dfa & second_dfa).run(string) == (in_first and in_second)
+            assert (first_dfa | second_dfa).run(string) == (in_first or in_second)
+            assert (~first_dfa).run(string) == (not in_first)
+
+
+def test_terms_are_normalized_and_interned():
+    a, b = terms.symbol("a"), terms.symbol("b")
+    assert terms.union(a, b) is terms.union(b, a, a)
+    assert terms.union(a, terms.empty()) is a
+    assert terms.concat(a, terms.epsilon()) is a
+    assert terms.concat(a, terms.empty()) is terms.empty()
+    assert terms.star(terms.star(a)) is terms.star(a)
+    assert terms.complement(terms.complement(a)) is a
+    assert terms.star(terms.epsilon()) is terms.epsilon()
+
+
+def test_derivatives_of_a_star_are_finitely_many():
+    # (a+b)*abb has 4 derivatives besides the empty term
+    dfa = DerivativeDFA.from_regex("(a+b)*abb")
+    dfa.explore()
+    assert dfa.num_states == 5
@@ -0,0 +1,56 @@
+import itertools
+import pytest
+from app.fa.dfa_minimization import minimize_dfa
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.pattern import build_nfa, parse_regex
+from regex_cases import assert_same_language, cases
+
+
+def equivalent_pairs(dfa):
+    """
+    Pairs of distinct states of a CompiledDFA accepting the same language,
+    found by marking every pair a string tells apart.
+    """
+    pairs = list(itertools.combinations(range(dfa.num_states), 2))
+    marked = {pair for pair in pairs if dfa.accepting[pair[0]] != dfa.accepting[pair[1]]}
+    changed = True
+    while changed:
+        changed = False
+        for first, second in pairs:
+            if (first, second) in marked:
+                continue
+            for symbol_class in range(dfa.num_classes):
+                targets = tuple(sorted((int(dfa.table[first, symbol_class]), int(dfa.table[second, symbol_class]))))
+                if targets in marked:
+                    marked.add((first, second))
+                    changed = True
+                    break
+    return [pair for pair in pairs if pair not in marked]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_hopcroft_minimization(seed):
+    for regex, reference, inputs in cases(seed):
+        dfa = convert_to_dfa(build_nfa(parse_regex(regex)))
+        minimized = minimize_dfa(dfa)
+        assert_same_language(minimized.run, reference, inputs, regex)
+        assert len(minimized.states) <= len(dfa.states)
+        # Minimal DFAs are unique: minimizing again changes nothing
+        assert len(minimize_dfa(minimized).states) == len(minimized.states)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_no_two_states_are_equivalent(seed):
+    for regex, _, _ in cases(seed, count=20):
+        compiled = minimize_dfa(convert_to_dfa(build_nfa(parse_regex(regex)))).compile()
+        assert equivalent_pairs(compiled) == [], regex
+
+
+@pytest.mark.parametrize("regex, size", [("(a+b)*abb", 4), ("(a+b)*a(a+b)(a+b)", 8), ("(aa)*", 2), ("a(b)*", 2)])
+def test_known_minimal_sizes(regex, size):
+    assert len(minimize_dfa(convert_to_dfa(build_nfa(parse_regex(regex)))).states) == size
+
+
+def test_nondeterministic_input_is_rejected():
+    with pytest.raises(ValueError):
+        minimize_dfa(build_nfa(parse_regex("a+ab")))
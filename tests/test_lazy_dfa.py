@@ -0,0 +1,80 @@
+import random
+import threading
+import pytest
+from app.fa.lazy_dfa import LazyDFA, PerThreadLazyDFA
+from app.fa.nfa_simulator import NFASimulator
+from app.pattern import build_nfa, parse_regex
+from regex_cases import assert_same_language, cases
+
+# (0+1)*1(0+1){14}: the subset DFA has 2^15 states, far more than the caches below
+WIDE = "(0+1)*1" + "(0+1)" * 14
+
+
+def random_bits(rng, length):
+    return "".join(rng.choice("01") for _ in range(length))
+
+
+@pytest.mark.parametrize("max_states", [3, 5, 10000])
+def test_run_matches_re(max_states):
+    for regex, reference, inputs in cases(max_states):
+        dfa = LazyDFA(build_nfa(parse_regex(regex)), max_states=max_states, min_symbols_per_state=1)
+        assert_same_language(dfa.run, reference, inputs, regex)
+
+
+def test_run_matches_nfa_through_clears_and_fallbacks():
+    nfa = build_nfa(parse_regex(WIDE))
+    sim = NFASimulator(nfa)
+    dfa = LazyDFA(nfa, max_states=16, min_symbols_per_state=2)
+    rng = random.Random(0)
+    for _ in range(50):
+        string = random_bits(rng, rng.randrange(100))
+        assert dfa.run(string) == sim.run(string)
+    stats = dfa.stats()
+    assert stats['cache_clears'] > 0 and stats['nfa_fallbacks'] > 0
+    assert stats['cached_states'] <= 16
+
+
+def test_step_keeps_valid_ids_through_clears():
+    nfa = build_nfa(parse_regex(WIDE))
+    sim = NFASimulator(nfa)
+    dfa = LazyDFA(nfa, max_states=8)
+    rng = random.Random(1)
+    state, subset = dfa.start, sim.start
+    for symbol in random_bits(rng, 500):
+        state = dfa.step(state, symbol)
+        subset = sim.step(subset, symbol)
+        assert dfa.is_accepting(state) == sim.is_accepting(subset)
+    assert dfa.cache_clears > 0 and dfa.nfa_fallbacks == 0
+
+
+def test_first_fill_is_not_thrashing():
+    dfa = LazyDFA(build_nfa(parse_regex(WIDE)), max_states=4, min_symbols_per_state=1000)
+    dfa.run("1" * 10)
+    assert dfa.cache_clears == 1
+
+
+def test_leaves_nfa_fallback_once_enough_input_went_by():
+    dfa = LazyDFA(build_nfa(parse_regex(WIDE)), max_states=4, min_symbols_per_state=1)
+    rng = random.Random(2)
+    clears = []
+    for _ in range(10):
+        dfa.run(random_bits(rng, 200))
+        clears.append(dfa.cache_clears)
+    # Every run falls back, and the next one clears the cache again
+    assert dfa.nfa_fallbacks > 0
+    assert clears[-1] >= 10
+
+
+def test_unanchored_accepts_any_prefix():
+    dfa = LazyDFA(build_nfa(parse_regex("ab")), unanchored=True)
+    assert dfa.run("cab") and dfa.run("abab") and not dfa.run("aba")
+
+
+def test_per_thread_lazy_dfa_is_one_per_thread():
+    shared = PerThreadLazyDFA(NFASimulator(build_nfa(parse_regex("ab"))))
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(shared.dfa))
+    thread.start()
+    thread.join()
+    assert seen[0] is not shared.dfa
+    assert seen[0].sim is shared.dfa.sim
@@ -0,0 +1,53 @@
+import itertools
+import random
+import pytest
+from app.pattern import Pattern, parse_regex
+from app.regex.literals import extract_literals
+from regex_cases import ALPHABET, random_regex, reference
+
+
+def matched_strings(regex, max_length=6):
+    full = reference(regex).fullmatch
+    return [string for length in range(max_length + 1)
+            for string in map("".join, itertools.product(ALPHABET, repeat=length)) if full(string)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_literals_hold_for_every_match(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        regex = random_regex(rng)
+        literals = extract_literals(parse_regex(regex))
+        matches = matched_strings(regex)
+        if literals.exact is not None:
+            assert matches == [literals.exact], regex
+        for string in matches:
+            assert string.startswith(literals.prefix), (regex, string, literals)
+            assert string.endswith(literals.suffix), (regex, string, literals)
+            assert literals.required in string, (regex, string, literals)
+
+
+@pytest.mark.parametrize("regex, exact, prefix, suffix, required", [
+    ("abc", "abc", "abc", "abc", "abc"),
+    ("ab*c", None, "a", "c", "a"),
+    ("err(0+1)*code", None, "err", "code", "code"),
+    # Union binds tighter: x(ab+ac)y is xa(b+a)cy
+    ("x(ab+ac)y", None, "xa", "cy", "xa"),
+    ("(a+b)*", None, "", "", ""),
+])
+def test_literals_of_known_regexes(regex, exact, prefix, suffix, required):
+    literals = extract_literals(parse_regex(regex))
+    assert (literals.exact, literals.prefix, literals.suffix, literals.required) == (exact, prefix, suffix, required)
+
+
+def test_prefiltered_pattern_agrees_with_re():
+    rng = random.Random(0)
+    for _ in range(40):
+        regex = random_regex(rng)
+        pattern = Pattern(regex)
+        full = reference(regex)
+        for _ in range(20):
+            string = "".join(rng.choice(ALPHABET) for _ in range(rng.randrange(8)))
+            assert pattern.fullmatch(string) == bool(full.fullmatch(string))
+            found = pattern.search(string)
+            assert (found is None) == (full.search(string) is None)
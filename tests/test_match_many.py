@@ -0,0 +1,52 @@
+import random
+import pytest
+from app.fa import compiled_dfa
+from app.pattern import Pattern
+from regex_cases import INPUT_SYMBOLS, random_regex
+
+
+def random_strings(rng, count, max_length=12):
+    return ["".join(rng.choice(INPUT_SYMBOLS) for _ in range(rng.randrange(max_length)))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_match_many_agrees_with_run(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        dfa = Pattern(random_regex(rng)).dfa
+        strings = random_strings(rng, 200)
+        assert dfa.match_many(strings).tolist() == [dfa.run(string) for string in strings]
+
+
+def test_small_blocks_and_long_outliers(monkeypatch):
+    # 64 cells per block: long strings get smaller blocks or go through run()
+    monkeypatch.setattr(compiled_dfa, "MAX_BLOCK_CELLS", 64)
+    monkeypatch.setattr(compiled_dfa, "MAX_BATCH_LENGTH", 64)
+    rng = random.Random(0)
+    dfa = Pattern("(a+b)*abb").dfa
+    strings = random_strings(rng, 300) + ["ab" * 40 + "abb", "a" * 100, "b" * 63 + "abb"]
+    rng.shuffle(strings)
+    assert dfa.match_many(strings, block_size=7).tolist() == [dfa.run(string) for string in strings]
+
+
+def test_one_huge_string_does_not_pad_the_batch(monkeypatch):
+    widths = []
+    text_classes = compiled_dfa.CompiledDFA._text_classes
+
+    def recording(self, block):
+        classes = text_classes(self, block)
+        widths.append(classes.shape)
+        return classes
+
+    monkeypatch.setattr(compiled_dfa.CompiledDFA, "_text_classes", recording)
+    dfa = Pattern("a*b").dfa
+    strings = ["ab", "b", "aab"] * 1000 + ["a" * 1000000 + "b"] + ["a" * 30000] * 200
+    assert dfa.match_many(strings).tolist() == [True] * 3001 + [False] * 200
+    assert max(rows * columns for rows, columns in widths) <= compiled_dfa.MAX_BLOCK_CELLS
+
+
+def test_special_strings():
+    dfa = Pattern("a*").dfa
+    assert dfa.match_many([]).tolist() == []
+    assert dfa.match_many(iter(["", "aa", "a\0", "\0", "a\U0001F600"])).tolist() == [True, True, False, False, False]
@@ -0,0 +1,50 @@
+import random
+import numpy as np
+import pytest
+from app.parallel import match_record
+from app.pattern import Pattern
+from regex_cases import random_regex, reference
+
+
+def stepped_map(dfa, data):
+    """State -> state mapping of data, one step at a time."""
+    mapping = []
+    for state in range(dfa.num_states):
+        for byte in data:
+            state = int(dfa.table[state, dfa.byte_classes[byte]])
+        mapping.append(state)
+    return mapping
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_transition_map_agrees_with_stepping(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        dfa = Pattern(random_regex(rng), byte_mode=True).dfa
+        data = bytes(rng.choice(b"abcd") for _ in range(rng.randrange(200)))
+        pos = rng.randrange(len(data) + 1)
+        assert dfa.transition_map(data, pos, block_size=4).tolist() == stepped_map(dfa, data[pos:])
+
+
+def test_transition_maps_compose_in_order():
+    dfa = Pattern("(a+b)*abb(a+b)", byte_mode=True).dfa
+    data = bytes(random.Random(0).choice(b"ab") for _ in range(5000))
+    mapping = np.arange(dfa.num_states)
+    for start in range(0, len(data), 333):
+        mapping = dfa.transition_map(data, start, start + 333)[mapping]
+    assert mapping.tolist() == dfa.transition_map(data).tolist()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_match_record_composes_chunks_in_order(tmp_path, workers):
+    rng = random.Random(0)
+    path = tmp_path / "input.record"
+    regex = "(a+b+c)*abc(a+b+c)(a+b+c)"
+    for suffix in ["abcab", "abcabc", ""]:
+        data = "".join(rng.choice("abc") for _ in range(3000)) + suffix
+        path.write_text(data)
+        assert match_record(str(path), regex, workers=workers, chunk_size=97) == (
+            reference(regex).fullmatch(data) is not None)
+    path.write_text("ccc" * 1000 + "ab" + "ccc" * 1000)
+    assert match_record(str(path), "ab", workers=workers, mode='search', chunk_size=100)
+    assert not match_record(str(path), "ba", workers=workers, mode='search', chunk_size=100)
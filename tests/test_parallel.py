@@ -0,0 +1,42 @@
+import random
+import pytest
+from app.parallel import match_file, split_lines
+from app.pattern import Pattern
+from regex_cases import random_regex, reference
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    rng = random.Random(0)
+    lines = ["".join(rng.choice("abcd") for _ in range(rng.randrange(12))) for _ in range(400)]
+    path = tmp_path / "input.log"
+    path.write_text("\n".join(lines))
+    return str(path), lines
+
+
+def test_split_lines_covers_the_file_on_line_boundaries(log_file):
+    path, lines = log_file
+    data = open(path, "rb").read()
+    chunks = split_lines(path, 100)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in chunks[1:])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_match_file_agrees_with_pattern(log_file, workers):
+    path, lines = log_file
+    rng = random.Random(workers)
+    for _ in range(5):
+        regex = random_regex(rng)
+        python_regex = reference(regex)
+        expected = [(number, line.encode()) for number, line in enumerate(lines, 1) if python_regex.search(line)]
+        assert match_file(path, regex, workers=workers, chunk_size=256) == expected, regex
+        assert match_file(path, Pattern(regex), workers=workers, chunk_size=256, count=True) == len(expected)
+        full = [(number, line.encode()) for number, line in enumerate(lines, 1) if python_regex.fullmatch(line)]
+        assert match_file(path, regex, workers=workers, mode='fullmatch', chunk_size=256) == full
+
+
+def test_unknown_mode_is_rejected(log_file):
+    with pytest.raises(ValueError, match="unknown mode"):
+        match_file(log_file[0], "a", mode='match')
@@ -0,0 +1,213 @@
+"""
+Regression tests for the iterative lexer and parser: on random regexes they
+must give the same tokens, the same trees (up to the flattening of nested
+UNION / CONCAT nodes) and the same SyntaxErrors as the recursive grammar
+they replaced, kept below as RecursiveLexer / RecursiveParser.
+"""
+import random
+import sys
+import pytest
+from app.ds.ast import ASTNode
+from app.regex.lexer import Lexer
+from app.regex.parser import Parser
+from app.regex.tokens import Token, TokenType, ignore_chars
+
+
+class RecursiveLexer:
+    """The lexer replaced by the single-pass one, unchanged."""
+
+    def __init__(self, regex):
+        self.regex = regex
+        self.pos = 0
+
+    def _current_char(self):
+        if self.pos >= len(self.regex):
+            return None
+        return self.regex[self.pos]
+
+    def _advance(self):
+        self.pos += 1
+
+    def _preprocess_regex(self):
+        self.regex = self.regex.replace(' ', '')
+        self.regex = self.regex.replace('\t', '')
+
+    def tokenize(self):
+        self._preprocess_regex()
+        self.tokens = []
+        self.pos = 0
+
+        while self.pos < len(self.regex):
+            char = self._current_char()
+
+            # Check if char matches any token type
+            token_found = False
+            for token_type in TokenType:
+                if token_type.value == char:
+                    self.tokens.append(Token(token_type))
+                    token_found = True
+                    break
+
+            # If no token type matched, it's either a symbol or ignored
+            if not token_found:
+                if char not in ignore_chars:
+                    self.tokens.append(Token(TokenType.SYMBOL, char))
+
+            self._advance()
+
+        return self.tokens
+
+
+class RecursiveParser:
+    """The recursive descent parser replaced by the iterative one, unchanged."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _current_token(self):
+        if self.pos >= len(self.tokens):
+            return None
+        return self.tokens[self.pos]
+
+    def _advance(self):
+        self.pos += 1
+
+    def parse(self):
+        return self.parse_expression()
+
+    def parse_expression(self):
+        terms = []
+
+        # Parse first term
+        terms.append(self.parse_term())
+
+        # Keep parsing terms while we see SYMBOL, LPAREN, or UNION
+        while True:
+            token = self._current_token()
+            if token is None or token.type == TokenType.RPAREN:
+                break
+
+            if token.type == TokenType.UNION:
+                self._advance()
+                terms.append(self.parse_term())
+                # Create UNION node immediately
+                last_two = terms[-2:]
+                terms = terms[:-2]
+                terms.append(ASTNode("UNION", None, last_two))
+            elif token.type in [TokenType.SYMBOL, TokenType.LPAREN]:
+                terms.append(self.parse_term())
+            else:
+                break
+
+        # Build concatenation tree from right to left
+        while len(terms) > 1:
+            right = terms.pop()
+            left = terms.pop()
+            terms.append(ASTNode("CONCAT", None, [left, right]))
+
+        return terms[0]
+
+    def parse_term(self):
+        # Parse a factor and handle any postfix operators
+        left = self.parse_factor()
+
+        while True:
+            token = self._current_token()
+            if token is None:
+                break
+
+            if token.type == TokenType.STAR:
+                self._advance()
+                left = ASTNode("STAR", None, [left])
+            else:
+                break
+
+        return left
+
+    def parse_factor(self):
+        token = self._current_token()
+
+        if token is None:
+            raise SyntaxError("Unexpected end of input")
+
+        if token.type == TokenType.SYMBOL:
+            self._advance()
+            return ASTNode("SYMBOL", token.value)
+        elif token.type == TokenType.LPAREN:
+            self._advance()
+            expr = self.parse_expression()
+            if self._current_token() is None or self._current_token().type != TokenType.RPAREN:
+                raise SyntaxError("Expected closing parenthesis")
+            self._advance()
+            return expr
+        else:
+            raise SyntaxError(f"Unexpected token: {token}")
+
+
+def flatten(node):
+    """
+    Returns a tree as nested tuples, with UNION and CONCAT children that are
+    themselves UNION / CONCAT nodes merged into their parent.
+    """
+    if node.type == "SYMBOL":
+        return node.value
+    children = []
+    for child in map(flatten, node.children):
+        if node.type in ("UNION", "CONCAT") and isinstance(child, tuple) and child[0] == node.type:
+            children.extend(child[1])
+        else:
+            children.append(child)
+    return (node.type, tuple(children))
+
+
+def parse_with(lexer_class, parser_class, regex):
+    """Returns (tokens, flattened tree), or the message of the SyntaxError raised."""
+    try:
+        tokens = lexer_class(regex).tokenize()
+        return [(token.type, token.value) for token in tokens], flatten(parser_class(tokens).parse())
+    except SyntaxError as error:
+        return str(error)
+
+
+def random_regexes(count, seed):
+    """Random strings over symbols, operators and ignored characters, valid or not."""
+    rng = random.Random(seed)
+    return ["".join(rng.choice("ab()+*. \t") for _ in range(rng.randrange(14))) for _ in range(count)]
+
+
+EDGE_CASES = ["", "a", "ab+cd", "a+b+c", "(a+b)+(c+d)", "a**", "a.b", "a)b", "(a", "()",
+              "+a", "a+", "a+*", "a+)", "((a))*b", "(ab)(cd)", "a b\tc", "é+ü", "a(b",
+              "a+(b+c)d", "(a+b)*+c", "a+b*c", ")", "*", "((((a))))"]
+
+
+@pytest.mark.parametrize("regex", EDGE_CASES)
+def test_edge_cases_match_recursive_grammar(regex):
+    assert parse_with(Lexer, Parser, regex) == parse_with(RecursiveLexer, RecursiveParser, regex)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_regexes_match_recursive_grammar(seed):
+    for regex in random_regexes(1000, seed):
+        assert parse_with(Lexer, Parser, regex) == parse_with(RecursiveLexer, RecursiveParser, regex), regex
+
+
+def test_union_binds_tighter_than_concatenation():
+    tree = flatten(Parser(Lexer("ab+cd").tokenize()).parse())
+    assert tree == ("CONCAT", ("a", ("UNION", ("b", "c")), "d"))
+
+
+def test_deep_nesting_does_not_recurse():
+    depth = sys.getrecursionlimit() * 4
+    tree = Parser(Lexer("(" * depth + "a" + ")*" * depth).tokenize()).parse()
+    for _ in range(depth):
+        assert tree.type == "STAR"
+        tree = tree.children[0]
+    assert tree.type == "SYMBOL" and tree.value == "a"
+
+
+def test_long_unions_and_concatenations_are_flat():
+    tree = Parser(Lexer("+".join("ab" * 5000)).tokenize()).parse()
+    assert tree.type == "UNION" and len(tree.children) == 10000
+    tree = Parser(Lexer("ab" * 5000).tokenize()).parse()
+    assert tree.type == "CONCAT" and len(tree.children) == 10000
@@ -0,0 +1,101 @@
+import random
+import pytest
+from app.pattern import Pattern, compile_pattern
+from regex_cases import INPUT_SYMBOLS, random_regex, reference
+
+
+def brute_force_matches(regex, string, pos=0, endpos=None):
+    """
+    Leftmost-longest non-overlapping matches of string[pos:endpos], found by
+    trying every substring with re. After an empty match the search resumes
+    one position further, like finditer does.
+    """
+    full = reference(regex).fullmatch
+    endpos = len(string) if endpos is None else min(endpos, len(string))
+    matches = []
+    current = pos
+    while current <= endpos:
+        found = None
+        for start in range(current, endpos + 1):
+            ends = [end for end in range(start, endpos + 1) if full(string, start, end)]
+            if ends:
+                found = (start, max(ends))
+                break
+        if found is None:
+            break
+        matches.append(found)
+        start, end = found
+        current = end if end > start else end + 1
+    return matches
+
+
+def random_string(rng, length):
+    return "".join(rng.choice(INPUT_SYMBOLS) for _ in range(length))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_finditer_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        regex = random_regex(rng)
+        pattern = Pattern(regex)
+        for _ in range(15):
+            string = random_string(rng, rng.randrange(14))
+            spans = [match.span() for match in pattern.finditer(string)]
+            assert spans == brute_force_matches(regex, string), (regex, string)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_finditer_with_bounds_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        regex = random_regex(rng)
+        pattern = Pattern(regex)
+        for _ in range(10):
+            string = random_string(rng, rng.randrange(14))
+            pos = rng.randrange(len(string) + 1)
+            endpos = rng.randrange(pos, len(string) + 2)
+            spans = [match.span() for match in pattern.finditer(string, pos, endpos)]
+            assert spans == brute_force_matches(regex, string, pos, endpos), (regex, string, pos, endpos)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_search_match_fullmatch(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        regex = random_regex(rng)
+        pattern = Pattern(regex)
+        full = reference(regex).fullmatch
+        for _ in range(15):
+            string = random_string(rng, rng.randrange(10))
+            assert pattern.fullmatch(string) == bool(full(string)), (regex, string)
+            expected = brute_force_matches(regex, string)
+            found = pattern.search(string)
+            assert (found.span() if found else None) == (expected[0] if expected else None)
+            ends = [end for end in range(len(string) + 1) if full(string, 0, end)]
+            found = pattern.match(string)
+            assert (found.span() if found else None) == ((0, max(ends)) if ends else None)
+
+
+def test_findall_returns_match_text():
+    assert Pattern("ab*").findall("abbcaab") == ["abb", "a", "ab"]
+    assert Pattern("a*").findall("ba") == ["", "a", ""]
+
+
+def test_overlapping_scans_stay_linear():
+    # Every 'a' is a match and every scan could still reach a later 'b':
+    # without the scan memo each of the n scans runs to the end of the input
+    pattern = Pattern("a+(a*b)")
+    dfa = pattern._anchored.dfa
+    steps = []
+    step = dfa.step
+    dfa.step = lambda state, symbol: steps.append(1) or step(state, symbol)
+    string = "a" * 3000
+    assert len(pattern.findall(string)) == 3000
+    assert len(steps) <= 4 * len(string)
+
+
+def test_compile_pattern_is_cached():
+    assert compile_pattern("ab+c") is compile_pattern("ab+c")
+    assert compile_pattern("ab+c", use_cache=False) is not compile_pattern("ab+c")
+
@@ -0,0 +1,39 @@
+import random
+import pytest
+from app.pattern import PatternSet
+from regex_cases import INPUT_SYMBOLS, random_regex, reference
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_match_reports_every_matching_pattern(seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        regexes = [random_regex(rng) for _ in range(rng.randrange(1, 6))]
+        references = [reference(regex) for regex in regexes]
+        patterns = PatternSet(regexes)
+        assert len(patterns) == len(regexes)
+        for _ in range(40):
+            string = "".join(rng.choice(INPUT_SYMBOLS) for _ in range(rng.randrange(8)))
+            expected = [index for index, full in enumerate(references) if full.fullmatch(string)]
+            assert patterns.match(string) == expected, (regexes, string)
+
+
+def test_identical_patterns_share_accepting_states():
+    patterns = PatternSet(["ab*", "ab*", "a(b+c)*"])
+    assert patterns.match("abb") == [0, 1, 2]
+    assert patterns.match("acb") == [2]
+    assert patterns.match("") == []
+
+
+def test_prefilter_rejects_inputs_without_required_literals():
+    patterns = PatternSet(["x*error", "(a+b)*fatal"])
+    assert sorted(patterns._prefilter) == ["error", "fatal"]
+    assert patterns.match("xxerror") == [0]
+    assert patterns.match("abfatal") == [1]
+    assert patterns.match("abab") == []
+
+
+def test_no_prefilter_when_a_pattern_has_no_required_literal():
+    patterns = PatternSet(["error", "a*"])
+    assert patterns._prefilter is None
+    assert patterns.match("") == [1]
@@ -0,0 +1,32 @@
+import pytest
+from app.app import build_fa
+from app.fa.dfa_minimization import minimize_dfa
+from app.fa.nfa_to_dfa import convert_to_dfa
+from app.pattern import build_nfa, parse_regex
+from regex_cases import assert_same_language, cases
+
+KEYWORDS = ["if", "else", "while", "for", "return", "union", "typedef"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_followpos_construction(seed):
+    for regex, reference, inputs in cases(seed):
+        dfa = build_fa(regex, use_cache=False, construction='followpos')
+        assert dfa.is_deterministic()
+        assert_same_language(dfa.run, reference, inputs, regex)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_followpos_minimizes_to_the_thompson_dfa(seed):
+    for regex, _, _ in cases(seed, count=20):
+        followpos = build_fa(regex, use_cache=False, construction='followpos', if_minimize_dfa=True)
+        thompson = minimize_dfa(convert_to_dfa(build_nfa(parse_regex(regex))))
+        assert len(followpos.states) == len(thompson.states), regex
+
+
+def test_keyword_union():
+    dfa = build_fa("+".join(f"({keyword})" for keyword in KEYWORDS), use_cache=False, construction='followpos')
+    assert all(dfa.run(keyword) for keyword in KEYWORDS)
+    assert not any(dfa.run(string) for string in ["", "i", "ifelse", "whil", "fo"])
+    # Without the groups, union binds tighter: i(f+e)lse...
+    assert not build_fa("+".join(KEYWORDS), use_cache=False, construction='followpos').run("if")
@@ -0,0 +1,50 @@
+import pytest
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.serialization import dump_dfa, dump_fa, load_dfa, load_fa, loads_dfa, save_dfa
+from app.pattern import Pattern, PatternSet, build_nfa, parse_regex
+from regex_cases import assert_same_language, cases
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_loaded_dfa_matches_re(seed):
+    for regex, reference, inputs in cases(seed):
+        dfa = Pattern(regex).dfa
+        mapped = loads_dfa(dump_dfa(dfa))
+        assert_same_language(mapped.run, reference, inputs, regex)
+        assert_same_language(lambda string: mapped.run(string.encode()), reference, inputs, regex)
+        assert mapped.to_compiled().match_many(inputs).tolist() == dfa.match_many(inputs).tolist()
+
+
+def test_save_and_mmap_load(tmp_path):
+    path = tmp_path / "dfa.bin"
+    save_dfa(Pattern("(a+b)*abb").dfa, path)
+    with load_dfa(path) as mapped:
+        assert mapped.run("babb") and not mapped.run("abba")
+        assert mapped.run_bytes(b"xxabbx", 2, 5)
+
+
+def test_tags_survive_round_trip():
+    patterns = PatternSet(["ab*", "a(b+c)", "c"])
+    mapped = loads_dfa(dump_dfa(patterns.dfa))
+    for string in ["a", "ab", "ac", "abb", "c", "", "ca"]:
+        assert sorted(mapped.match_tags(string)) == sorted(patterns.match(string)), string
+
+
+def test_corrupt_buffers_are_rejected():
+    data = bytearray(dump_dfa(Pattern("ab").dfa))
+    data[-1] ^= 1
+    with pytest.raises(ValueError, match="checksum"):
+        loads_dfa(bytes(data))
+    assert loads_dfa(bytes(data), verify=False).num_states > 0
+    with pytest.raises(ValueError, match="magic"):
+        loads_dfa(b"XXXX" + bytes(data[4:]))
+    with pytest.raises(ValueError, match="too small"):
+        loads_dfa(b"RDFA")
+
+
+def test_fa_round_trip_keeps_the_language():
+    for regex, reference, inputs in cases(3, count=20):
+        nfa = build_nfa(parse_regex(regex))
+        loaded = load_fa(dump_fa(nfa))
+        assert loaded.starting_state == nfa.starting_state
+        assert_same_language(NFASimulator(loaded).run, reference, inputs, regex)
@@ -0,0 +1,67 @@
+import pytest
+from app.app import build_fa
+from app.cache import compiled_cache, purge_cache
+from app.fa import store
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.store import AutomatonStore
+from regex_cases import assert_same_language, cases
+
+
+@pytest.fixture
+def automata(tmp_path):
+    purge_cache()
+    with AutomatonStore(str(tmp_path / "automata.db")) as opened:
+        yield opened
+    purge_cache()
+
+
+def test_stored_stages_keep_the_language(automata):
+    for regex, reference, inputs in cases(0, count=15):
+        minimized = automata.compile(regex)
+        assert_same_language(minimized.run, reference, inputs, regex)
+        for stage in store.STAGES:
+            loaded = automata.load(regex, stage)
+            assert_same_language(NFASimulator(loaded).run, reference, inputs, regex)
+        assert_same_language(automata.load_compiled(regex).run, reference, inputs, regex)
+
+
+def test_compile_builds_the_nfa_once(automata, monkeypatch):
+    calls = []
+    monkeypatch.setattr(store, "build_fa", lambda *args, **kwargs: calls.append(kwargs) or build_fa(*args, **kwargs))
+    automata.compile("(a+b)*abb")
+    assert len(calls) == 1
+    assert automata.compile("(a + b)*abb").run("abb")
+    assert len(calls) == 1
+
+
+def test_equivalent_regexes_share_the_minimized_blob(automata):
+    automata.compile("a(a)*")
+    automata.compile("(a)*a")
+    stats = automata.stats()
+    assert stats['automata'] == 2 and stats['distinct_minimized'] == 1
+    automata.delete("a(a)*")
+    assert automata.load("a(a)*") is None
+    assert automata.load("(a)*a").run("aa")
+
+
+def test_preload_fills_the_cache(automata):
+    automata.compile("ab*")
+    purge_cache()
+    assert automata.preload(stages=('nfa', 'minimized')) == 2
+    assert build_fa("ab*", if_convert_to_dfa=True, if_minimize_dfa=True) is compiled_cache.get(
+        store.fa_cache_key("ab*", False, True, True))
+
+
+@pytest.mark.parametrize("stages", [("minimized", "key"), ("minimized FROM automata; DROP TABLE blobs; --",)])
+def test_unknown_stages_are_rejected(automata, stages):
+    automata.compile("ab")
+    with pytest.raises(ValueError, match="unknown stage"):
+        automata.preload(stages=stages)
+    with pytest.raises(ValueError, match="unknown stage"):
+        automata.load("ab", stages[-1])
+    assert automata.stats()['blobs'] == 3
+
+
+def test_unknown_options_are_rejected(automata):
+    with pytest.raises(ValueError, match="unknown pipeline options"):
+        automata.load("ab", byte_mode=True)
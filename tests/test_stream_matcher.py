@@ -0,0 +1,120 @@
+import random
+import pytest
+from app.app import build_fa
+from app.fa.lazy_dfa import LazyDFA
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.stream_matcher import ACCEPT, DEAD, REJECT, StreamMatcher
+from app.pattern import Pattern, build_nfa, parse_regex
+from regex_cases import INPUT_SYMBOLS, random_regex, reference
+
+
+def expected_events(regex, string):
+    """ACCEPT / REJECT events of a stream, from the acceptance of every prefix."""
+    full = reference(regex).fullmatch
+    events = []
+    accepting = bool(full(""))
+    for end in range(1, len(string) + 1):
+        if bool(full(string, 0, end)) != accepting:
+            accepting = not accepting
+            events.append((ACCEPT if accepting else REJECT, end))
+    return events
+
+
+def feed_in_chunks(stream, string, rng):
+    events = []
+    position = 0
+    while position < len(string):
+        size = rng.randrange(1, 5)
+        events += stream.feed(string[position:position + size])
+        position += size
+    return events
+
+
+def matchers(regex):
+    """Every kind of matcher StreamMatcher takes, for the same regex."""
+    nfa = build_nfa(parse_regex(regex))
+    return [Pattern(regex).dfa, nfa, LazyDFA(nfa), NFASimulator(nfa)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_chunked_events_follow_prefix_acceptance(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        regex = random_regex(rng)
+        for _ in range(5):
+            string = "".join(rng.choice(INPUT_SYMBOLS) for _ in range(rng.randrange(12)))
+            expected = expected_events(regex, string)
+            for matcher in matchers(regex):
+                stream = StreamMatcher(matcher)
+                events = feed_in_chunks(stream, string, rng)
+                dead = [offset for kind, offset in events if kind == DEAD]
+                events = [event for event in events if event[0] != DEAD]
+                if dead:
+                    # Nothing can be accepted after the DEAD event
+                    assert all(offset <= dead[0] for _, offset in expected)
+                    expected = [event for event in expected if event[1] <= dead[0]]
+                assert events == expected, (regex, string, matcher)
+                assert stream.offset == len(string)
+
+
+def test_streams_of_one_nfa_do_not_share_state_ids():
+    # The subset DFA has 2^15 states: the random runs of fa.run() between
+    # the feeds fill and clear the FA's lazy DFA cache many times
+    regex = "(0+1)*1" + "(0+1)" * 14
+    fa = build_fa(regex, use_cache=False)
+    rng = random.Random(0)
+
+    def bits(length):
+        return "".join(rng.choice("01") for _ in range(length))
+
+    strings = [bits(400), bits(400)]
+    streams = [StreamMatcher(fa), StreamMatcher(fa)]
+    for start in range(0, 400, 8):
+        for stream, string in zip(streams, strings):
+            stream.feed(string[start:start + 8])
+            fa.run(bits(1000))
+    assert fa.matcher().cache_clears > 0
+    for stream, string in zip(streams, strings):
+        assert stream.close() == (reference(regex).fullmatch(string) is not None)
+
+
+def test_events_of_documented_example():
+    stream = StreamMatcher(LazyDFA(build_nfa(parse_regex("a")), unanchored=True))
+    assert stream.feed("aaba") == [(ACCEPT, 1), (REJECT, 3), (ACCEPT, 4)]
+
+
+def test_dead_stream_ignores_the_rest():
+    stream = StreamMatcher(Pattern("ab").dfa)
+    assert stream.feed("ac") == [(DEAD, 2)]
+    assert stream.is_dead()
+    assert stream.feed("ab") == []
+    assert stream.offset == 4 and not stream.close()
+
+
+def test_encoding_decodes_characters_split_across_chunks():
+    stream = StreamMatcher(Pattern("aé*").dfa, encoding="utf-8")
+    data = "aéé".encode("utf-8")
+    events = [event for index in range(len(data)) for event in stream.feed(data[index:index + 1])]
+    assert events == [(ACCEPT, 1)]
+    assert stream.offset == 3 and stream.close()
+
+
+def test_encoding_rejects_a_truncated_character():
+    stream = StreamMatcher(Pattern("é").dfa, encoding="utf-8")
+    stream.feed("é".encode("utf-8")[:1])
+    with pytest.raises(UnicodeDecodeError):
+        stream.close()
+
+
+def test_bytes_without_encoding_are_byte_symbols():
+    stream = StreamMatcher(Pattern("aé", byte_mode=True).dfa)
+    data = "aé".encode("utf-8")
+    assert stream.feed(data[:2]) == [] and stream.feed(memoryview(data)[2:]) == [(ACCEPT, 3)]
+
+
+def test_reset_forgets_the_input():
+    stream = StreamMatcher(Pattern("ab").dfa)
+    stream.feed("ab")
+    stream.reset()
+    assert stream.offset == 0 and not stream.is_accepting()
+    assert stream.feed("ab") == [(ACCEPT, 2)]
@@ -0,0 +1,47 @@
+import pytest
+from app.fa.lazy_dfa import LazyDFA
+from app.fa.nfa_simulator import NFASimulator
+from app.fa.nfa_to_dfa import convert_to_dfa, determinize
+from app.pattern import build_nfa, parse_regex
+from regex_cases import assert_same_language, cases
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_thompson_nfa(seed):
+    for regex, reference, inputs in cases(seed):
+        nfa = build_nfa(parse_regex(regex))
+        assert_same_language(nfa.run, reference, inputs, regex)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_subset_construction(seed):
+    for regex, reference, inputs in cases(seed):
+        nfa = build_nfa(parse_regex(regex))
+        assert_same_language(determinize(nfa).run, reference, inputs, regex)
+        dfa = convert_to_dfa(nfa)
+        assert dfa.is_deterministic()
+        assert_same_language(dfa.run, reference, inputs, regex)
+
+
+def reachable_subsets(nfa, symbols):
+    """Every NFA state set reachable from the start, as NFASimulator bitsets."""
+    sim = NFASimulator(nfa)
+    subsets = [sim.start]
+    for subset in subsets:
+        for symbol in symbols:
+            target = sim.step(subset, symbol)
+            if target not in subsets:
+                subsets.append(target)
+    return subsets
+
+
+@pytest.mark.parametrize("regex", ["(a+b)*a(a+b)(a+b)", "(ab+ba)*", "a(a)*b(b)*"])
+def test_one_state_per_reachable_subset(regex):
+    nfa = build_nfa(parse_regex(regex))
+    subsets = reachable_subsets(nfa, "ab")
+    # State 0 is the dead state, reachable or not
+    num_states = len(set(subsets) | {0})
+    assert determinize(nfa).num_states == num_states
+    lazy = LazyDFA(nfa)
+    lazy.run("abababbbaaab" * 4)
+    assert lazy.stats()['cached_states'] <= num_states
@@ -0,0 +1,38 @@
+import itertools
+import random
+import pytest
+from app.fa.symbol_classes import SymbolClasses
+from app.pattern import Pattern, build_nfa, parse_regex
+from regex_cases import random_regex
+
+
+def moves(fa, symbol):
+    return [sorted(fa.transitions.targets(state, symbol)) for state in fa.states]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_classes_are_the_coarsest_partition_keeping_every_edge(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        regex = random_regex(rng)
+        fa = build_nfa(parse_regex(regex))
+        classes = fa.symbol_classes()
+        symbols = sorted(classes.class_map)
+        for first, second in itertools.combinations(symbols, 2):
+            same_class = classes.class_of(first) == classes.class_of(second)
+            assert same_class == (moves(fa, first) == moves(fa, second)), (regex, first, second)
+        assert classes.class_of("d") == 0
+
+
+def test_numbering_and_representatives():
+    classes = SymbolClasses([["x", "c"], ["b"], ["a", "z"]])
+    assert classes.classes == [[], ["a", "z"], ["b"], ["c", "x"]]
+    assert classes.representatives() == [(1, "a"), (2, "b"), (3, "c")]
+    assert len(classes) == 3 and classes.num_classes == 4
+    assert classes.class_of("z") == 1 and classes.class_of("?") == 0
+
+
+def test_interchangeable_symbols_share_a_table_column():
+    dfa = Pattern("(a+b+c+d+e)*x").dfa
+    assert dfa.num_classes == 3
+    assert dfa.run("abcdex") and dfa.run("x") and not dfa.run("abf")
@@ -0,0 +1,32 @@
+import random
+from app.ds.transition_store import TransitionStore
+from app.pattern import build_nfa, parse_regex
+from regex_cases import random_regex
+
+
+def test_frozen_transitions_keep_every_edge():
+    rng = random.Random(0)
+    for _ in range(30):
+        transitions = build_nfa(parse_regex(random_regex(rng))).transitions
+        frozen = transitions.freeze()
+        assert frozen.size == transitions.size
+        assert frozen.get_edges_count() == transitions.get_edges_count()
+        for state in range(transitions.size):
+            assert frozen.get_edges(state) == list(transitions.get_edges(state))
+            for dest, _ in transitions.get_edges(state):
+                assert frozen.get_edges(state, dest) == transitions.get_edges(state, dest)
+
+
+def test_edge_count_follows_deletions():
+    transitions = TransitionStore(3)
+    transitions.add_edge(0, 1, "a")
+    transitions.add_edge(0, 1, "a")
+    transitions.add_edge(1, 2, "")
+    transitions.add_edge(2, 0, "b")
+    transitions.remove_duplicate_edges()
+    assert transitions.get_edges_count() == 3
+    transitions.delete_vertex(1)
+    assert transitions.get_edges_count() == 1
+    assert transitions.get_edges(1) == [(0, "b")]
+    assert transitions.freeze().get_edges(1) == [(0, "b")]
+    assert TransitionStore(2).freeze().get_edges_count() == 0